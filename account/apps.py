@@ -1,6 +1,10 @@
-from django.apps import AppConfig
-
-
-class AccountConfig(AppConfig):
-    default_auto_field = "django.db.models.BigAutoField"
-    name = "account"
+from django.apps import AppConfig
+
+
+class AccountConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "account"
+
+    def ready(self):
+        # Connects the token cache invalidation signals
+        from . import authentication  # noqa: F401
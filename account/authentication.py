@@ -0,0 +1,178 @@
+"""
+Token authentication with a cached token -> user lookup.
+
+DRF's TokenAuthentication runs a Token/User join on every request. Here the
+user fields needed to authorize a request (CACHED_USER_FIELDS - never the
+password hash or profile data) are kept per token in the ACCOUNT_TOKEN_CACHE
+cache alias, so authenticated requests normally run no auth queries; the
+other user fields are deferred and load together on first access. Each entry
+records its token's generation, which is bumped when the token is deleted
+(logout, password change) and when its user is saved or deleted, so an
+entry written from a read that raced an invalidation is never served. The
+cache TIMEOUT bounds staleness for writes that bypass model signals (e.g.
+QuerySet.update()). With a per-process cache (the LocMem default) an
+invalidation only reaches the worker that made it, so there entries live at
+most LOCAL_TIMEOUT seconds; point the alias at
+Redis/Memcached to get the full TIMEOUT.
+"""
+import hashlib
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import router, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from virtual_tutor.caches import is_process_local
+from virtual_tutor.metrics import record_cache_lookup
+from virtual_tutor.profiling import span
+
+from .models import User
+
+logger = logging.getLogger(__name__)
+
+# What a cache hit rebuilds the user from; everything else is deferred
+CACHED_USER_FIELDS = (
+    'id', 'is_active', 'is_staff', 'is_superuser', 'is_student', 'is_admin_user', 'deletion_requested_at',
+)
+
+
+def _config():
+    return getattr(settings, 'ACCOUNT_TOKEN_CACHE', {})
+
+
+def _cache():
+    return caches[_config().get('ALIAS', 'default')]
+
+
+def _timeout(config):
+    timeout = config.get('TIMEOUT', 300)
+    if is_process_local(config.get('ALIAS', 'default')):
+        # Revocations in other workers would go unseen for the whole TIMEOUT
+        timeout = min(timeout, config.get('LOCAL_TIMEOUT', 5))
+    return timeout
+
+
+def token_cache_key(key):
+    # Hash so raw tokens never end up in cache keys (or a shared cache's key listing)
+    return f"auth:token:{hashlib.sha256(key.encode('utf-8')).hexdigest()}"
+
+
+def generation_key(key):
+    return f"auth:gen:{hashlib.sha256(key.encode('utf-8')).hexdigest()}"
+
+
+def _seed_generation(cache, gen_key, timeout):
+    # Seeded from the clock so an evicted counter never repeats an old value
+    cache.add(gen_key, time.time_ns(), timeout)
+    return cache.get(gen_key)
+
+
+def invalidate_token(key):
+    """Bump the token's generation, retiring its cached entry (and any racing write)"""
+    gen_key = generation_key(key)
+    try:
+        cache = _cache()
+        try:
+            cache.incr(gen_key)
+        except ValueError:
+            cache.set(gen_key, time.time_ns(), _timeout(_config()))
+        cache.delete(token_cache_key(key))
+    except Exception as e:
+        logger.error(f"Error invalidating cached token: {str(e)}")
+
+
+def _retire(keys):
+    for key in keys:
+        invalidate_token(key)
+
+
+def _retire_now_and_on_commit(keys):
+    # Signals fire before commit: a request reading the old row until then
+    # would cache it under the bumped generation, so bump once more after
+    _retire(keys)
+    transaction.on_commit(lambda: _retire(keys))
+
+
+def invalidate_user(user_id):
+    """Retire the cached entries of every token ``user_id`` has"""
+    _retire_now_and_on_commit(list(Token.objects.filter(user_id=user_id).values_list('key', flat=True)))
+
+
+def _cached_credentials(key, values):
+    db = router.db_for_read(User)
+    # from_db expects partial values in model field order
+    names = [f.attname for f in User._meta.concrete_fields if f.attname in values]
+    user = User.from_db(db, names, [values[name] for name in names])
+    token = Token.from_db(db, ['key', 'user_id'], [key, user.pk])
+    token.user = user
+    return user, token
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Drop-in replacement for rest_framework.authentication.TokenAuthentication
+    Same header format and error messages; lookups are served from the cache
+    """
+
+    def authenticate(self, request):
+        with span('auth'):
+            return super().authenticate(request)
+
+    def authenticate_credentials(self, key):
+        config = _config()
+        if not config.get('ENABLED', True):
+            return super().authenticate_credentials(key)
+
+        cache = _cache()
+        cache_key = token_cache_key(key)
+        gen_key = generation_key(key)
+        timeout = _timeout(config)
+        try:
+            cached = cache.get_many([cache_key, gen_key])
+            entry, generation = cached.get(cache_key), cached.get(gen_key)
+            if generation is None:
+                generation = _seed_generation(cache, gen_key, timeout)
+            if entry is not None and entry['generation'] != generation:
+                # Retired by an invalidation; drop it so the add below can replace it
+                cache.delete(cache_key)
+                entry = None
+        except Exception as e:
+            logger.error(f"Error reading token cache: {str(e)}")
+            entry = generation = None
+        record_cache_lookup('auth_token', entry is not None)
+
+        if entry is None:
+            # generation was read before the DB, so an invalidation landing
+            # in between leaves this entry already retired
+            user, token = super().authenticate_credentials(key)
+            if generation is not None:
+                values = {field: getattr(user, field) for field in CACHED_USER_FIELDS}
+                try:
+                    cache.add(cache_key, {'generation': generation, 'user': values}, timeout)
+                except Exception as e:
+                    logger.error(f"Error writing token cache: {str(e)}")
+            return (user, token)
+
+        user, token = _cached_credentials(key, entry['user'])
+        if not user.is_active or user.deletion_requested_at is not None:
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+
+        return (user, token)
+
+
+@receiver(post_delete, sender=Token)
+def _token_deleted(sender, instance, **kwargs):
+    _retire_now_and_on_commit([instance.key])
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def _user_changed(sender, instance, **kwargs):
+    invalidate_user(instance.pk)
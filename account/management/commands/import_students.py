@@ -0,0 +1,53 @@
+"""
+Create students from a CSV or JSON roster.
+
+    python manage.py import_students roster.csv
+    python manage.py import_students roster.json --dry-run --report report.json
+
+The CSV needs a header row with full_name, email, phone_number,
+date_of_birth, grade_level and password. Rows that fail validation (or
+whose email is taken) are reported and skipped; the rest are created.
+"""
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from account.roster import ROSTER_FORMATS, RosterError, import_students, parse_roster
+
+
+class Command(BaseCommand):
+    help = 'Bulk-create students (with auth tokens) from a CSV or JSON roster'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Roster file')
+        parser.add_argument('--format', choices=ROSTER_FORMATS, help='Default: from the file extension')
+        parser.add_argument('--dry-run', action='store_true', help='Only validate the roster')
+        parser.add_argument('--batch-size', type=int, help="Override ACCOUNT_IMPORT['BATCH_SIZE']")
+        parser.add_argument('--workers', type=int, help="Password hashing processes (default: ACCOUNT_IMPORT['HASH_WORKERS'])")
+        parser.add_argument('--report', help='Write the per-row report as JSON to this file')
+
+    def handle(self, *args, **options):
+        roster_format = options['format'] or options['path'].rsplit('.', 1)[-1].lower()
+        try:
+            with open(options['path'], 'rb') as roster:
+                rows = parse_roster(roster.read(), roster_format)
+        except (OSError, RosterError) as e:
+            raise CommandError(str(e))
+
+        started = time.monotonic()
+        report = import_students(
+            rows, dry_run=options['dry_run'], batch_size=options['batch_size'], workers=options['workers']
+        )
+        for result in report['results']:
+            if result['status'] == 'error':
+                self.stderr.write(f"  row {result['row']} ({result['email']}): {json.dumps(result['errors'])}")
+
+        if options['report']:
+            with open(options['report'], 'w') as output:
+                json.dump(report, output, indent=2, default=str)
+
+        verb = 'valid' if options['dry_run'] else 'created'
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(rows) - report['failed']} {verb}, {report['failed']} failed ({time.monotonic() - started:.1f}s)"
+        ))
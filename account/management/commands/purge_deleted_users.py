@@ -0,0 +1,26 @@
+"""
+Finish account deletions.
+
+    python manage.py purge_deleted_users
+
+Deleted accounts are purged in the background right after the request; this
+picks up any whose purge was interrupted (restart, error). Safe to run from
+cron.
+"""
+from django.core.management.base import BaseCommand
+
+from account.services import pending_deletions, purge_user
+
+
+class Command(BaseCommand):
+    help = 'Delete the data of accounts scheduled for deletion'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, help="Override BACKGROUND_DELETION['BATCH_SIZE']")
+
+    def handle(self, *args, **options):
+        user_ids = list(pending_deletions().order_by('id').values_list('id', flat=True))
+        for user_id in user_ids:
+            purge_user(user_id, batch_size=options['batch_size'])
+            self.stdout.write(f"  purged user {user_id}")
+        self.stdout.write(self.style.SUCCESS(f"Purged {len(user_ids)} accounts"))
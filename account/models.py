@@ -1,20 +1,31 @@
-# models.py (in account app)
-from django.contrib.auth.models import AbstractUser
-from django.db import models
-from django.conf import settings
-
-class User(AbstractUser):
-    email = models.EmailField(unique=True)
-    is_student = models.BooleanField(default=False)
-    is_admin_user = models.BooleanField(default=False)
-    phone = models.CharField(max_length=15, null=True, blank=True)
-    dob = models.DateField(null=True, blank=True)
-    grade_level = models.CharField(max_length=50, null=True, blank=True)
-    
-    # Use email as the username field for login
-    USERNAME_FIELD = 'email'
-    REQUIRED_FIELDS = ['username']
-
-    def __str__(self):
-        user_type = "Student" if self.is_student else "Admin" if self.is_admin_user else "User"
+# models.py (in account app)
+from django.contrib.auth.models import AbstractUser
+from django.db import models
+from django.conf import settings
+
+class User(AbstractUser):
+    email = models.EmailField(unique=True)
+    is_student = models.BooleanField(default=False)
+    is_admin_user = models.BooleanField(default=False)
+    phone = models.CharField(max_length=15, null=True, blank=True)
+    dob = models.DateField(null=True, blank=True)
+    grade_level = models.CharField(max_length=50, null=True, blank=True)
+    # Set (with is_active=False) when the account is scheduled for deletion; see services.py
+    deletion_requested_at = models.DateTimeField(null=True, blank=True, db_index=True)
+    
+    # Use email as the username field for login
+    USERNAME_FIELD = 'email'
+    REQUIRED_FIELDS = ['username']
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        # Users rebuilt from the token cache defer most fields; the first one
+        # touched loads them all rather than one query per field
+        if fields is not None:
+            deferred = self.get_deferred_fields()
+            if deferred.intersection(fields):
+                fields = deferred.union(fields)
+        super().refresh_from_db(using, fields, **kwargs)
+
+    def __str__(self):
+        user_type = "Student" if self.is_student else "Admin" if self.is_admin_user else "User"
         return f"{self.email} ({user_type})"
\ No newline at end of file
@@ -0,0 +1,266 @@
+"""
+Bulk student import from CSV or JSON rosters.
+
+Used by the students/import/ endpoint and the import_students command.
+Rows carry the student signup fields (full_name, email, phone_number,
+date_of_birth, grade_level, password). The roster is processed set-wise:
+
+1. every row is validated on its own (no queries);
+2. emails are checked against the database in one query per chunk, and
+   against earlier rows of the same roster;
+3. passwords are hashed in worker processes, since PBKDF2 is CPU-bound
+   and would otherwise dominate the import: the command starts a pool of
+   HASH_WORKERS for its run, API requests share one long-lived pool of
+   REQUEST_HASH_WORKERS per server process (see request_hash_pool);
+4. users are inserted with bulk_create, BATCH_SIZE per transaction, and
+   given auth tokens in bulk.
+
+The result is a report with one entry per row, in roster order.
+"""
+import csv
+import io
+import json
+import logging
+import multiprocessing
+import atexit
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import django
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.contrib.auth.hashers import make_password
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from rest_framework.authtoken.models import Token
+
+from .models import User
+from .serializers import StudentImportRowSerializer
+
+logger = logging.getLogger(__name__)
+
+ROSTER_FORMATS = ('csv', 'json')
+
+# Below this many passwords starting worker processes costs more than it saves
+_MIN_POOL_SIZE = 8
+_EMAIL_CHUNK_SIZE = 1000
+
+
+class RosterError(ValueError):
+    """The roster as a whole could not be read"""
+
+
+def _config():
+    return getattr(settings, 'ACCOUNT_IMPORT', {})
+
+
+def parse_roster(data, roster_format):
+    """List of row dicts from CSV (with a header row) or JSON (a list, or {"students": [...]}) bytes"""
+    if isinstance(data, bytes):
+        try:
+            data = data.decode('utf-8-sig')
+        except UnicodeDecodeError:
+            raise RosterError('Roster must be UTF-8 encoded.')
+    if roster_format == 'csv':
+        reader = csv.DictReader(io.StringIO(data))
+        if not reader.fieldnames:
+            raise RosterError('CSV roster has no header row.')
+        return [{key.strip(): (value or '').strip() for key, value in row.items() if key} for row in reader]
+    if roster_format == 'json':
+        try:
+            rows = json.loads(data)
+        except ValueError as e:
+            raise RosterError(f'Invalid JSON roster: {str(e)}')
+        return rows_from_json(rows)
+    raise RosterError(f"Roster format must be one of: {', '.join(ROSTER_FORMATS)}.")
+
+
+def rows_from_json(rows):
+    if isinstance(rows, dict):
+        rows = rows.get('students')
+    if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+        raise RosterError('JSON roster must be a list of student objects (or {"students": [...]}).')
+    return rows
+
+
+def _spawn_pool(workers):
+    # spawn: forking a threaded server process is unsafe; workers set Django up themselves
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=django.setup,
+    )
+
+
+def hash_passwords(passwords, workers=None, pool=None):
+    """
+    ``make_password`` for each password, spread over worker processes
+    Uses ``pool`` when given; otherwise starts ``workers`` processes just for
+    this call (too slow to start on a request path; see request_hash_pool)
+    """
+    if pool is not None:
+        if len(passwords) < _MIN_POOL_SIZE:
+            return [make_password(password) for password in passwords]
+        try:
+            # Each hash takes far longer than shipping it, so one per task balances best
+            return list(pool.map(make_password, passwords))
+        except BrokenProcessPool as e:
+            # A worker died; the next request gets a fresh pool
+            logger.error(f"Password hashing pool broke, hashing inline: {str(e)}")
+            _discard_request_pool(pool)
+            return [make_password(password) for password in passwords]
+    workers = workers or _config().get('HASH_WORKERS') or os.cpu_count() or 1
+    if workers <= 1 or len(passwords) < _MIN_POOL_SIZE:
+        return [make_password(password) for password in passwords]
+    with _spawn_pool(min(workers, len(passwords))) as pool:
+        return list(pool.map(make_password, passwords, chunksize=max(1, len(passwords) // (workers * 4))))
+
+
+_request_pool = None
+_request_pool_lock = threading.Lock()
+
+
+def request_hash_pool():
+    """The process-wide pool for imports made over the API, or None to hash inline"""
+    global _request_pool
+    workers = _config().get('REQUEST_HASH_WORKERS', 2)
+    if not workers or workers <= 1:
+        return None
+    if _request_pool is None:
+        with _request_pool_lock:
+            if _request_pool is None:
+                _request_pool = _spawn_pool(workers)
+    return _request_pool
+
+
+@atexit.register
+def _shutdown_request_pool():
+    if _request_pool is not None:
+        _request_pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _discard_request_pool(pool):
+    global _request_pool
+    with _request_pool_lock:
+        if _request_pool is pool:
+            _request_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _reset_request_pool(*, setting, **kwargs):
+    if setting == 'ACCOUNT_IMPORT' and _request_pool is not None:
+        _discard_request_pool(_request_pool)
+
+
+setting_changed.connect(_reset_request_pool)
+
+
+def _existing_emails(emails):
+    taken = set()
+    for start in range(0, len(emails), _EMAIL_CHUNK_SIZE):
+        chunk = emails[start:start + _EMAIL_CHUNK_SIZE]
+        # username is the email too (see StudentSignupSerializer), and unique as well
+        existing = User.objects.filter(Q(email__in=chunk) | Q(username__in=chunk)).values_list('email', 'username')
+        for email, username in existing:
+            taken.add(email.lower())
+            taken.add(username.lower())
+    return taken
+
+
+def _new_user(data, password_hash):
+    name_parts = data['full_name'].split(' ', 1)
+    return User(
+        username=data['email'],
+        email=data['email'],
+        first_name=name_parts[0],
+        last_name=name_parts[1] if len(name_parts) > 1 else '',
+        phone=data['phone_number'],
+        dob=data['date_of_birth'],
+        grade_level=data['grade_level'],
+        is_student=True,
+        password=password_hash,
+    )
+
+
+def _insert_batch(users):
+    """Insert ``users`` with their tokens; returns {email: id} of those created"""
+    try:
+        with transaction.atomic():
+            User.objects.bulk_create(users)
+            # MySQL does not return ids from bulk_create
+            ids = dict(User.objects.filter(email__in=[user.email for user in users]).values_list('email', 'id'))
+            Token.objects.bulk_create([Token(key=Token.generate_key(), user_id=user_id) for user_id in ids.values()])
+        return ids
+    except IntegrityError as e:
+        # Someone registered one of these emails meanwhile; keep the rest
+        logger.error(f"Error importing {len(users)} students in bulk, retrying one by one: {str(e)}")
+
+    ids = {}
+    for user in users:
+        try:
+            with transaction.atomic():
+                user.pk = None
+                user._state.adding = True
+                user.save(force_insert=True)
+                Token.objects.create(user=user)
+            ids[user.email] = user.pk
+        except IntegrityError:
+            pass
+    return ids
+
+
+def import_students(rows, dry_run=False, batch_size=None, workers=None, pool=None):
+    """
+    Validate and create students for ``rows``
+    Returns {'created', 'failed', 'results'}; results[i] describes rows[i]
+    with 'row' (1-based), 'email', 'status' ('created', 'valid' on a dry
+    run, or 'error') and 'id' or 'errors'. Passwords are hashed in ``pool``
+    if given, else in ``workers`` processes started for this call
+    """
+    batch_size = batch_size or _config().get('BATCH_SIZE', 500)
+    results = []
+    valid = []
+
+    for number, row in enumerate(rows, start=1):
+        serializer = StudentImportRowSerializer(data=row)
+        if serializer.is_valid():
+            results.append({'row': number, 'email': serializer.validated_data['email']})
+            valid.append((results[-1], serializer.validated_data))
+        else:
+            results.append({
+                'row': number, 'email': row.get('email'), 'status': 'error', 'errors': serializer.errors
+            })
+
+    taken = _existing_emails([data['email'] for _, data in valid])
+    accepted = []
+    for result, data in valid:
+        email = data['email'].lower()
+        if email in taken:
+            result.update(status='error', errors={'email': ['A user with this email already exists.']})
+            continue
+        taken.add(email)
+        accepted.append((result, data))
+
+    if dry_run:
+        for result, _ in accepted:
+            result['status'] = 'valid'
+    elif accepted:
+        hashes = hash_passwords([data['password'] for _, data in accepted], workers, pool)
+        for start in range(0, len(accepted), batch_size):
+            batch = accepted[start:start + batch_size]
+            ids = _insert_batch([
+                _new_user(data, password_hash) for (_, data), password_hash in zip(batch, hashes[start:start + batch_size])
+            ])
+            for result, data in batch:
+                if data['email'] in ids:
+                    result.update(status='created', id=ids[data['email']])
+                else:
+                    result.update(status='error', errors={'email': ['A user with this email already exists.']})
+
+    return {
+        'created': sum(1 for result in results if result['status'] == 'created'),
+        'failed': sum(1 for result in results if result['status'] == 'error'),
+        'results': results,
+    }
@@ -1,207 +1,251 @@
-from rest_framework import serializers
-from .models import User
-from django.contrib.auth.password_validation import validate_password
-from django.conf import settings
-from django.contrib.auth import authenticate
-
-class StudentSignupSerializer(serializers.ModelSerializer):
-    full_name = serializers.CharField(max_length=255, write_only=True)
-    email = serializers.EmailField()
-    phone_number = serializers.CharField(max_length=15)
-    date_of_birth = serializers.DateField()
-    grade_level = serializers.CharField(max_length=50)
-    password = serializers.CharField(write_only=True, validators=[validate_password])
-    confirm_password = serializers.CharField(write_only=True)
-
-    class Meta:
-        model = User    
-        fields = ['full_name', 'email', 'phone_number', 'date_of_birth', 'grade_level', 'password', 'confirm_password']
-
-    def validate(self, attrs):
-        if attrs['password'] != attrs['confirm_password']:
-            raise serializers.ValidationError({"confirm_password": "Passwords do not match."})
-        
-        # Check if email already exists
-        if User.objects.filter(email=attrs['email']).exists():
-            raise serializers.ValidationError({"email": "A user with this email already exists."})
-        
-        return attrs
-
-    def create(self, validated_data):
-        full_name = validated_data.pop('full_name')
-        validated_data.pop('confirm_password')
-        password = validated_data.pop('password')
-        
-        # Split full name into first and last name
-        name_parts = full_name.split(' ', 1)
-        first_name = name_parts[0]
-        last_name = name_parts[1] if len(name_parts) > 1 else ''
-        
-        user = User.objects.create_user(
-            username=validated_data['email'],  # Use email as username
-            email=validated_data['email'],
-            first_name=first_name,
-            last_name=last_name,
-            phone=validated_data['phone_number'],
-            dob=validated_data['date_of_birth'],
-            grade_level=validated_data['grade_level'],
-            is_student=True,
-            password=password
-        )
-            
-        return user
-
-class AdminSignupSerializer(serializers.ModelSerializer):
-    full_name = serializers.CharField(max_length=255, write_only=True)
-    email = serializers.EmailField()
-    phone_number = serializers.CharField(max_length=15)
-    admin_code = serializers.CharField(write_only=True)
-    password = serializers.CharField(write_only=True, validators=[validate_password])
-    confirm_password = serializers.CharField(write_only=True)
-
-    class Meta:
-        model = User
-        fields = ['full_name', 'email', 'phone_number', 'admin_code', 'password', 'confirm_password']
-
-    def validate(self, attrs):
-        if attrs['password'] != attrs['confirm_password']:
-            raise serializers.ValidationError({"confirm_password": "Passwords do not match."})
-        
-        # Check admin code
-        if attrs['admin_code'] != settings.ADMIN_CODE:
-            raise serializers.ValidationError({"admin_code": "Invalid admin code."})
-        
-        # Check if email already exists
-        if User.objects.filter(email=attrs['email']).exists():
-            raise serializers.ValidationError({"email": "A user with this email already exists."})
-        
-        return attrs
-
-    def create(self, validated_data):
-        full_name = validated_data.pop('full_name')
-        validated_data.pop('confirm_password')
-        validated_data.pop('admin_code')
-        password = validated_data.pop('password')
-        
-        # Split full name into first and last name
-        name_parts = full_name.split(' ', 1)
-        first_name = name_parts[0]
-        last_name = name_parts[1] if len(name_parts) > 1 else ''
-        
-        user = User.objects.create_user(
-            username=validated_data['email'],  # Use email as username
-            email=validated_data['email'],
-            first_name=first_name,
-            last_name=last_name,
-            phone=validated_data['phone_number'],
-            is_admin_user=True,
-            is_staff=True,  # Allow admin panel access
-            password=password
-        )
-        
-        return user
-
-class LoginSerializer(serializers.Serializer):
-    email = serializers.EmailField()
-    password = serializers.CharField()
-
-    def validate(self, attrs):
-        email = attrs.get('email')
-        password = attrs.get('password')
-
-        if email and password:
-            user = authenticate(username=email, password=password)
-            if not user:
-                raise serializers.ValidationError('Invalid email or password.')
-            if not user.is_active:
-                raise serializers.ValidationError('User account is disabled.')
-            attrs['user'] = user
-            return attrs
-        else:
-            raise serializers.ValidationError('Must include email and password.')
-
-class UserSerializer(serializers.ModelSerializer):
-    full_name = serializers.SerializerMethodField()
-    user_type = serializers.SerializerMethodField()
-    
-    class Meta:
-        model = User
-        fields = ['id', 'email', 'full_name', 'phone', 'dob', 'grade_level', 'user_type', 'is_student', 'is_admin_user']
-    
-    def get_full_name(self, obj):
-        return f"{obj.first_name} {obj.last_name}".strip()
-    
-    def get_user_type(self, obj):
-        if obj.is_student:
-            return 'student'
-        elif obj.is_admin_user:
-            return 'admin'
-        return 'user'
-
-class StudentUpdateSerializer(serializers.ModelSerializer):
-    full_name = serializers.CharField(max_length=255, required=False)
-    
-    class Meta:
-        model = User
-        fields = ['full_name', 'email', 'phone', 'dob', 'grade_level']
-    
-    def validate_email(self, value):
-        if self.instance and self.instance.email != value:
-            if User.objects.filter(email=value).exists():
-                raise serializers.ValidationError("A user with this email already exists.")
-        return value
-    
-    def update(self, instance, validated_data):
-        if 'full_name' in validated_data:
-            full_name = validated_data.pop('full_name')
-            name_parts = full_name.split(' ', 1)
-            instance.first_name = name_parts[0]
-            instance.last_name = name_parts[1] if len(name_parts) > 1 else ''
-        
-        for attr, value in validated_data.items():
-            setattr(instance, attr, value)
-        
-        instance.save()
-        return instance
-
-class AdminUpdateSerializer(serializers.ModelSerializer):
-    full_name = serializers.CharField(max_length=255, required=False)
-    
-    class Meta:
-        model = User
-        fields = ['full_name', 'email', 'phone']
-    
-    def validate_email(self, value):
-        if self.instance and self.instance.email != value:
-            if User.objects.filter(email=value).exists():
-                raise serializers.ValidationError("A user with this email already exists.")
-        return value
-    
-    def update(self, instance, validated_data):
-        if 'full_name' in validated_data:
-            full_name = validated_data.pop('full_name')
-            name_parts = full_name.split(' ', 1)
-            instance.first_name = name_parts[0]
-            instance.last_name = name_parts[1] if len(name_parts) > 1 else ''
-        
-        for attr, value in validated_data.items():
-            setattr(instance, attr, value)
-        
-        instance.save()
-        return instance
-
-class PasswordChangeSerializer(serializers.Serializer):
-    current_password = serializers.CharField(write_only=True)
-    new_password = serializers.CharField(write_only=True, validators=[validate_password])
-    confirm_new_password = serializers.CharField(write_only=True)
-    
-    def validate(self, attrs):
-        if attrs['new_password'] != attrs['confirm_new_password']:
-            raise serializers.ValidationError({"confirm_new_password": "New passwords do not match."})
-        return attrs
-    
-    def validate_current_password(self, value):
-        user = self.context['request'].user
-        if not user.check_password(value):
-            raise serializers.ValidationError("Current password is incorrect.")
+from rest_framework import serializers
+from .models import User
+from django.contrib.auth.password_validation import validate_password
+from django.conf import settings
+from django.contrib.auth import authenticate
+
+class StudentSignupSerializer(serializers.ModelSerializer):
+    full_name = serializers.CharField(max_length=255, write_only=True)
+    email = serializers.EmailField()
+    phone_number = serializers.CharField(max_length=15)
+    date_of_birth = serializers.DateField()
+    grade_level = serializers.CharField(max_length=50)
+    password = serializers.CharField(write_only=True, validators=[validate_password])
+    confirm_password = serializers.CharField(write_only=True)
+
+    class Meta:
+        model = User    
+        fields = ['full_name', 'email', 'phone_number', 'date_of_birth', 'grade_level', 'password', 'confirm_password']
+
+    def validate(self, attrs):
+        if attrs['password'] != attrs['confirm_password']:
+            raise serializers.ValidationError({"confirm_password": "Passwords do not match."})
+        
+        # Check if email already exists
+        if User.objects.filter(email=attrs['email']).exists():
+            raise serializers.ValidationError({"email": "A user with this email already exists."})
+        
+        return attrs
+
+    def create(self, validated_data):
+        full_name = validated_data.pop('full_name')
+        validated_data.pop('confirm_password')
+        password = validated_data.pop('password')
+        
+        # Split full name into first and last name
+        name_parts = full_name.split(' ', 1)
+        first_name = name_parts[0]
+        last_name = name_parts[1] if len(name_parts) > 1 else ''
+        
+        user = User.objects.create_user(
+            username=validated_data['email'],  # Use email as username
+            email=validated_data['email'],
+            first_name=first_name,
+            last_name=last_name,
+            phone=validated_data['phone_number'],
+            dob=validated_data['date_of_birth'],
+            grade_level=validated_data['grade_level'],
+            is_student=True,
+            password=password
+        )
+            
+        return user
+
+class StudentImportRowSerializer(StudentSignupSerializer):
+    """
+    One roster row for the bulk import (see roster.py)
+    Same fields as student signup without confirm_password; the email
+    uniqueness check is done for the whole roster at once
+    """
+    confirm_password = None
+
+    class Meta:
+        model = User
+        fields = ['full_name', 'email', 'phone_number', 'date_of_birth', 'grade_level', 'password']
+
+    def validate(self, attrs):
+        return attrs
+
+class AdminSignupSerializer(serializers.ModelSerializer):
+    full_name = serializers.CharField(max_length=255, write_only=True)
+    email = serializers.EmailField()
+    phone_number = serializers.CharField(max_length=15)
+    admin_code = serializers.CharField(write_only=True)
+    password = serializers.CharField(write_only=True, validators=[validate_password])
+    confirm_password = serializers.CharField(write_only=True)
+
+    class Meta:
+        model = User
+        fields = ['full_name', 'email', 'phone_number', 'admin_code', 'password', 'confirm_password']
+
+    def validate(self, attrs):
+        if attrs['password'] != attrs['confirm_password']:
+            raise serializers.ValidationError({"confirm_password": "Passwords do not match."})
+        
+        # Check admin code
+        if attrs['admin_code'] != settings.ADMIN_CODE:
+            raise serializers.ValidationError({"admin_code": "Invalid admin code."})
+        
+        # Check if email already exists
+        if User.objects.filter(email=attrs['email']).exists():
+            raise serializers.ValidationError({"email": "A user with this email already exists."})
+        
+        return attrs
+
+    def create(self, validated_data):
+        full_name = validated_data.pop('full_name')
+        validated_data.pop('confirm_password')
+        validated_data.pop('admin_code')
+        password = validated_data.pop('password')
+        
+        # Split full name into first and last name
+        name_parts = full_name.split(' ', 1)
+        first_name = name_parts[0]
+        last_name = name_parts[1] if len(name_parts) > 1 else ''
+        
+        user = User.objects.create_user(
+            username=validated_data['email'],  # Use email as username
+            email=validated_data['email'],
+            first_name=first_name,
+            last_name=last_name,
+            phone=validated_data['phone_number'],
+            is_admin_user=True,
+            is_staff=True,  # Allow admin panel access
+            password=password
+        )
+        
+        return user
+
+class LoginSerializer(serializers.Serializer):
+    email = serializers.EmailField()
+    password = serializers.CharField()
+
+    def validate(self, attrs):
+        email = attrs.get('email')
+        password = attrs.get('password')
+
+        if email and password:
+            user = authenticate(username=email, password=password)
+            if not user:
+                raise serializers.ValidationError('Invalid email or password.')
+            if not user.is_active:
+                raise serializers.ValidationError('User account is disabled.')
+            attrs['user'] = user
+            return attrs
+        else:
+            raise serializers.ValidationError('Must include email and password.')
+
+class UserSerializer(serializers.ModelSerializer):
+    full_name = serializers.SerializerMethodField()
+    user_type = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = User
+        fields = ['id', 'email', 'full_name', 'phone', 'dob', 'grade_level', 'user_type', 'is_student', 'is_admin_user']
+    
+    def get_full_name(self, obj):
+        return full_name(obj.first_name, obj.last_name)
+    
+    def get_user_type(self, obj):
+        return user_type(obj.is_student, obj.is_admin_user)
+
+def full_name(first_name, last_name):
+    return f"{first_name} {last_name}".strip()
+
+def user_type(is_student, is_admin_user):
+    if is_student:
+        return 'student'
+    elif is_admin_user:
+        return 'admin'
+    return 'user'
+
+# Columns read by user_rows()
+USER_VALUE_FIELDS = ['id', 'email', 'first_name', 'last_name', 'phone', 'dob', 'grade_level', 'is_student', 'is_admin_user']
+
+def user_rows(rows):
+    """
+    UserSerializer output for ``.values(*USER_VALUE_FIELDS)`` rows, without
+    model instances or per-field serializer calls (list endpoints)
+    Must stay in step with UserSerializer: the output renders to the same bytes
+    """
+    date = serializers.DateField().to_representation
+    for row in rows:
+        yield {
+            'id': row['id'],
+            'email': row['email'],
+            'full_name': full_name(row['first_name'], row['last_name']),
+            'phone': row['phone'],
+            'dob': date(row['dob']) if row['dob'] is not None else None,
+            'grade_level': row['grade_level'],
+            'user_type': user_type(row['is_student'], row['is_admin_user']),
+            'is_student': row['is_student'],
+            'is_admin_user': row['is_admin_user'],
+        }
+
+class StudentUpdateSerializer(serializers.ModelSerializer):
+    full_name = serializers.CharField(max_length=255, required=False)
+    
+    class Meta:
+        model = User
+        fields = ['full_name', 'email', 'phone', 'dob', 'grade_level']
+    
+    def validate_email(self, value):
+        if self.instance and self.instance.email != value:
+            if User.objects.filter(email=value).exists():
+                raise serializers.ValidationError("A user with this email already exists.")
+        return value
+    
+    def update(self, instance, validated_data):
+        if 'full_name' in validated_data:
+            full_name = validated_data.pop('full_name')
+            name_parts = full_name.split(' ', 1)
+            instance.first_name = name_parts[0]
+            instance.last_name = name_parts[1] if len(name_parts) > 1 else ''
+        
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        
+        instance.save()
+        return instance
+
+class AdminUpdateSerializer(serializers.ModelSerializer):
+    full_name = serializers.CharField(max_length=255, required=False)
+    
+    class Meta:
+        model = User
+        fields = ['full_name', 'email', 'phone']
+    
+    def validate_email(self, value):
+        if self.instance and self.instance.email != value:
+            if User.objects.filter(email=value).exists():
+                raise serializers.ValidationError("A user with this email already exists.")
+        return value
+    
+    def update(self, instance, validated_data):
+        if 'full_name' in validated_data:
+            full_name = validated_data.pop('full_name')
+            name_parts = full_name.split(' ', 1)
+            instance.first_name = name_parts[0]
+            instance.last_name = name_parts[1] if len(name_parts) > 1 else ''
+        
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        
+        instance.save()
+        return instance
+
+class PasswordChangeSerializer(serializers.Serializer):
+    current_password = serializers.CharField(write_only=True)
+    new_password = serializers.CharField(write_only=True, validators=[validate_password])
+    confirm_new_password = serializers.CharField(write_only=True)
+    
+    def validate(self, attrs):
+        if attrs['new_password'] != attrs['confirm_new_password']:
+            raise serializers.ValidationError({"confirm_new_password": "New passwords do not match."})
+        return attrs
+    
+    def validate_current_password(self, value):
+        user = self.context['request'].user
+        if not user.check_password(value):
+            raise serializers.ValidationError("Current password is incorrect.")
         return value
\ No newline at end of file
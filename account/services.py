@@ -0,0 +1,39 @@
+"""
+Account deletion.
+
+request_user_deletion deactivates the user, drops their token and stamps
+deletion_requested_at in one short update, then hands the actual removal
+to the background deleter (virtual_tutor.deletion). purge_user deletes
+every row that cascades from the user in chunks (see delete_in_batches),
+and finally the user row itself. Users whose purge was interrupted
+keep deletion_requested_at set; python manage.py purge_deleted_users
+finishes them.
+"""
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from virtual_tutor.deletion import delete_in_batches, run_deletion
+
+from .models import User
+
+
+def purge_user(user_id, batch_size=None):
+    """Delete ``user_id`` and everything cascading from it in chunks; False if there was no such user"""
+    return bool(delete_in_batches(User.objects.filter(pk=user_id), batch_size=batch_size))
+
+
+def request_user_deletion(user):
+    """Deactivate ``user`` now and delete their data in the background"""
+    user.is_active = False
+    user.deletion_requested_at = timezone.now()
+    with transaction.atomic():
+        # save() rather than update(): the post_save receiver drops the cached
+        # token (in every worker with a shared cache; see ACCOUNT_TOKEN_CACHE)
+        user.save(update_fields=['is_active', 'deletion_requested_at'])
+        Token.objects.filter(user_id=user.pk).delete()
+    transaction.on_commit(lambda: run_deletion(f'user {user.pk}', purge_user, user.pk))
+
+
+def pending_deletions():
+    return User.objects.filter(deletion_requested_at__isnull=False)
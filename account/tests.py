@@ -1,3 +1,110 @@
-from django.test import TestCase
-
-# Create your tests here.
+import json
+from unittest import mock
+
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+
+from ai_generator.models import AIChat, ChatSearchTerm, ChatSession
+
+from .authentication import CachedTokenAuthentication, _timeout, token_cache_key
+from .models import User
+from .services import purge_user, request_user_deletion
+
+
+@override_settings(
+    BACKGROUND_DELETION={'BACKGROUND': False, 'BATCH_SIZE': 2, 'BATCH_PAUSE': 0},
+    AI_CHAT_SEARCH={'BACKGROUND': False},
+)
+class PurgeUserTests(TestCase):
+    def test_purge_removes_cascading_rows_including_search_terms(self):
+        user = User.objects.create_user(username='s@x.com', email='s@x.com', password='x', is_student=True)
+        session = ChatSession.objects.create(user=user)
+        with self.captureOnCommitCallbacks(execute=True):
+            for i in range(5):
+                AIChat.objects.create(user=user, session=session, message=f'gravity orbit {i}', ai_response='planets')
+        self.assertTrue(ChatSearchTerm.objects.filter(user=user).exists())
+
+        self.assertTrue(purge_user(user.pk))
+
+        self.assertFalse(User.objects.filter(pk=user.pk).exists())
+        self.assertFalse(AIChat.objects.filter(user_id=user.pk).exists())
+        self.assertFalse(ChatSearchTerm.objects.filter(user_id=user.pk).exists())
+        self.assertFalse(ChatSession.objects.filter(user_id=user.pk).exists())
+
+    def test_deletion_request_revokes_cached_token(self):
+        user = User.objects.create_user(username='t@x.com', email='t@x.com', password='x', is_student=True)
+        key = Token.objects.create(user=user).key
+        auth = CachedTokenAuthentication()
+        auth.authenticate_credentials(key)
+
+        with self.captureOnCommitCallbacks():
+            request_user_deletion(user)
+
+        with self.assertRaises(AuthenticationFailed):
+            auth.authenticate_credentials(key)
+
+
+class TokenCacheTests(TestCase):
+    def setUp(self):
+        caches['auth_tokens'].clear()
+        self.user = User.objects.create_user(username='c@x.com', email='c@x.com', password='x', is_admin_user=True)
+        self.key = Token.objects.create(user=self.user).key
+        self.auth = CachedTokenAuthentication()
+
+    def test_entry_holds_no_password_and_hits_run_no_queries(self):
+        self.auth.authenticate_credentials(self.key)
+        self.assertNotIn(self.user.password, repr(caches['auth_tokens'].get(token_cache_key(self.key))))
+
+        with self.assertNumQueries(0):
+            user, token = self.auth.authenticate_credentials(self.key)
+            self.assertEqual((user.pk, token.key, user.is_admin_user), (self.user.pk, self.key, True))
+        with self.assertNumQueries(1):
+            self.assertEqual(user.email, 'c@x.com')
+
+    def test_invalidation_during_read_is_not_served(self):
+        real_read = TokenAuthentication.authenticate_credentials
+
+        def racing_read(auth, key):
+            result = real_read(auth, key)
+            self.user.save()
+            return result
+
+        with mock.patch.object(TokenAuthentication, 'authenticate_credentials', racing_read):
+            self.auth.authenticate_credentials(self.key)
+
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        with self.assertRaises(AuthenticationFailed):
+            self.auth.authenticate_credentials(self.key)
+
+
+class TokenCacheTimeoutTests(TestCase):
+    def test_process_local_cache_caps_timeout(self):
+        config = {'ALIAS': 'auth_tokens', 'TIMEOUT': 300, 'LOCAL_TIMEOUT': 5}
+        self.assertEqual(_timeout(config), 5)
+
+    def test_shared_cache_keeps_timeout(self):
+        shared = {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': '/tmp/auth-tokens-test'}
+        with override_settings(CACHES={'default': shared, 'auth_tokens': shared}):
+            self.assertEqual(_timeout({'ALIAS': 'auth_tokens', 'TIMEOUT': 300, 'LOCAL_TIMEOUT': 5}), 300)
+
+
+@override_settings(ACCOUNT_LIST_PAGE_SIZE=2)
+class StudentListTests(TestCase):
+    def setUp(self):
+        for i in range(3):
+            User.objects.create_user(username=f's{i}@x.com', email=f's{i}@x.com', password='x', is_student=True)
+
+    def test_full_list_without_limit_or_cursor(self):
+        response = self.client.get('/api/accounts/students/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(json.loads(b''.join(response.streaming_content))), 3)
+        self.assertNotIn('X-Next-Cursor', response)
+
+    def test_pages_with_limit(self):
+        response = self.client.get('/api/accounts/students/', {'limit': 2})
+        self.assertEqual(len(response.json()), 2)
+        response = self.client.get('/api/accounts/students/', {'cursor': response['X-Next-Cursor']})
+        self.assertEqual([row['email'] for row in response.json()], ['s2@x.com'])
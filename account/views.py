@@ -1,315 +1,399 @@
-from rest_framework.views import APIView
-from rest_framework.response import Response
-from rest_framework import status
-from rest_framework.authtoken.models import Token
-from rest_framework.permissions import IsAuthenticated, AllowAny
-from django.contrib.auth import authenticate
-from django.shortcuts import get_object_or_404
-
-from .serializers import (
-    StudentSignupSerializer, 
-    AdminSignupSerializer, 
-    LoginSerializer, 
-    UserSerializer,
-    StudentUpdateSerializer,
-    AdminUpdateSerializer,
-    PasswordChangeSerializer
-)
-from .models import User    
-
-class StudentSignupView(APIView):
-    """
-    API endpoint for student registration
-    Required fields: full_name, email, phone_number, date_of_birth, grade_level, password, confirm_password
-    """
-    permission_classes = [AllowAny]  # Allow unauthenticated access
-    
-    def post(self, request):
-        serializer = StudentSignupSerializer(data=request.data)
-        if serializer.is_valid():
-            user = serializer.save()
-            token, created = Token.objects.get_or_create(user=user)
-            
-            return Response({
-                "message": "Student registered successfully.",
-                "user": {
-                    "id": user.id,
-                    "email": user.email,
-                    "full_name": f"{user.first_name} {user.last_name}".strip(),
-                    "user_type": "student"
-                },
-                "token": token.key
-            }, status=status.HTTP_201_CREATED)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-
-class AdminSignupView(APIView):
-    """
-    API endpoint for admin registration
-    Required fields: full_name, email, phone_number, admin_code, password, confirm_password
-    """
-    permission_classes = [AllowAny]  # Allow unauthenticated access
-    
-    def post(self, request):
-        serializer = AdminSignupSerializer(data=request.data)
-        if serializer.is_valid():
-            user = serializer.save()
-            token, created = Token.objects.get_or_create(user=user)
-            
-            return Response({
-                "message": "Admin registered successfully.",
-                "user": {
-                    "id": user.id,
-                    "email": user.email,
-                    "full_name": f"{user.first_name} {user.last_name}".strip(),
-                    "user_type": "admin"
-                },
-                "token": token.key
-            }, status=status.HTTP_201_CREATED)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-
-class LoginView(APIView):
-    """
-    API endpoint for user login (both students and admins)
-    Required fields: email, password
-    """
-    permission_classes = [AllowAny]  # Allow unauthenticated access
-    
-    def post(self, request):
-        serializer = LoginSerializer(data=request.data)
-        if serializer.is_valid():
-            user = serializer.validated_data['user']
-            token, created = Token.objects.get_or_create(user=user)
-            
-            user_type = "student" if user.is_student else "admin" if user.is_admin_user else "user"
-            
-            return Response({
-                "message": "Login successful.",
-                "user": {
-                    "id": user.id,
-                    "email": user.email,
-                    "full_name": f"{user.first_name} {user.last_name}".strip(),
-                    "user_type": user_type,
-                    "phone": user.phone,
-                    "dob": user.dob,
-                    "grade_level": user.grade_level if user.is_student else None
-                },
-                "token": token.key
-            }, status=status.HTTP_200_OK)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-
-class ProfileView(APIView):
-    """
-    API endpoint to get user profile information
-    Requires authentication
-    """
-    permission_classes = [IsAuthenticated]
-    
-    def get(self, request):
-        serializer = UserSerializer(request.user)
-        return Response(serializer.data, status=status.HTTP_200_OK)
-
-class LogoutView(APIView):
-    """
-    API endpoint for user logout
-    Requires authentication
-    """
-    permission_classes = [IsAuthenticated]
-    
-    def post(self, request):
-        try:
-            # Delete the user's token to logout
-            request.user.auth_token.delete()
-            return Response({"message": "Logout successful."}, status=status.HTTP_200_OK)
-        except:
-            return Response({"error": "Something went wrong."}, status=status.HTTP_400_BAD_REQUEST)
-
-class StudentListView(APIView):
-    """
-    API endpoint to view all students
-    Public access allowed
-    """
-    permission_classes = [AllowAny]
-    
-    def get(self, request):
-        students = User.objects.filter(is_student=True)
-        serializer = UserSerializer(students, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
-
-class AdminListView(APIView):
-    """
-    API endpoint to view all admins (only for super admins)
-    Requires admin authentication
-    """
-    permission_classes = [IsAuthenticated]
-    
-    def get(self, request):
-        if not request.user.is_admin_user and not request.user.is_superuser:
-            return Response({"error": "Access denied. Admin privileges required."}, 
-                          status=status.HTTP_403_FORBIDDEN)
-        
-        admins = User.objects.filter(is_admin_user=True)
-        serializer = UserSerializer(admins, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
-
-# CRUD Views for Students
-class StudentDetailView(APIView):
-    """
-    Retrieve, update or delete a student instance.
-    """
-    permission_classes = [IsAuthenticated]
-    
-    def get_object(self, pk):
-        return get_object_or_404(User, pk=pk, is_student=True)
-    
-    def get(self, request, pk):
-        """Get student details"""
-        # Students can view their own profile, admins can view any student
-        if not request.user.is_admin_user and request.user.id != int(pk):
-            return Response({"error": "Access denied."}, status=status.HTTP_403_FORBIDDEN)
-        
-        student = self.get_object(pk)
-        serializer = UserSerializer(student)
-        return Response(serializer.data, status=status.HTTP_200_OK)
-    
-    def put(self, request, pk):
-        """Update student details"""
-        # Students can update their own profile, admins can update any student
-        if not request.user.is_admin_user and request.user.id != int(pk):
-            return Response({"error": "Access denied."}, status=status.HTTP_403_FORBIDDEN)
-        
-        student = self.get_object(pk)
-        serializer = StudentUpdateSerializer(student, data=request.data, partial=True)
-        if serializer.is_valid():
-            serializer.save()
-            return Response({
-                "message": "Student updated successfully.",
-                "student": UserSerializer(student).data
-            }, status=status.HTTP_200_OK)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-    
-    def delete(self, request, pk):
-        """Delete student account"""
-        # Only admins can delete student accounts
-        if not request.user.is_admin_user:
-            return Response({"error": "Access denied. Admin privileges required."}, 
-                          status=status.HTTP_403_FORBIDDEN)
-        
-        student = self.get_object(pk)
-        student_email = student.email
-        student.delete()
-        return Response({
-            "message": f"Student account {student_email} deleted successfully."
-        }, status=status.HTTP_200_OK)
-
-class AdminDetailView(APIView):
-    """
-    Retrieve, update or delete an admin instance.
-    """
-    permission_classes = [IsAuthenticated]
-    
-    def get_object(self, pk):
-        return get_object_or_404(User, pk=pk, is_admin_user=True)
-    
-    def get(self, request, pk):
-        """Get admin details"""
-        # Admins can view their own profile or other admin profiles
-        if not request.user.is_admin_user:
-            return Response({"error": "Access denied. Admin privileges required."}, 
-                          status=status.HTTP_403_FORBIDDEN)
-        
-        admin = self.get_object(pk)
-        serializer = UserSerializer(admin)
-        return Response(serializer.data, status=status.HTTP_200_OK)
-    
-    def put(self, request, pk):
-        """Update admin details"""
-        # Admins can update their own profile
-        if request.user.id != int(pk) and not request.user.is_superuser:
-            return Response({"error": "Access denied."}, status=status.HTTP_403_FORBIDDEN)
-        
-        admin = self.get_object(pk)
-        serializer = AdminUpdateSerializer(admin, data=request.data, partial=True)
-        if serializer.is_valid():
-            serializer.save()
-            return Response({
-                "message": "Admin updated successfully.",
-                "admin": UserSerializer(admin).data
-            }, status=status.HTTP_200_OK)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-    
-    def delete(self, request, pk):
-        """Delete admin account"""
-        # Only superuser can delete admin accounts
-        if not request.user.is_superuser:
-            return Response({"error": "Access denied. Superuser privileges required."}, 
-                          status=status.HTTP_403_FORBIDDEN)
-        
-        admin = self.get_object(pk)
-        admin_email = admin.email
-        admin.delete()
-        return Response({
-            "message": f"Admin account {admin_email} deleted successfully."
-        }, status=status.HTTP_200_OK)
-
-class ChangePasswordView(APIView):
-    """
-    Change user password
-    """
-    permission_classes = [IsAuthenticated]
-    
-    def post(self, request):
-        serializer = PasswordChangeSerializer(data=request.data, context={'request': request})
-        if serializer.is_valid():
-            user = request.user
-            user.set_password(serializer.validated_data['new_password'])
-            user.save()
-            
-            # Delete old token and create new one
-            Token.objects.filter(user=user).delete()
-            token = Token.objects.create(user=user)
-            
-            return Response({
-                "message": "Password changed successfully.",
-                "token": token.key
-            }, status=status.HTTP_200_OK)   
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-
-class StudentCreateView(APIView):
-    """
-    Create a new student (for admins)
-    """
-    permission_classes = [IsAuthenticated]
-    
-    def post(self, request):
-        if not request.user.is_admin_user:
-            return Response({"error": "Access denied. Admin privileges required."}, 
-                          status=status.HTTP_403_FORBIDDEN)
-        
-        serializer = StudentSignupSerializer(data=request.data)
-        if serializer.is_valid():
-            user = serializer.save()
-            return Response({
-                "message": "Student created successfully.",
-                "student": UserSerializer(user).data
-            }, status=status.HTTP_201_CREATED)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-
-class AdminCreateView(APIView):
-    """
-    Create a new admin (for superusers)
-    """
-    permission_classes = [IsAuthenticated]
-    
-    def post(self, request):
-        if not request.user.is_superuser:
-            return Response({"error": "Access denied. Superuser privileges required."}, 
-                          status=status.HTTP_403_FORBIDDEN)
-        
-        serializer = AdminSignupSerializer(data=request.data)
-        if serializer.is_valid():
-            user = serializer.save()
-            return Response({
-                "message": "Admin created successfully.",
-                "admin": UserSerializer(user).data
-            }, status=status.HTTP_201_CREATED)
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.permissions import IsAuthenticated, AllowAny
+from django.contrib.auth import authenticate
+from django.shortcuts import get_object_or_404
+from django.conf import settings
+from ai_generator.utils import is_truthy
+from virtual_tutor.export import iter_queryset_chunks, streaming_json_response
+from virtual_tutor.pagination import decode_cursor, encode_cursor, parse_limit, set_next_cursor
+
+from .serializers import (
+    StudentSignupSerializer, 
+    AdminSignupSerializer, 
+    LoginSerializer, 
+    USER_VALUE_FIELDS,
+    UserSerializer,
+    user_rows,
+    StudentUpdateSerializer,
+    AdminUpdateSerializer,
+    PasswordChangeSerializer
+)
+from .models import User    
+from .roster import RosterError, import_students, parse_roster, request_hash_pool, rows_from_json
+from .services import request_user_deletion
+
+class StudentSignupView(APIView):
+    """
+    API endpoint for student registration
+    Required fields: full_name, email, phone_number, date_of_birth, grade_level, password, confirm_password
+    """
+    permission_classes = [AllowAny]  # Allow unauthenticated access
+    
+    def post(self, request):
+        serializer = StudentSignupSerializer(data=request.data)
+        if serializer.is_valid():
+            user = serializer.save()
+            token, created = Token.objects.get_or_create(user=user)
+            
+            return Response({
+                "message": "Student registered successfully.",
+                "user": {
+                    "id": user.id,
+                    "email": user.email,
+                    "full_name": f"{user.first_name} {user.last_name}".strip(),
+                    "user_type": "student"
+                },
+                "token": token.key
+            }, status=status.HTTP_201_CREATED)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+class AdminSignupView(APIView):
+    """
+    API endpoint for admin registration
+    Required fields: full_name, email, phone_number, admin_code, password, confirm_password
+    """
+    permission_classes = [AllowAny]  # Allow unauthenticated access
+    
+    def post(self, request):
+        serializer = AdminSignupSerializer(data=request.data)
+        if serializer.is_valid():
+            user = serializer.save()
+            token, created = Token.objects.get_or_create(user=user)
+            
+            return Response({
+                "message": "Admin registered successfully.",
+                "user": {
+                    "id": user.id,
+                    "email": user.email,
+                    "full_name": f"{user.first_name} {user.last_name}".strip(),
+                    "user_type": "admin"
+                },
+                "token": token.key
+            }, status=status.HTTP_201_CREATED)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+class LoginView(APIView):
+    """
+    API endpoint for user login (both students and admins)
+    Required fields: email, password
+    """
+    permission_classes = [AllowAny]  # Allow unauthenticated access
+    
+    def post(self, request):
+        serializer = LoginSerializer(data=request.data)
+        if serializer.is_valid():
+            user = serializer.validated_data['user']
+            token, created = Token.objects.get_or_create(user=user)
+            
+            user_type = "student" if user.is_student else "admin" if user.is_admin_user else "user"
+            
+            return Response({
+                "message": "Login successful.",
+                "user": {
+                    "id": user.id,
+                    "email": user.email,
+                    "full_name": f"{user.first_name} {user.last_name}".strip(),
+                    "user_type": user_type,
+                    "phone": user.phone,
+                    "dob": user.dob,
+                    "grade_level": user.grade_level if user.is_student else None
+                },
+                "token": token.key
+            }, status=status.HTTP_200_OK)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+class ProfileView(APIView):
+    """
+    API endpoint to get user profile information
+    Requires authentication
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request):
+        serializer = UserSerializer(request.user)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+class LogoutView(APIView):
+    """
+    API endpoint for user logout
+    Requires authentication
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def post(self, request):
+        try:
+            # Delete the user's token to logout
+            request.user.auth_token.delete()
+            return Response({"message": "Logout successful."}, status=status.HTTP_200_OK)
+        except:
+            return Response({"error": "Something went wrong."}, status=status.HTTP_400_BAD_REQUEST)
+
+class UserListMixin:
+    """
+    User listing shared by the student and admin lists
+    Without limit or cursor every matching user is returned (streamed), as
+    before pagination existed; with either the list is keyset-paginated by id
+    Query params: limit (default ACCOUNT_LIST_PAGE_SIZE), cursor (from X-Next-Cursor),
+    export=true to stream every matching user as a JSON file download
+    """
+    export_filename = 'users.json'
+
+    def list_users(self, request, queryset):
+        # Plain rows rather than model instances: see user_rows
+        queryset = queryset.values(*USER_VALUE_FIELDS).order_by('id')
+
+        if request.query_params.get('export', '').lower() in ('1', 'true', 'yes'):
+            rows = user_rows(iter_queryset_chunks(queryset))
+            return streaming_json_response(rows, filename=self.export_filename)
+        if 'limit' not in request.query_params and 'cursor' not in request.query_params:
+            return streaming_json_response(user_rows(iter_queryset_chunks(queryset)))
+
+        try:
+            limit = parse_limit(
+                request.query_params.get('limit'),
+                default=settings.ACCOUNT_LIST_PAGE_SIZE,
+                maximum=settings.ACCOUNT_LIST_MAX_PAGE_SIZE
+            )
+            cursor = request.query_params.get('cursor')
+            if cursor:
+                last_id, = decode_cursor(cursor, 1)
+                queryset = queryset.filter(id__gt=last_id)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        page = list(queryset[:limit + 1])
+        next_cursor = None
+        if len(page) > limit:
+            page = page[:limit]
+            next_cursor = encode_cursor(page[-1]['id'])
+
+        return set_next_cursor(Response(list(user_rows(page)), status=status.HTTP_200_OK), request, next_cursor)
+
+class StudentListView(UserListMixin, APIView):
+    """
+    API endpoint to view all students (paginated, or streamed with export=true)
+    Public access allowed
+    """
+    permission_classes = [AllowAny]
+    export_filename = 'students.json'
+    
+    def get(self, request):
+        return self.list_users(request, User.objects.filter(is_student=True, deletion_requested_at__isnull=True))
+
+class AdminListView(UserListMixin, APIView):
+    """
+    API endpoint to view all admins (only for super admins)
+    Requires admin authentication
+    """
+    permission_classes = [IsAuthenticated]
+    export_filename = 'admins.json'
+    
+    def get(self, request):
+        if not request.user.is_admin_user and not request.user.is_superuser:
+            return Response({"error": "Access denied. Admin privileges required."}, 
+                          status=status.HTTP_403_FORBIDDEN)
+        
+        return self.list_users(request, User.objects.filter(is_admin_user=True, deletion_requested_at__isnull=True))
+
+# CRUD Views for Students
+class StudentDetailView(APIView):
+    """
+    Retrieve, update or delete a student instance.
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def get_object(self, pk):
+        return get_object_or_404(User, pk=pk, is_student=True, deletion_requested_at__isnull=True)
+    
+    def get(self, request, pk):
+        """Get student details"""
+        # Students can view their own profile, admins can view any student
+        if not request.user.is_admin_user and request.user.id != int(pk):
+            return Response({"error": "Access denied."}, status=status.HTTP_403_FORBIDDEN)
+        
+        student = self.get_object(pk)
+        serializer = UserSerializer(student)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+    
+    def put(self, request, pk):
+        """Update student details"""
+        # Students can update their own profile, admins can update any student
+        if not request.user.is_admin_user and request.user.id != int(pk):
+            return Response({"error": "Access denied."}, status=status.HTTP_403_FORBIDDEN)
+        
+        student = self.get_object(pk)
+        serializer = StudentUpdateSerializer(student, data=request.data, partial=True)
+        if serializer.is_valid():
+            serializer.save()
+            return Response({
+                "message": "Student updated successfully.",
+                "student": UserSerializer(student).data
+            }, status=status.HTTP_200_OK)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    
+    def delete(self, request, pk):
+        """Deactivate a student account now; its data is deleted in the background"""
+        # Only admins can delete student accounts
+        if not request.user.is_admin_user:
+            return Response({"error": "Access denied. Admin privileges required."}, 
+                          status=status.HTTP_403_FORBIDDEN)
+        
+        student = self.get_object(pk)
+        request_user_deletion(student)
+        return Response({
+            "message": f"Student account {student.email} scheduled for deletion."
+        }, status=status.HTTP_202_ACCEPTED)
+
+class AdminDetailView(APIView):
+    """
+    Retrieve, update or delete an admin instance.
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def get_object(self, pk):
+        return get_object_or_404(User, pk=pk, is_admin_user=True, deletion_requested_at__isnull=True)
+    
+    def get(self, request, pk):
+        """Get admin details"""
+        # Admins can view their own profile or other admin profiles
+        if not request.user.is_admin_user:
+            return Response({"error": "Access denied. Admin privileges required."}, 
+                          status=status.HTTP_403_FORBIDDEN)
+        
+        admin = self.get_object(pk)
+        serializer = UserSerializer(admin)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+    
+    def put(self, request, pk):
+        """Update admin details"""
+        # Admins can update their own profile
+        if request.user.id != int(pk) and not request.user.is_superuser:
+            return Response({"error": "Access denied."}, status=status.HTTP_403_FORBIDDEN)
+        
+        admin = self.get_object(pk)
+        serializer = AdminUpdateSerializer(admin, data=request.data, partial=True)
+        if serializer.is_valid():
+            serializer.save()
+            return Response({
+                "message": "Admin updated successfully.",
+                "admin": UserSerializer(admin).data
+            }, status=status.HTTP_200_OK)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    
+    def delete(self, request, pk):
+        """Deactivate an admin account now; its data is deleted in the background"""
+        # Only superuser can delete admin accounts
+        if not request.user.is_superuser:
+            return Response({"error": "Access denied. Superuser privileges required."}, 
+                          status=status.HTTP_403_FORBIDDEN)
+        
+        admin = self.get_object(pk)
+        request_user_deletion(admin)
+        return Response({
+            "message": f"Admin account {admin.email} scheduled for deletion."
+        }, status=status.HTTP_202_ACCEPTED)
+
+class ChangePasswordView(APIView):
+    """
+    Change user password
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def post(self, request):
+        serializer = PasswordChangeSerializer(data=request.data, context={'request': request})
+        if serializer.is_valid():
+            user = request.user
+            user.set_password(serializer.validated_data['new_password'])
+            user.save()
+            
+            # Delete old token and create new one
+            Token.objects.filter(user=user).delete()
+            token = Token.objects.create(user=user)
+            
+            return Response({
+                "message": "Password changed successfully.",
+                "token": token.key
+            }, status=status.HTTP_200_OK)   
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+class StudentCreateView(APIView):
+    """
+    Create a new student (for admins)
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def post(self, request):
+        if not request.user.is_admin_user:
+            return Response({"error": "Access denied. Admin privileges required."}, 
+                          status=status.HTTP_403_FORBIDDEN)
+        
+        serializer = StudentSignupSerializer(data=request.data)
+        if serializer.is_valid():
+            user = serializer.save()
+            return Response({
+                "message": "Student created successfully.",
+                "student": UserSerializer(user).data
+            }, status=status.HTTP_201_CREATED)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+class StudentImportView(APIView):
+    """
+    Bulk-create students from a roster (for admins)
+    Body: a JSON list of student signup objects (or {"students": [...]}), or
+    a multipart "file" upload (.csv with a header row, or .json)
+    Query params: dry_run=true to only validate
+    Returns a per-row report; larger rosters go through manage.py import_students
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        if not request.user.is_admin_user:
+            return Response({"error": "Access denied. Admin privileges required."}, 
+                          status=status.HTTP_403_FORBIDDEN)
+
+        try:
+            upload = request.FILES.get('file')
+            if upload is not None:
+                roster_format = request.data.get('format') or upload.name.rsplit('.', 1)[-1].lower()
+                rows = parse_roster(upload.read(), roster_format)
+            else:
+                rows = rows_from_json(request.data)
+        except RosterError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        max_rows = settings.ACCOUNT_IMPORT['MAX_ROWS']
+        if len(rows) > max_rows:
+            return Response({
+                "error": f"At most {max_rows} students per request; use manage.py import_students for larger rosters."
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        dry_run = is_truthy(request.query_params.get('dry_run', False))
+        # Never start processes per request: hash in the shared pool, or inline
+        report = import_students(rows, dry_run=dry_run, workers=1, pool=request_hash_pool())
+        return Response({
+            "message": f"{report['created']} students created, {report['failed']} rows failed.",
+            **report
+        }, status=status.HTTP_201_CREATED if report['created'] else status.HTTP_200_OK)
+
+class AdminCreateView(APIView):
+    """
+    Create a new admin (for superusers)
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def post(self, request):
+        if not request.user.is_superuser:
+            return Response({"error": "Access denied. Superuser privileges required."}, 
+                          status=status.HTTP_403_FORBIDDEN)
+        
+        serializer = AdminSignupSerializer(data=request.data)
+        if serializer.is_valid():
+            user = serializer.save()
+            return Response({
+                "message": "Admin created successfully.",
+                "admin": UserSerializer(user).data
+            }, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)      
\ No newline at end of file
@@ -1,25 +1,75 @@
-from django.contrib import admin
-from .models import AIChat
-
-@admin.register(AIChat)
-class AIChatAdmin(admin.ModelAdmin):
-    list_display = ['user', 'created_at', 'message_preview']
-    list_filter = ['created_at']
-    search_fields = ['user__email', 'message', 'ai_response']
-    readonly_fields = ['created_at']
-    
-    def message_preview(self, obj):
-        return obj.message[:50] + "..." if len(obj.message) > 50 else obj.message
-    message_preview.short_description = 'Message Preview'
-    
-    fieldsets = (
-        ('User Information', {
-            'fields': ('user',)
-        }),
-        ('Conversation', {
-            'fields': ('message', 'ai_response')
-        }),
-        ('Timestamp', {
-            'fields': ('created_at',)
-        }),
-    )
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.db.models import Q
+from .models import AIChat, ArchivedAIChat, ChatSession, ContentLibraryEntry
+from .search import matching_chat_ids
+
+# Newest text matches shown by an admin search; refine the terms for older ones
+ADMIN_SEARCH_LIMIT = 1000
+
+@admin.register(AIChat)
+class AIChatAdmin(admin.ModelAdmin):
+    list_display = ['user', 'created_at', 'message_preview']
+    list_filter = ['created_at']
+    # Searched by get_search_results: message / ai_response through the inverted index (see search.py)
+    search_fields = ['user__email', 'message', 'ai_response']
+    search_help_text = 'Search by user email, or by words that all appear in the message or response.'
+    readonly_fields = ['created_at']
+    
+    def get_queryset(self, request):
+        # The list only previews the message; the change form loads the response on demand
+        return super().get_queryset(request).defer('ai_response')
+
+    def message_preview(self, obj):
+        return obj.message[:50] + "..." if len(obj.message) > 50 else obj.message
+    message_preview.short_description = 'Message Preview'
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        # Two indexed lookups resolved to ids first: OR-ing the subqueries
+        # makes MySQL scan the whole chat table instead
+        user_ids = list(get_user_model().objects.filter(email__icontains=search_term).values_list('id', flat=True))
+        chat_ids = list(
+            matching_chat_ids(search_term).order_by('-chat_id').values_list('chat_id', flat=True)[:ADMIN_SEARCH_LIMIT]
+        )
+        return queryset.filter(Q(user_id__in=user_ids) | Q(id__in=chat_ids)), False
+    
+    fieldsets = (
+        ('User Information', {
+            'fields': ('user', 'session')
+        }),
+        ('Conversation', {
+            'fields': ('message', 'ai_response')
+        }),
+        ('Timestamp', {
+            'fields': ('created_at',)
+        }),
+    )
+
+
+@admin.register(ArchivedAIChat)
+class ArchivedAIChatAdmin(admin.ModelAdmin):
+    list_display = ['id', 'user', 'created_at', 'archived_at']
+    # Archived text is compressed and not in the search index
+    search_fields = ['user__email']
+    readonly_fields = ['id', 'user', 'session_id', 'message', 'ai_response', 'created_at', 'archived_at']
+
+    def get_queryset(self, request):
+        # Not decompressed for the list, which shows no text
+        return super().get_queryset(request).defer('message', 'ai_response')
+
+
+@admin.register(ChatSession)
+class ChatSessionAdmin(admin.ModelAdmin):
+    list_display = ['user', 'title', 'updated_at']
+    search_fields = ['user__email', 'title', 'summary']
+    readonly_fields = ['summarized_through', 'created_at', 'updated_at']
+
+
+@admin.register(ContentLibraryEntry)
+class ContentLibraryEntryAdmin(admin.ModelAdmin):
+    list_display = ['task', 'subject', 'level', 'model_name', 'prompt_version', 'updated_at']
+    list_filter = ['task', 'model_name', 'prompt_version']
+    search_fields = ['subject', 'level', 'content']
+    readonly_fields = ['key', 'created_at', 'updated_at']
@@ -0,0 +1,269 @@
+"""
+Admission control for the AI endpoints.
+
+Two layers keep a burst of requests from exhausting the Gemini quota or
+tying up every worker:
+
+* Token-bucket throttles (per user, per IP and per anonymous IP). Each
+  bucket holds up to ``burst`` tokens and refills at ``rate`` tokens per
+  second; a request costs one token, a batch request one per item. Denied
+  requests get DRF's 429 with ``Retry-After``; a batch with more items than
+  ``burst`` can never fit and gets a 429 saying so. Buckets live in a Django
+  cache, so a shared cache enforces the limits across worker processes.
+  Addresses come from DRF's get_ident, so REST_FRAMEWORK['NUM_PROXIES'] must
+  match the deployment or clients could pick their own X-Forwarded-For.
+* A per-process limit on in-flight upstream calls with a bounded wait
+  queue. When every slot is taken and the queue is full, or a slot does not
+  free up within UPSTREAM_QUEUE_TIMEOUT, the call fails fast with
+  UpstreamBusy, which the views turn into a 503 with ``Retry-After``.
+"""
+import asyncio
+import math
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager, nullcontext
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from rest_framework.exceptions import Throttled
+from rest_framework.throttling import BaseThrottle
+
+from virtual_tutor.metrics import Gauge
+
+
+def _config():
+    return getattr(settings, 'AI_ADMISSION', {})
+
+
+def request_cost(request):
+    """Tokens a request takes from its buckets: one, or one per batch item"""
+    data = request.data if request.method == 'POST' else None
+    items = data.get('items') if hasattr(data, 'get') else None
+    return len(items) if isinstance(items, list) and items else 1
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """DRF throttle backed by a token bucket in AI_ADMISSION['CACHE_ALIAS']"""
+
+    scope = None
+    # Read-modify-write of a bucket is serialized within the process; across
+    # processes sharing a cache it is approximate, like DRF's own throttles
+    _lock = threading.Lock()
+
+    def __init__(self):
+        self.limits = _config().get('RATE_LIMITS', {}).get(self.scope)
+        self._wait = None
+
+    def get_cache_key(self, request):
+        """Bucket key for ``request``, or None if this throttle does not apply"""
+        raise NotImplementedError
+
+    def allow_request(self, request, view):
+        if not self.limits:
+            return True
+        key = self.get_cache_key(request)
+        if key is None:
+            return True
+
+        burst = self.limits['burst']
+        rate = self.limits['rate']
+        cost = request_cost(request)
+        if cost > burst:
+            # Could never be admitted; capping the cost instead would let a batch skip the limit
+            raise Throttled(detail=f'At most {burst} items per batch are allowed; split the batch.')
+        cache = caches[_config().get('CACHE_ALIAS', 'default')]
+        now = time.time()
+
+        with self._lock:
+            tokens, updated_at = cache.get(key) or (burst, now)
+            tokens = min(burst, tokens + max(0.0, now - updated_at) * rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+                self._wait = None
+            else:
+                self._wait = (cost - tokens) / rate
+            cache.set(key, (tokens, now), math.ceil(burst / rate) + 1)
+        return allowed
+
+    def wait(self):
+        return self._wait
+
+
+class UserTokenBucketThrottle(TokenBucketThrottle):
+    scope = 'user'
+
+    def get_cache_key(self, request):
+        if not request.user.is_authenticated:
+            return None
+        return f"throttle:{self.scope}:{request.user.pk}"
+
+
+class AnonTokenBucketThrottle(TokenBucketThrottle):
+    """Tighter per-IP limit for callers without an account"""
+    scope = 'anon'
+
+    def get_cache_key(self, request):
+        if request.user.is_authenticated:
+            return None
+        return f"throttle:{self.scope}:{self.get_ident(request)}"
+
+
+class IPTokenBucketThrottle(TokenBucketThrottle):
+    """Per-IP ceiling for everyone, so one address cannot spread a burst over many accounts"""
+    scope = 'ip'
+
+    def get_cache_key(self, request):
+        return f"throttle:{self.scope}:{self.get_ident(request)}"
+
+
+AI_THROTTLE_CLASSES = [UserTokenBucketThrottle, AnonTokenBucketThrottle, IPTokenBucketThrottle]
+
+
+class UpstreamBusy(Exception):
+    def __init__(self, retry_after):
+        super().__init__('Too many AI requests in progress. Please retry shortly.')
+        self.retry_after = retry_after
+
+
+class UpstreamLimiter:
+    """Caps concurrent upstream calls in this process, with a bounded wait queue"""
+
+    def __init__(self, max_concurrency=16, max_queue=32, queue_timeout=5.0, retry_after=5,
+                 poll_interval=0.01):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self.poll_interval = poll_interval
+        self._condition = threading.Condition()
+        self.active = 0
+        self.waiting = 0
+        self.rejected = 0
+
+    def _try_acquire(self):
+        # Caller holds self._condition
+        if self.active < self.max_concurrency:
+            self.active += 1
+            return True
+        return False
+
+    def _reject(self):
+        self.rejected += 1
+        raise UpstreamBusy(self.retry_after)
+
+    def acquire(self):
+        with self._condition:
+            if self._try_acquire():
+                return
+            if self.waiting >= self.max_queue:
+                self._reject()
+            self.waiting += 1
+            try:
+                admitted = self._condition.wait_for(
+                    lambda: self.active < self.max_concurrency, self.queue_timeout
+                )
+            finally:
+                self.waiting -= 1
+            if not admitted:
+                self._reject()
+            self.active += 1
+
+    async def aacquire(self):
+        # Polls instead of blocking so it works on any event loop without tying up a thread
+        with self._condition:
+            if self._try_acquire():
+                return
+            if self.waiting >= self.max_queue:
+                self._reject()
+            self.waiting += 1
+        deadline = time.monotonic() + self.queue_timeout
+        try:
+            while True:
+                await asyncio.sleep(self.poll_interval)
+                with self._condition:
+                    if self._try_acquire():
+                        return
+                    if time.monotonic() >= deadline:
+                        self._reject()
+        finally:
+            with self._condition:
+                self.waiting -= 1
+
+    def release(self):
+        with self._condition:
+            self.active -= 1
+            self._condition.notify()
+
+    @contextmanager
+    def slot(self):
+        self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    @asynccontextmanager
+    async def aslot(self):
+        await self.aacquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self):
+        return {
+            'enabled': True,
+            'max_concurrency': self.max_concurrency,
+            'active': self.active,
+            'waiting': self.waiting,
+            'rejected': self.rejected,
+        }
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_upstream_limiter():
+    """Return the process-wide limiter, or None when MAX_UPSTREAM_CONCURRENCY is unset"""
+    global _limiter
+    config = _config()
+    if not config.get('MAX_UPSTREAM_CONCURRENCY'):
+        return None
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                _limiter = UpstreamLimiter(
+                    max_concurrency=config['MAX_UPSTREAM_CONCURRENCY'],
+                    max_queue=config.get('MAX_UPSTREAM_QUEUE', 32),
+                    queue_timeout=config.get('UPSTREAM_QUEUE_TIMEOUT', 5.0),
+                    retry_after=config.get('RETRY_AFTER', 5),
+                )
+    return _limiter
+
+
+WAITING = Gauge(
+    'ai_upstream_queue_waiting', 'Calls queued for an upstream slot.',
+    function=lambda: _limiter.waiting if _limiter is not None else 0,
+)
+
+
+def upstream_slot():
+    limiter = get_upstream_limiter()
+    return limiter.slot() if limiter else nullcontext()
+
+
+def aupstream_slot():
+    limiter = get_upstream_limiter()
+    return limiter.aslot() if limiter else nullcontext()
+
+
+def _reset_limiter(*, setting, **kwargs):
+    global _limiter
+    if setting == 'AI_ADMISSION':
+        _limiter = None
+
+
+setting_changed.connect(_reset_limiter)
@@ -1,6 +1,10 @@
-from django.apps import AppConfig
-
-
-class AiGeneratorConfig(AppConfig):
-    default_auto_field = "django.db.models.BigAutoField"
-    name = "ai_generator"
+from django.apps import AppConfig
+
+
+class AiGeneratorConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "ai_generator"
+
+    def ready(self):
+        # Registers the post_save receiver that keeps the chat search index current
+        from . import search  # noqa: F401
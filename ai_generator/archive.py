@@ -0,0 +1,73 @@
+"""
+Cold-tier archiving of old chats.
+
+archive_chats moves AIChat rows created before a cutoff into ArchivedAIChat
+in chunks of BATCH_SIZE. Each chunk is copied and deleted in one
+transaction, so an interrupted run loses nothing and can simply be run
+again; a chat whose id is already archived makes the chunk fail with
+IntegrityError rather than be dropped. Archived rows keep their id, user, session id and timestamps, are
+compressed in full and carry a single index, so the hot AIChat table (and
+the buffer pool) only holds recent history. list_user_chats and the chat
+exports read the archive when asked with include_archived.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import AIChat, ArchivedAIChat, ChatSearchTerm
+
+
+def _config():
+    return getattr(settings, 'AI_CHAT_ARCHIVE', {})
+
+
+def default_cutoff():
+    return timezone.now() - timedelta(days=_config().get('AFTER_DAYS', 180))
+
+
+def archive_batch(cutoff, batch_size):
+    """Move up to ``batch_size`` of the oldest chats created before ``cutoff``; returns how many"""
+    with transaction.atomic():
+        chats = list(
+            AIChat.objects.select_for_update()
+            .filter(created_at__lt=cutoff)
+            .order_by('id')[:batch_size]
+        )
+        if not chats:
+            return 0
+        ids = [chat.pk for chat in chats]
+        # No ignore_conflicts: an id already in the archive (e.g. after a
+        # sequence reset) must abort the chunk, not delete the unarchived chat
+        ArchivedAIChat.objects.bulk_create([
+            ArchivedAIChat(
+                id=chat.pk,
+                user_id=chat.user_id,
+                session_id=chat.session_id,
+                message=chat.message,
+                ai_response=chat.ai_response,
+                created_at=chat.created_at,
+            )
+            for chat in chats
+        ])
+        ChatSearchTerm.objects.filter(chat_id__in=ids).delete()
+        AIChat.objects.filter(id__in=ids).delete()
+    return len(chats)
+
+
+def archive_chats(cutoff=None, batch_size=None, max_batches=None, progress=None):
+    """Archive every chat created before ``cutoff`` (default: AFTER_DAYS ago); returns how many"""
+    cutoff = cutoff or default_cutoff()
+    batch_size = batch_size or _config().get('BATCH_SIZE', 1000)
+    total = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        moved = archive_batch(cutoff, batch_size)
+        total += moved
+        batches += 1
+        if progress and moved:
+            progress(total)
+        if moved < batch_size:
+            break
+    return total
@@ -0,0 +1,351 @@
+"""
+Async versions of the AI endpoints for ASGI deployments.
+
+Enabled with AI_ASYNC_VIEWS=True. The upstream Gemini call and the AIChat
+insert are awaited, so a worker is not tied up for the duration of the
+call and one process can serve many in-flight tutor requests. The
+request/response contract is identical to the sync DRF views in views.py,
+which remain the default under WSGI.
+"""
+import functools
+import logging
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from rest_framework import exceptions, status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from virtual_tutor.profiling import span
+
+from .admission import AI_THROTTLE_CLASSES
+from .batch import (
+    BatchValidationError,
+    parse_batch_items,
+    build_batch_results,
+    batch_response_data
+)
+from .models import AIChat
+from .serializers import AIChatSerializer, AIChatCreateSerializer
+from .services import DEFAULT_CONTEXT, get_gemini_service
+from .conversation import abuild_context, aget_session, arecord_turn
+from .streaming import event_stream_response
+from .persistence import apersist_chat
+from .search import schedule_indexing
+from .utils import service_error, stream_requested, sync_save_requested, use_response_cache
+
+logger = logging.getLogger(__name__)
+
+
+def _json_response(data, status_code=status.HTTP_200_OK, headers=None):
+    # Rendered exactly like DRF's Response so both paths emit the same bytes
+    with span('serialize'):
+        content = JSONRenderer().render(data)
+    return HttpResponse(
+        content,
+        status=status_code,
+        content_type='application/json',
+        headers=headers
+    )
+
+
+async def _prepare_request(request):
+    """Wrap the request like DRF does and resolve auth and body off the event loop"""
+    drf_request = Request(
+        request,
+        parsers=[parser() for parser in api_settings.DEFAULT_PARSER_CLASSES],
+        authenticators=[auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES],
+    )
+
+    def resolve():
+        # Token/session lookups hit the database, so they run in a worker thread
+        drf_request.user
+        drf_request.data
+        # Same rate limits as the sync views, checked like APIView.check_throttles
+        waits = []
+        for throttle_class in AI_THROTTLE_CLASSES:
+            throttle = throttle_class()
+            if not throttle.allow_request(drf_request, None):
+                waits.append(throttle.wait())
+        if waits:
+            raise exceptions.Throttled(max((wait for wait in waits if wait is not None), default=None))
+        return drf_request
+
+    return await sync_to_async(resolve)()
+
+
+def async_api_view(view):
+    """Async counterpart of ``@api_view(['POST'])`` with AllowAny permissions"""
+    @csrf_exempt
+    @require_POST
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        try:
+            drf_request = await _prepare_request(request)
+        except exceptions.APIException as exc:
+            headers = {'Retry-After': '%d' % exc.wait} if getattr(exc, 'wait', None) else None
+            return _json_response({'detail': exc.detail}, exc.status_code, headers)
+        return await view(drf_request, *args, **kwargs)
+    return wrapper
+
+
+@async_api_view
+async def chat_with_ai(request):
+    """Chat with Gemini AI"""
+    serializer = AIChatCreateSerializer(data=request.data)
+    with span('serialize'):
+        is_valid = serializer.is_valid()
+
+    if is_valid:
+        try:
+            gemini_service = get_gemini_service()
+            sync_save = sync_save_requested(request)
+
+            if not gemini_service.is_configured():
+                return _json_response(
+                    {'error': 'AI chat service is not configured. Please contact administrator.'},
+                    status.HTTP_503_SERVICE_UNAVAILABLE
+                )
+
+            message = serializer.validated_data['message']
+
+            session = None
+            session_id = request.data.get('session_id')
+            if session_id not in (None, ''):
+                session = await aget_session(request.user, session_id)
+                if session is None:
+                    return _json_response({'error': 'Chat session not found.'}, status.HTTP_404_NOT_FOUND)
+            context = await abuild_context(session) if session else DEFAULT_CONTEXT
+
+            async def store_chat(text):
+                if session:
+                    return await arecord_turn(session, request.user, message, text)
+                return await apersist_chat(request.user, message, text, sync=sync_save)
+
+            if stream_requested(request):
+                async def save_chat(text):
+                    if not request.user.is_authenticated:
+                        return {'message': message, 'chat_id': None, 'created_at': None}
+                    chat = await store_chat(text)
+                    return {
+                        'message': message,
+                        'chat_id': chat.id,
+                        'session_id': chat.session_id,
+                        'created_at': chat.created_at
+                    }
+
+                return event_stream_response(
+                    gemini_service.astream_response(message, context),
+                    save_chat,
+                    error_message='Failed to generate AI response. Please try again.'
+                )
+
+            result = await gemini_service.agenerate_response(message, context)
+
+            if result['success']:
+                if request.user.is_authenticated:
+                    chat = await store_chat(result['response'])
+                    with span('serialize'):
+                        data = AIChatSerializer(chat).data
+                    return _json_response(data, status.HTTP_201_CREATED)
+                else:
+                    return _json_response({
+                        'message': message,
+                        'ai_response': result['response'],
+                        'created_at': None,
+                        'user': None
+                    }, status.HTTP_201_CREATED)
+            else:
+                return _json_response(*service_error(result))
+
+        except Exception as e:
+            logger.error(f"Error in chat_with_ai: {str(e)}")
+            return _json_response(
+                {'error': 'Failed to generate AI response. Please try again.'},
+                status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+    return _json_response(serializer.errors, status.HTTP_400_BAD_REQUEST)
+
+
+@async_api_view
+async def explain_concept(request):
+    """Get AI explanation for a concept"""
+    concept = request.data.get('concept', '').strip()
+    difficulty = request.data.get('difficulty', 'intermediate')
+
+    if not concept:
+        return _json_response(
+            {'error': 'Concept field is required.'},
+            status.HTTP_400_BAD_REQUEST
+        )
+
+    try:
+        gemini_service = get_gemini_service()
+        sync_save = sync_save_requested(request)
+
+        if not gemini_service.is_configured():
+            return _json_response(
+                {'error': 'AI service is not configured.'},
+                status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+
+        if stream_requested(request):
+            async def save_chat(text):
+                chat_id = None
+                if request.user.is_authenticated:
+                    chat = await apersist_chat(
+                        request.user,
+                        f"Explain concept: {concept} (difficulty: {difficulty})",
+                        text,
+                        sync=sync_save
+                    )
+                    chat_id = chat.id
+                return {'concept': concept, 'difficulty': difficulty, 'chat_id': chat_id}
+
+            return event_stream_response(
+                gemini_service.astream_explain_concept(
+                    concept, difficulty, use_cache=use_response_cache(request)
+                ),
+                save_chat,
+                error_message='Failed to generate explanation.'
+            )
+
+        result = await gemini_service.aexplain_concept(
+            concept, difficulty, use_cache=use_response_cache(request)
+        )
+
+        if result['success']:
+            chat_id = None
+            if request.user.is_authenticated:
+                chat = await apersist_chat(
+                    request.user,
+                    f"Explain concept: {concept} (difficulty: {difficulty})",
+                    result['response'],
+                    sync=sync_save
+                )
+                chat_id = chat.id
+
+            return _json_response({
+                'concept': concept,
+                'difficulty': difficulty,
+                'explanation': result['response'],
+                'chat_id': chat_id
+            })
+        else:
+            return _json_response(*service_error(result))
+
+    except Exception as e:
+        logger.error(f"Error in explain_concept: {str(e)}")
+        return _json_response(
+            {'error': 'Failed to generate explanation.'},
+            status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+@async_api_view
+async def generate_educational_content(request):
+    """Generate educational content for a topic"""
+    topic = request.data.get('topic', '').strip()
+    grade_level = request.data.get('grade_level', 'general')
+
+    if not topic:
+        return _json_response(
+            {'error': 'Topic field is required.'},
+            status.HTTP_400_BAD_REQUEST
+        )
+
+    try:
+        gemini_service = get_gemini_service()
+        sync_save = sync_save_requested(request)
+
+        if not gemini_service.is_configured():
+            return _json_response(
+                {'error': 'AI service is not configured.'},
+                status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+
+        result = await gemini_service.agenerate_educational_content(
+            topic, grade_level, use_cache=use_response_cache(request)
+        )
+
+        if result['success']:
+            chat_id = None
+            if request.user.is_authenticated:
+                chat = await apersist_chat(
+                    request.user,
+                    f"Generate educational content for: {topic} (grade: {grade_level})",
+                    result['response'],
+                    sync=sync_save
+                )
+                chat_id = chat.id
+
+            return _json_response({
+                'topic': topic,
+                'grade_level': grade_level,
+                'content': result['response'],
+                'chat_id': chat_id
+            })
+        else:
+            return _json_response(*service_error(result))
+
+    except Exception as e:
+        logger.error(f"Error in generate_educational_content: {str(e)}")
+        return _json_response(
+            {'error': 'Failed to generate educational content.'},
+            status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+async def _generate_batch(request, task):
+    try:
+        items = parse_batch_items(task, request.data)
+    except BatchValidationError as e:
+        return _json_response({'error': str(e)}, status.HTTP_400_BAD_REQUEST)
+
+    try:
+        gemini_service = get_gemini_service()
+
+        if not gemini_service.is_configured():
+            return _json_response(
+                {'error': 'AI service is not configured.'},
+                status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+
+        valid = [item for item in items if 'error' not in item]
+        valid_results = iter(await gemini_service.agenerate_batch(
+            task,
+            [(item['subject'], item['level']) for item in valid],
+            use_cache=use_response_cache(request)
+        ))
+        results = [None if 'error' in item else next(valid_results) for item in items]
+
+        output, chats = build_batch_results(task, items, results, request.user)
+        if chats:
+            await AIChat.objects.abulk_create([chat for _, chat in chats])
+            # Tokenizing and the term inserts happen on the background indexer
+            await sync_to_async(schedule_indexing)()
+
+        return _json_response(batch_response_data(task, output, chats))
+
+    except Exception as e:
+        logger.error(f"Error in batch {task}: {str(e)}")
+        return _json_response(
+            {'error': 'Failed to process batch request.'},
+            status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+@async_api_view
+async def explain_concepts_batch(request):
+    """Explain many concepts in one request"""
+    return await _generate_batch(request, 'explain_concept')
+
+
+@async_api_view
+async def generate_educational_content_batch(request):
+    """Generate content for many topics in one request"""
+    return await _generate_batch(request, 'educational_content')
@@ -0,0 +1,342 @@
+"""
+LLM backends behind GeminiService.
+
+A backend turns a prompt into text (``generate``), a stream of text chunks
+(``stream``) or a token count (``count_tokens``), with async variants for the
+ASGI views. The active backend is selected with the AI_BACKEND setting:
+
+    AI_BACKEND = {
+        'BACKEND': 'ai_generator.backends.SimulatedBackend',
+        'OPTIONS': {'seed': 42, 'latency': {'distribution': 'lognormal', 'median': 0.8}},
+    }
+
+GeminiBackend talks to Google Gemini; SimulatedBackend is a deterministic
+offline stand-in for load tests and CI.
+"""
+import asyncio
+import hashlib
+import logging
+import math
+import random
+import threading
+import time
+
+import google.generativeai as genai
+from google.api_core import exceptions as google_exceptions
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_tokens(text):
+    """Cheap local token estimate (~4 characters per token)"""
+    return max(1, math.ceil(len(text) / 4)) if text else 0
+
+
+class BaseLLMBackend:
+    """Interface implemented by every LLM backend"""
+
+    name = 'base'
+
+    def is_configured(self):
+        return True
+
+    def default_model_name(self):
+        raise NotImplementedError
+
+    def generate(self, model_name, prompt, timeout=None):
+        """Return the full response text for ``prompt``; ``timeout`` is in seconds"""
+        raise NotImplementedError
+
+    def stream(self, model_name, prompt, timeout=None):
+        """Yield response text chunks as they are produced"""
+        raise NotImplementedError
+
+    def count_tokens(self, model_name, text):
+        return estimate_tokens(text)
+
+    async def agenerate(self, model_name, prompt, timeout=None):
+        raise NotImplementedError
+
+    async def astream(self, model_name, prompt, timeout=None):
+        raise NotImplementedError
+        yield
+
+
+class GeminiClientRegistry:
+    """Process-wide registry of configured Gemini models.
+
+    ``genai.configure()`` mutates global SDK state and builds a fresh client,
+    so it is only called when the API key or transport changes. Models are
+    created lazily, once per model name, and shared by every thread and
+    event loop in the process so the underlying connection is reused.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._signature = None
+        self._models = {}
+
+    @staticmethod
+    def _current_signature():
+        return (
+            settings.GEMINI_API_KEY,
+            getattr(settings, 'GEMINI_TRANSPORT', None) or None,
+        )
+
+    def get_model(self, model_name=None):
+        """Return a shared ``GenerativeModel`` or None if no API key is set"""
+        model_name = model_name or settings.GEMINI_MODEL
+        signature = self._current_signature()
+
+        # Fast path: no lock once the model exists for the current settings
+        if signature == self._signature:
+            model = self._models.get(model_name)
+            if model is not None:
+                return model
+
+        with self._lock:
+            if signature != self._signature:
+                self._configure(signature)
+            api_key, _ = signature
+            if not api_key:
+                return None
+
+            model = self._models.get(model_name)
+            if model is None:
+                model = genai.GenerativeModel(model_name)
+                self._models[model_name] = model
+            return model
+
+    def _configure(self, signature):
+        api_key, transport = signature
+        self._models = {}
+        if api_key:
+            genai.configure(api_key=api_key, transport=transport)
+            logger.info("Configured Gemini client (transport=%s)", transport or 'default')
+        self._signature = signature
+
+    def reset(self):
+        """Drop all cached models; the next lookup reconfigures the SDK"""
+        with self._lock:
+            self._signature = None
+            self._models = {}
+
+
+client_registry = GeminiClientRegistry()
+
+
+def _chunk_text(chunk):
+    try:
+        return chunk.text
+    except ValueError:
+        # Chunks without text parts (e.g. safety metadata only)
+        return ''
+
+
+class GeminiBackend(BaseLLMBackend):
+    """Google Gemini through the shared client registry"""
+
+    name = 'gemini'
+
+    def is_configured(self):
+        return bool(settings.GEMINI_API_KEY) and client_registry.get_model() is not None
+
+    def default_model_name(self):
+        return settings.GEMINI_MODEL
+
+    def _model(self, model_name):
+        model = client_registry.get_model(model_name)
+        if model is None:
+            raise RuntimeError('Gemini AI is not properly configured. Please check your API key.')
+        return model
+
+    @staticmethod
+    def _request_options(timeout):
+        # The SDK applies its own defaults when no timeout is given
+        return {'timeout': timeout} if timeout else None
+
+    def generate(self, model_name, prompt, timeout=None):
+        return self._model(model_name).generate_content(
+            prompt, request_options=self._request_options(timeout)
+        ).text
+
+    def stream(self, model_name, prompt, timeout=None):
+        response = self._model(model_name).generate_content(
+            prompt, stream=True, request_options=self._request_options(timeout)
+        )
+        for chunk in response:
+            text = _chunk_text(chunk)
+            if text:
+                yield text
+
+    def count_tokens(self, model_name, text):
+        return self._model(model_name).count_tokens(text).total_tokens
+
+    async def agenerate(self, model_name, prompt, timeout=None):
+        response = await self._model(model_name).generate_content_async(
+            prompt, request_options=self._request_options(timeout)
+        )
+        return response.text
+
+    async def astream(self, model_name, prompt, timeout=None):
+        response = await self._model(model_name).generate_content_async(
+            prompt, stream=True, request_options=self._request_options(timeout)
+        )
+        async for chunk in response:
+            text = _chunk_text(chunk)
+            if text:
+                yield text
+
+
+class SimulatedBackend(BaseLLMBackend):
+    """Deterministic offline backend for load tests and CI.
+
+    Options:
+        seed: seeds latency, error and length sampling; same seed, same sequence
+        latency: {'distribution': 'fixed'|'uniform'|'lognormal', 'median' (s),
+                  'sigma' (lognormal), 'min'/'max' (uniform)} for the full response
+        first_token_latency: seconds before the first streamed chunk
+        token_interval: seconds between streamed chunks
+        response_tokens: {'min': int, 'max': int} words per response
+        error_rate: probability in [0, 1] that a call fails
+        error_kinds: upstream errors raised on failure, e.g. ['unavailable', 'rate_limited']
+        model_name: reported model name
+    """
+
+    name = 'simulated'
+
+    ERRORS = {
+        'unavailable': google_exceptions.ServiceUnavailable,
+        'rate_limited': google_exceptions.ResourceExhausted,
+        'timeout': google_exceptions.DeadlineExceeded,
+        'internal': google_exceptions.InternalServerError,
+        'invalid': google_exceptions.InvalidArgument,
+    }
+
+    WORDS = (
+        'the', 'student', 'learns', 'energy', 'light', 'plants', 'process', 'cells',
+        'example', 'because', 'water', 'simple', 'idea', 'shows', 'how', 'works',
+        'concept', 'step', 'means', 'with', 'sun', 'food', 'makes', 'important',
+    )
+
+    def __init__(self, seed=0, latency=None, first_token_latency=0.2, token_interval=0.02,
+                 response_tokens=None, error_rate=0.0, error_kinds=None, model_name='simulated-tutor'):
+        self.latency = latency or {'distribution': 'fixed', 'median': 0.5}
+        self.first_token_latency = first_token_latency
+        self.token_interval = token_interval
+        self.response_tokens = response_tokens or {'min': 60, 'max': 140}
+        self.error_rate = error_rate
+        self.error_kinds = error_kinds or ['unavailable']
+        self.model_name = model_name
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def default_model_name(self):
+        return self.model_name
+
+    def _sample(self):
+        """Draw (latency, failure, token count) from the shared seeded RNG"""
+        with self._lock:
+            rng = self._random
+            config = self.latency
+            distribution = config.get('distribution', 'fixed')
+            median = config.get('median', 0.5)
+            if distribution == 'lognormal':
+                latency = rng.lognormvariate(math.log(median), config.get('sigma', 0.5))
+            elif distribution == 'uniform':
+                latency = rng.uniform(config.get('min', 0.0), config.get('max', 2 * median))
+            else:
+                latency = median
+            error = None
+            if rng.random() < self.error_rate:
+                error = self.ERRORS[rng.choice(self.error_kinds)]
+            tokens = rng.randint(self.response_tokens['min'], self.response_tokens['max'])
+        return latency, error, tokens
+
+    def _words(self, prompt, count):
+        # Text depends only on the prompt so identical prompts get identical answers
+        digest = hashlib.sha256(prompt.encode('utf-8')).digest()
+        return [self.WORDS[digest[i % len(digest)] % len(self.WORDS)] for i in range(count)]
+
+    @staticmethod
+    def _wait_time(delay, timeout):
+        """Seconds to sleep and whether the call times out first"""
+        if timeout is not None and delay > timeout:
+            return timeout, True
+        return delay, False
+
+    def generate(self, model_name, prompt, timeout=None):
+        latency, error, tokens = self._sample()
+        delay, timed_out = self._wait_time(latency, timeout)
+        time.sleep(delay)
+        if timed_out:
+            raise google_exceptions.DeadlineExceeded('Simulated upstream timeout')
+        if error:
+            raise error('Simulated upstream failure')
+        return ' '.join(self._words(prompt, tokens))
+
+    def stream(self, model_name, prompt, timeout=None):
+        latency, error, tokens = self._sample()
+        delay, timed_out = self._wait_time(self.first_token_latency, timeout)
+        time.sleep(delay)
+        if timed_out:
+            raise google_exceptions.DeadlineExceeded('Simulated upstream timeout')
+        if error:
+            raise error('Simulated upstream failure')
+        for index, word in enumerate(self._words(prompt, tokens)):
+            if index:
+                time.sleep(self.token_interval)
+            yield word + ' '
+
+    async def agenerate(self, model_name, prompt, timeout=None):
+        latency, error, tokens = self._sample()
+        delay, timed_out = self._wait_time(latency, timeout)
+        await asyncio.sleep(delay)
+        if timed_out:
+            raise google_exceptions.DeadlineExceeded('Simulated upstream timeout')
+        if error:
+            raise error('Simulated upstream failure')
+        return ' '.join(self._words(prompt, tokens))
+
+    async def astream(self, model_name, prompt, timeout=None):
+        latency, error, tokens = self._sample()
+        delay, timed_out = self._wait_time(self.first_token_latency, timeout)
+        await asyncio.sleep(delay)
+        if timed_out:
+            raise google_exceptions.DeadlineExceeded('Simulated upstream timeout')
+        if error:
+            raise error('Simulated upstream failure')
+        for index, word in enumerate(self._words(prompt, tokens)):
+            if index:
+                await asyncio.sleep(self.token_interval)
+            yield word + ' '
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    """Return the process-wide backend built from AI_BACKEND"""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                config = getattr(settings, 'AI_BACKEND', {})
+                backend_class = import_string(
+                    config.get('BACKEND', 'ai_generator.backends.GeminiBackend')
+                )
+                _backend = backend_class(**config.get('OPTIONS', {}))
+    return _backend
+
+
+def _reset_backend(*, setting, **kwargs):
+    global _backend
+    if setting == 'AI_BACKEND':
+        _backend = None
+
+
+setting_changed.connect(_reset_backend)
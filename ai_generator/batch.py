@@ -0,0 +1,96 @@
+"""
+Request parsing and response assembly for the batch explain/content
+endpoints, shared by the sync and async views.
+"""
+from collections import namedtuple
+
+from django.conf import settings
+
+from .models import AIChat
+
+BatchTask = namedtuple(
+    'BatchTask',
+    ['subject_field', 'level_field', 'default_level', 'result_field', 'chat_message']
+)
+
+BATCH_TASKS = {
+    'explain_concept': BatchTask(
+        'concept', 'difficulty', 'intermediate', 'explanation',
+        "Explain concept: {subject} (difficulty: {level})"
+    ),
+    'educational_content': BatchTask(
+        'topic', 'grade_level', 'general', 'content',
+        "Generate educational content for: {subject} (grade: {level})"
+    ),
+}
+
+
+class BatchValidationError(Exception):
+    pass
+
+
+def parse_batch_items(task, data):
+    """Validate the ``items`` list; invalid entries are reported per item, not per request"""
+    spec = BATCH_TASKS[task]
+    items = data.get('items')
+    if not isinstance(items, list) or not items:
+        raise BatchValidationError('Items field must be a non-empty list.')
+    max_items = settings.AI_BATCH_MAX_ITEMS
+    if len(items) > max_items:
+        raise BatchValidationError(f'Too many items. Maximum {max_items} allowed per batch.')
+
+    parsed = []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            item = {}
+        subject = str(item.get(spec.subject_field, '')).strip()
+        entry = {
+            'index': index,
+            'subject': subject,
+            'level': item.get(spec.level_field, spec.default_level),
+        }
+        if not subject:
+            entry['error'] = f'{spec.subject_field.capitalize()} field is required.'
+        parsed.append(entry)
+    return parsed
+
+
+def build_batch_results(task, items, results, user):
+    """Pair service results with their items and collect unsaved AIChat rows"""
+    spec = BATCH_TASKS[task]
+    output = []
+    chats = []
+    for item, result in zip(items, results):
+        row = {
+            'index': item['index'],
+            spec.subject_field: item['subject'],
+            spec.level_field: item['level'],
+        }
+        if result is None:
+            row.update(success=False, error=item['error'])
+        elif result['success']:
+            row.update(success=True, chat_id=None)
+            row[spec.result_field] = result['response']
+            if user.is_authenticated:
+                chats.append((row, AIChat(
+                    user=user,
+                    message=spec.chat_message.format(subject=item['subject'], level=item['level']),
+                    ai_response=result['response']
+                )))
+        else:
+            row.update(success=False, error=f'AI service error: {result["error"]}')
+        output.append(row)
+    return output, chats
+
+
+def batch_response_data(task, output, chats):
+    """Fill in chat ids once the rows are saved (only on backends that return them)"""
+    for row, chat in chats:
+        row['chat_id'] = chat.pk
+    succeeded = sum(1 for row in output if row['success'])
+    return {
+        'task': task,
+        'results': output,
+        'succeeded': succeeded,
+        'failed': len(output) - succeeded,
+    }
@@ -0,0 +1,281 @@
+"""
+Response cache for deterministic tutor tasks (concept explanations and
+educational content). Entries are keyed on the normalised task inputs plus
+the model and prompt-template version, so changing either invalidates them.
+"""
+import hashlib
+import logging
+import random
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from virtual_tutor.metrics import record_cache_lookup
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT = 60 * 60 * 24
+
+
+def normalize_text(value):
+    """Case-fold and collapse whitespace so trivially different inputs share an entry"""
+    return ' '.join(str(value).lower().split())
+
+
+def make_cache_key(task, subject, level, model_name, prompt_version):
+    raw = '|'.join([
+        task,
+        normalize_text(subject),
+        normalize_text(level),
+        model_name,
+        str(prompt_version),
+    ])
+    return f"ai:{task}:{hashlib.sha256(raw.encode('utf-8')).hexdigest()}"
+
+
+class BaseCacheBackend:
+    """Storage interface used by ResponseCache"""
+
+    # Backends doing network or DB I/O are moved off the event loop by the async API
+    blocking = True
+
+    def get(self, key):
+        raise NotImplementedError
+
+    def set(self, key, value, timeout):
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+
+class LocalLRUCacheBackend(BaseCacheBackend):
+    """In-process LRU with per-entry expiry; one instance per worker process"""
+
+    blocking = False
+
+    def __init__(self, max_entries=2048):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout):
+        with self._lock:
+            self._data[key] = (time.monotonic() + timeout, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class DjangoCacheBackend(BaseCacheBackend):
+    """Delegates to a configured Django cache alias (e.g. Redis or Memcached)"""
+
+    def __init__(self, alias='default', max_entries=None):
+        # max_entries is accepted so AI_RESPONSE_CACHE['OPTIONS'] fits every
+        # backend; the size limit is the alias's own (its OPTIONS['MAX_ENTRIES'])
+        self.alias = alias
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def get(self, key):
+        return self.cache.get(key)
+
+    def set(self, key, value, timeout):
+        self.cache.set(key, value, timeout)
+
+    def delete(self, key):
+        self.cache.delete(key)
+
+    def clear(self):
+        self.cache.clear()
+
+
+class DatabaseCacheBackend(BaseCacheBackend):
+    """
+    Stores entries in the AIResponseCache table, shared by every worker
+    Expired and excess rows are culled on about one write in
+    ``cull_frequency``: the cull counts the whole table, too costly (and
+    lock-heavy on InnoDB) to run on every set
+    """
+
+    def __init__(self, max_entries=50000, cull_fraction=0.1, cull_frequency=100):
+        self.max_entries = max_entries
+        self.cull_fraction = cull_fraction
+        self.cull_frequency = cull_frequency
+
+    @property
+    def model(self):
+        from .models import AIResponseCache
+        return AIResponseCache
+
+    def get(self, key):
+        entry = (
+            self.model.objects
+            .filter(key=key, expires_at__gt=timezone.now())
+            .values_list('value', flat=True)
+            .first()
+        )
+        return entry
+
+    def set(self, key, value, timeout):
+        expires_at = timezone.now() + timedelta(seconds=timeout)
+        self.model.objects.update_or_create(
+            key=key, defaults={'value': value, 'expires_at': expires_at}
+        )
+        if self.cull_frequency <= 1 or random.random() < 1 / self.cull_frequency:
+            self._cull()
+
+    def _cull(self):
+        with transaction.atomic():
+            self.model.objects.filter(expires_at__lte=timezone.now()).delete()
+            overflow = self.model.objects.count() - self.max_entries
+            if overflow > 0:
+                cull_count = max(overflow, int(self.max_entries * self.cull_fraction))
+                oldest = list(
+                    self.model.objects.order_by('expires_at')
+                    .values_list('pk', flat=True)[:cull_count]
+                )
+                self.model.objects.filter(pk__in=oldest).delete()
+
+    def delete(self, key):
+        self.model.objects.filter(key=key).delete()
+
+    def clear(self):
+        self.model.objects.all().delete()
+
+
+class ResponseCache:
+    """Task-aware cache front end with per-task TTLs and hit/miss counters"""
+
+    def __init__(self, backend, timeouts=None, enabled=True):
+        self.backend = backend
+        self.timeouts = timeouts or {}
+        self.enabled = enabled
+        self._stats_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def get_timeout(self, task):
+        return self.timeouts.get(task, DEFAULT_TIMEOUT)
+
+    def get(self, key):
+        if not self.enabled:
+            return None
+        try:
+            value = self.backend.get(key)
+        except Exception as e:
+            logger.error(f"Response cache read failed: {str(e)}")
+            self._count('errors')
+            return None
+        self._count('hits' if value is not None else 'misses')
+        record_cache_lookup('ai_response', value is not None)
+        return value
+
+    def set(self, task, key, value):
+        if not self.enabled:
+            return
+        try:
+            self.backend.set(key, value, self.get_timeout(task))
+        except Exception as e:
+            logger.error(f"Response cache write failed: {str(e)}")
+            self._count('errors')
+
+    async def aget(self, key):
+        if not self.backend.blocking:
+            return self.get(key)
+        return await sync_to_async(self.get)(key)
+
+    async def aset(self, task, key, value):
+        if not self.backend.blocking:
+            return self.set(task, key, value)
+        return await sync_to_async(self.set)(task, key, value)
+
+    def _count(self, name):
+        with self._stats_lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        stats = {
+            'enabled': self.enabled,
+            'backend': type(self.backend).__name__,
+            'hits': self.hits,
+            'misses': self.misses,
+            'errors': self.errors,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+        if isinstance(self.backend, LocalLRUCacheBackend):
+            stats['entries'] = len(self.backend)
+            stats['evictions'] = self.backend.evictions
+        return stats
+
+
+_response_cache = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    """Return the process-wide ResponseCache built from AI_RESPONSE_CACHE"""
+    global _response_cache
+    if _response_cache is None:
+        with _response_cache_lock:
+            if _response_cache is None:
+                config = getattr(settings, 'AI_RESPONSE_CACHE', {})
+                backend_class = import_string(
+                    config.get('BACKEND', 'ai_generator.cache.LocalLRUCacheBackend')
+                )
+                _response_cache = ResponseCache(
+                    backend_class(**config.get('OPTIONS', {})),
+                    timeouts=config.get('TIMEOUTS'),
+                    enabled=config.get('ENABLED', True),
+                )
+    return _response_cache
+
+
+def _reset_response_cache(*, setting, **kwargs):
+    global _response_cache
+    if setting == 'AI_RESPONSE_CACHE':
+        _response_cache = None
+
+
+setting_changed.connect(_reset_response_cache)
@@ -0,0 +1,77 @@
+"""
+Bulk export of AIChat history as JSONL or CSV.
+
+Shared by the chat/export/ endpoint and the export_chats command. Rows are
+read with the user columns joined in (one query per EXPORT_CHUNK_SIZE rows)
+and streamed through virtual_tutor.export, so memory does not grow with the
+size of the export. Archived chats (ArchivedAIChat) have the same columns
+and can be exported ahead of the live ones.
+"""
+from datetime import datetime, time
+from itertools import chain
+
+from django.db.models import F
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from virtual_tutor.export import iter_csv, iter_jsonl, iter_queryset_chunks
+
+from .models import AIChat
+
+EXPORT_FIELDS = [
+    'id', 'user_id', 'user_email', 'grade_level', 'session_id', 'message', 'ai_response', 'created_at'
+]
+
+EXPORT_FORMATS = {
+    'jsonl': 'application/x-ndjson',
+    'csv': 'text/csv; charset=utf-8',
+}
+
+
+def _parse_bound(value, name):
+    """A datetime, or a date meaning midnight at its start (naive values use the current timezone)"""
+    try:
+        parsed = parse_datetime(value)
+        if parsed is None:
+            parsed_date = parse_date(value)
+            parsed = datetime.combine(parsed_date, time.min) if parsed_date else None
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise ValueError(f'Invalid {name} date.')
+    return timezone.make_aware(parsed) if timezone.is_naive(parsed) else parsed
+
+
+def filter_chats(queryset=None, user_ids=None, grade=None, since=None, before=None):
+    """Apply the export filters; raises ValueError for malformed values"""
+    chats = AIChat.objects.all() if queryset is None else queryset
+    if user_ids:
+        try:
+            chats = chats.filter(user_id__in=[int(user_id) for user_id in user_ids])
+        except (TypeError, ValueError):
+            raise ValueError('Invalid user id.')
+    if grade:
+        chats = chats.filter(user__grade_level=grade)
+    if since:
+        chats = chats.filter(created_at__gte=_parse_bound(since, 'since'))
+    if before:
+        chats = chats.filter(created_at__lt=_parse_bound(before, 'before'))
+    return chats
+
+
+def iter_export_rows(chats):
+    rows = chats.values(
+        'id', 'user_id', 'session_id', 'message', 'ai_response', 'created_at',
+        user_email=F('user__email'), grade_level=F('user__grade_level'),
+    )
+    return iter_queryset_chunks(rows)
+
+
+def iter_export(chats, export_format, archived=None):
+    """Encoded byte chunks of ``chats`` (after ``archived``, if given) in ``export_format`` ('jsonl' or 'csv')"""
+    rows = iter_export_rows(chats)
+    if archived is not None:
+        rows = chain(iter_export_rows(archived), rows)
+    if export_format == 'csv':
+        return iter_csv(rows, EXPORT_FIELDS)
+    return iter_jsonl(({field: row[field] for field in EXPORT_FIELDS} for row in rows))
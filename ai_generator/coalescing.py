@@ -0,0 +1,208 @@
+"""
+Single-flight coalescing of identical upstream calls.
+
+While a call for a key is in flight, later callers with the same key wait
+for the leader's result instead of issuing their own request. Followers
+receive the leader's result (including error results) or its exception,
+and give up with TimeoutError after WAIT_TIMEOUT seconds.
+
+With CROSS_PROCESS enabled the leader also takes a lock in a shared Django
+cache, and leaders in other worker processes wait for the result it
+publishes there instead of calling upstream themselves.
+"""
+import asyncio
+import hashlib
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+
+logger = logging.getLogger(__name__)
+
+
+def make_flight_key(*parts):
+    raw = '|'.join(str(part) for part in parts)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+class SingleFlight:
+    """Collapses identical concurrent calls within (and optionally across) processes"""
+
+    def __init__(self, wait_timeout=60, cross_process=False, cache_alias='default',
+                 lock_timeout=60, result_timeout=10, poll_interval=0.1):
+        self.wait_timeout = wait_timeout
+        self.cross_process = cross_process
+        self.cache_alias = cache_alias
+        self.lock_timeout = lock_timeout
+        self.result_timeout = result_timeout
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._async_calls = {}
+        self.leaders = 0
+        self.followers = 0
+
+    def do(self, key, fn):
+        """Run ``fn()`` once per key among concurrent callers.
+
+        Returns ``(result, shared)``; ``shared`` is True for followers that
+        received another caller's result.
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            is_leader = future is None
+            if is_leader:
+                future = Future()
+                self._calls[key] = future
+                self.leaders += 1
+            else:
+                self.followers += 1
+
+        if not is_leader:
+            try:
+                return future.result(timeout=self.wait_timeout), True
+            except FutureTimeoutError:
+                raise TimeoutError('Timed out waiting for an identical in-flight request')
+
+        try:
+            result = self._run_leader(key, fn)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+    async def ado(self, key, coro_fn):
+        """Async counterpart of do() for callers on an event loop"""
+        loop = asyncio.get_running_loop()
+        flight_key = (id(loop), key)
+        future = self._async_calls.get(flight_key)
+        if future is not None:
+            self.followers += 1
+            try:
+                return await asyncio.wait_for(asyncio.shield(future), self.wait_timeout), True
+            except asyncio.TimeoutError:
+                raise TimeoutError('Timed out waiting for an identical in-flight request')
+
+        future = loop.create_future()
+        self._async_calls[flight_key] = future
+        self.leaders += 1
+        try:
+            if self.cross_process:
+                result = await self._arun_leader(key, coro_fn)
+            else:
+                result = await coro_fn()
+        except asyncio.CancelledError:
+            # The leader's client went away; followers must not be cancelled with it
+            future.set_exception(RuntimeError('The identical in-flight request was cancelled'))
+            future.exception()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved when nobody was waiting for it
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            self._async_calls.pop(flight_key, None)
+
+    def _run_leader(self, key, fn):
+        if not self.cross_process:
+            return fn()
+
+        cache = caches[self.cache_alias]
+        lock_key = f'singleflight:lock:{key}'
+        result_key = f'singleflight:result:{key}'
+        deadline = time.monotonic() + self.wait_timeout
+
+        while True:
+            if cache.add(lock_key, 1, self.lock_timeout):
+                try:
+                    result = fn()
+                    cache.set(result_key, result, self.result_timeout)
+                    return result
+                finally:
+                    cache.delete(lock_key)
+
+            # Another process holds the lock: wait for it to publish the result
+            result = cache.get(result_key)
+            if result is not None:
+                return result
+            if time.monotonic() >= deadline:
+                raise TimeoutError('Timed out waiting for an identical in-flight request')
+            time.sleep(self.poll_interval)
+
+    async def _arun_leader(self, key, coro_fn):
+        cache = caches[self.cache_alias]
+        lock_key = f'singleflight:lock:{key}'
+        result_key = f'singleflight:result:{key}'
+        deadline = time.monotonic() + self.wait_timeout
+
+        while True:
+            if await sync_to_async(cache.add)(lock_key, 1, self.lock_timeout):
+                try:
+                    result = await coro_fn()
+                    await sync_to_async(cache.set)(result_key, result, self.result_timeout)
+                    return result
+                finally:
+                    await sync_to_async(cache.delete)(lock_key)
+
+            result = await sync_to_async(cache.get)(result_key)
+            if result is not None:
+                return result
+            if time.monotonic() >= deadline:
+                raise TimeoutError('Timed out waiting for an identical in-flight request')
+            await asyncio.sleep(self.poll_interval)
+
+    def stats(self):
+        return {
+            'leaders': self.leaders,
+            'followers': self.followers,
+            'in_flight': len(self._calls) + len(self._async_calls),
+            'cross_process': self.cross_process,
+        }
+
+
+_single_flight = None
+_single_flight_lock = threading.Lock()
+
+
+def get_single_flight():
+    """Return the process-wide SingleFlight, or None when coalescing is disabled"""
+    global _single_flight
+    config = getattr(settings, 'AI_REQUEST_COALESCING', {})
+    if not config.get('ENABLED', True):
+        return None
+    if _single_flight is None:
+        with _single_flight_lock:
+            if _single_flight is None:
+                _single_flight = SingleFlight(
+                    wait_timeout=config.get('WAIT_TIMEOUT', 60),
+                    cross_process=config.get('CROSS_PROCESS', False),
+                    cache_alias=config.get('CACHE_ALIAS', 'default'),
+                    lock_timeout=config.get('LOCK_TIMEOUT', 60),
+                    result_timeout=config.get('RESULT_TIMEOUT', 10),
+                    poll_interval=config.get('POLL_INTERVAL', 0.1),
+                )
+    return _single_flight
+
+
+def _reset_single_flight(*, setting, **kwargs):
+    global _single_flight
+    if setting == 'AI_REQUEST_COALESCING':
+        _single_flight = None
+
+
+setting_changed.connect(_reset_single_flight)
@@ -0,0 +1,183 @@
+"""
+Multi-turn chat sessions with a bounded prompt.
+
+A session turn is sent upstream as the tutor context, the session's rolling
+summary and its unsummarized turns (newest first, up to
+HISTORY_TOKEN_BUDGET tokens). Once the unsummarized turns outgrow the budget
+the oldest are folded into the summary until COMPACT_TO of the budget is
+left, so compaction runs every few turns rather than on every one. Folding
+always continues from the last summarized turn, so no turn is skipped. The
+prompt, and so the cost of each turn, stays bounded however long a session
+runs.
+
+Token counts use the local estimate from backends.estimate_tokens, so
+building a prompt costs no upstream calls.
+"""
+import logging
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils import timezone
+
+from .backends import estimate_tokens
+from .models import AIChat, ChatSession
+from .persistence import persist_chat
+from .services import DEFAULT_CONTEXT, get_gemini_service
+
+logger = logging.getLogger(__name__)
+
+
+def _config():
+    return getattr(settings, 'AI_CONVERSATION', {})
+
+
+def get_session(user, session_id):
+    """Return the user's session with ``session_id``, or None"""
+    if not user.is_authenticated:
+        return None
+    try:
+        return ChatSession.objects.get(pk=int(session_id), user=user)
+    except (TypeError, ValueError, ChatSession.DoesNotExist):
+        return None
+
+
+def format_turns(turns):
+    return '\n'.join(f"User: {turn['message']}\nAI: {turn['ai_response']}" for turn in turns)
+
+
+def turn_tokens(turn):
+    return estimate_tokens(turn['message']) + estimate_tokens(turn['ai_response'])
+
+
+def _pending_turns(session, limit=None):
+    """The newest ``limit`` (default MAX_HISTORY_TURNS) turns not yet folded into the summary, oldest first"""
+    limit = limit or _config().get('MAX_HISTORY_TURNS', 50)
+    turns = list(
+        AIChat.objects
+        .filter(session=session, id__gt=session.summarized_through)
+        .order_by('-id')
+        .values('id', 'message', 'ai_response')[:limit]
+    )
+    turns.reverse()
+    return turns
+
+
+def build_context(session, context=DEFAULT_CONTEXT):
+    """Context for the next turn: instructions, summary and the newest turns that fit the budget"""
+    budget = _config().get('HISTORY_TOKEN_BUDGET', 1500)
+    window = []
+    used = 0
+    for turn in reversed(_pending_turns(session)):
+        tokens = turn_tokens(turn)
+        if used + tokens > budget:
+            break
+        window.append(turn)
+        used += tokens
+    window.reverse()
+
+    parts = [context]
+    if session.summary:
+        parts.append(f"Summary of the conversation so far: {session.summary}")
+    if window:
+        parts.append(format_turns(window))
+    return '\n\n'.join(parts)
+
+
+def _save_turn(session, user, message, ai_response):
+    # Always written synchronously (never write-behind): the next turn must see it
+    chat = persist_chat(user, message, ai_response, sync=True, session=session)
+    updates = {'updated_at': timezone.now()}
+    if not session.title:
+        updates['title'] = session.title = message[:200]
+    ChatSession.objects.filter(pk=session.pk).update(**updates)
+    return chat
+
+
+def _turns_to_fold(session):
+    """
+    Oldest unsummarized turns to fold into the summary, or [] if under budget
+    Folding starts right after summarized_through, so turns older than the
+    loaded window are summarized too instead of being skipped; a long
+    backlog is folded MAX_HISTORY_TURNS at a time
+    """
+    config = _config()
+    budget = config.get('HISTORY_TOKEN_BUDGET', 1500)
+    limit = config.get('MAX_HISTORY_TURNS', 50)
+    # One turn past the window tells whether older ones were never loaded
+    turns = _pending_turns(session, limit + 1)
+    if len(turns) <= limit and sum(turn_tokens(turn) for turn in turns) <= budget:
+        return []
+
+    # The newest turns within COMPACT_TO of the budget stay verbatim
+    keep = budget * config.get('COMPACT_TO', 0.5)
+    kept_from = None
+    used = 0
+    for turn in reversed(turns[-limit:]):
+        used += turn_tokens(turn)
+        if used > keep:
+            break
+        kept_from = turn['id']
+
+    older = AIChat.objects.filter(session=session, id__gt=session.summarized_through)
+    if kept_from is not None:
+        older = older.filter(id__lt=kept_from)
+    return list(older.order_by('id').values('id', 'message', 'ai_response')[:limit])
+
+
+def _store_summary(session, folded, result):
+    if not result['success']:
+        logger.error(f"Error summarizing chat session {session.pk}: {result['error']}")
+        return False
+
+    # Hard cap in case the model ignores the word limit
+    max_chars = _config().get('SUMMARY_MAX_WORDS', 150) * 8
+    summary = result['response'][:max_chars]
+    through = folded[-1]['id']
+    # A concurrent compaction of the same session wins; this one is dropped
+    updated = ChatSession.objects.filter(
+        pk=session.pk, summarized_through=session.summarized_through
+    ).update(summary=summary, summarized_through=through)
+    if updated:
+        session.summary = summary
+        session.summarized_through = through
+    return bool(updated)
+
+
+def compact_session(session, service=None):
+    """Fold turns beyond the token budget into the session summary"""
+    folded = _turns_to_fold(session)
+    if not folded:
+        return False
+    service = service or get_gemini_service()
+    result = service.summarize_conversation(
+        session.summary, format_turns(folded), _config().get('SUMMARY_MAX_WORDS', 150)
+    )
+    return _store_summary(session, folded, result)
+
+
+def record_turn(session, user, message, ai_response):
+    """Save a completed session turn and compact the session if it outgrew the budget"""
+    chat = _save_turn(session, user, message, ai_response)
+    compact_session(session)
+    return chat
+
+
+aget_session = sync_to_async(get_session)
+abuild_context = sync_to_async(build_context)
+
+
+async def acompact_session(session, service=None):
+    folded = await sync_to_async(_turns_to_fold)(session)
+    if not folded:
+        return False
+    service = service or get_gemini_service()
+    result = await service.asummarize_conversation(
+        session.summary, format_turns(folded), _config().get('SUMMARY_MAX_WORDS', 150)
+    )
+    return await sync_to_async(_store_summary)(session, folded, result)
+
+
+async def arecord_turn(session, user, message, ai_response):
+    chat = await sync_to_async(_save_turn)(session, user, message, ai_response)
+    await acompact_session(session)
+    return chat
@@ -0,0 +1,80 @@
+"""
+Metrics for upstream LLM calls.
+
+Every upstream attempt (including retries and hedged duplicates) is timed
+per task and outcome, and failures are counted by exception type. Prompt and
+response sizes are recorded once per logical call as estimated tokens.
+"""
+import asyncio
+import time
+from contextlib import contextmanager
+
+from virtual_tutor.metrics import Counter, Gauge, Histogram
+
+from .backends import estimate_tokens
+
+TOKEN_BUCKETS = (16, 64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384)
+
+UPSTREAM_LATENCY = Histogram(
+    'ai_upstream_request_duration_seconds', 'Latency of upstream LLM attempts.', ['task', 'outcome']
+)
+UPSTREAM_ERRORS = Counter(
+    'ai_upstream_errors_total', 'Failed upstream LLM attempts.', ['task', 'error']
+)
+UPSTREAM_IN_FLIGHT = Gauge(
+    'ai_upstream_requests_in_flight', 'Upstream LLM attempts in progress.', ['task']
+)
+PROMPT_TOKENS = Histogram(
+    'ai_prompt_tokens', 'Estimated prompt size in tokens.', ['task'], buckets=TOKEN_BUCKETS
+)
+RESPONSE_TOKENS = Histogram(
+    'ai_response_tokens', 'Estimated response size in tokens.', ['task'], buckets=TOKEN_BUCKETS
+)
+
+
+@contextmanager
+def track_upstream(task):
+    """Time one upstream attempt and count it if it fails"""
+    outcome = 'success'
+    started = time.perf_counter()
+    UPSTREAM_IN_FLIGHT.inc(task=task)
+    try:
+        yield
+    except (asyncio.CancelledError, GeneratorExit):
+        # Lost a hedge race, hit the deadline or the client went away
+        outcome = 'cancelled'
+        raise
+    except Exception as e:
+        outcome = 'error'
+        UPSTREAM_ERRORS.inc(task=task, error=type(e).__name__)
+        raise
+    finally:
+        UPSTREAM_IN_FLIGHT.dec(task=task)
+        UPSTREAM_LATENCY.observe(time.perf_counter() - started, task=task, outcome=outcome)
+
+
+def observe_prompt(task, prompt):
+    PROMPT_TOKENS.observe(estimate_tokens(prompt), task=task)
+
+
+def observe_response(task, text):
+    RESPONSE_TOKENS.observe(estimate_tokens(text), task=task)
+
+
+def instrument_stream(task, chunks):
+    """Wrap a backend stream so the whole stream counts as one attempt"""
+    parts = []
+    with track_upstream(task):
+        for chunk in chunks:
+            parts.append(chunk)
+            yield chunk
+    observe_response(task, ''.join(parts))
+
+
+async def ainstrument_stream(task, chunks):
+    parts = []
+    with track_upstream(task):
+        async for chunk in chunks:
+            parts.append(chunk)
+            yield chunk
+    observe_response(task, ''.join(parts))
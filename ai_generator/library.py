@@ -0,0 +1,99 @@
+"""
+Persistent content library for syllabus topics.
+
+The pregenerate_curriculum command fills ContentLibraryEntry with
+educational content (topic x grade level) and concept explanations
+(topic x difficulty) ahead of time. explain_concept and
+generate_educational_content look an entry up by its response-cache key
+before going upstream, so a pre-generated lesson is one indexed query away.
+Keys include the model name and PROMPT_TEMPLATE_VERSION, so entries written
+for an older prompt or model are simply no longer found.
+
+Curriculum files are JSON, either one object or a list of them:
+
+    {"topics": ["Photosynthesis", "Fractions"],
+     "grade_levels": ["grade 5", "grade 8"],
+     "difficulties": ["beginner", "intermediate"]}
+"""
+import json
+import logging
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from virtual_tutor.metrics import record_cache_lookup
+
+from .models import ContentLibraryEntry
+
+logger = logging.getLogger(__name__)
+
+# Curriculum field holding the level each task is generated for
+TASK_LEVELS = {
+    'educational_content': 'grade_levels',
+    'explain_concept': 'difficulties',
+}
+
+
+class CurriculumError(Exception):
+    pass
+
+
+def library_enabled():
+    return getattr(settings, 'AI_CONTENT_LIBRARY', {}).get('ENABLED', True)
+
+
+def lookup(key):
+    """Pre-generated content for a response-cache key, or None"""
+    if not library_enabled():
+        return None
+    try:
+        content = ContentLibraryEntry.objects.filter(key=key).values_list('content', flat=True).first()
+    except Exception as e:
+        logger.error(f"Content library lookup failed: {str(e)}")
+        return None
+    record_cache_lookup('content_library', content is not None)
+    return content
+
+
+alookup = sync_to_async(lookup)
+
+
+def store(key, task, subject, level, model_name, prompt_version, content):
+    ContentLibraryEntry.objects.update_or_create(
+        key=key,
+        defaults={
+            'task': task,
+            'subject': subject[:255],
+            'level': level[:100],
+            'model_name': model_name,
+            'prompt_version': prompt_version,
+            'content': content,
+        },
+    )
+
+
+def load_curriculum(path, tasks=tuple(TASK_LEVELS)):
+    """Expand a curriculum file into unique (task, subject, level) items, in file order"""
+    try:
+        with open(path, encoding='utf-8') as curriculum_file:
+            data = json.load(curriculum_file)
+    except (OSError, ValueError) as e:
+        raise CurriculumError(f"Could not read curriculum {path}: {e}")
+
+    groups = data if isinstance(data, list) else [data]
+    items = []
+    seen = set()
+    for index, group in enumerate(groups):
+        if not isinstance(group, dict) or not isinstance(group.get('topics'), list):
+            raise CurriculumError(f"Curriculum entry {index} needs a 'topics' list")
+        for task in tasks:
+            levels = group.get(TASK_LEVELS[task], [])
+            if not isinstance(levels, list):
+                raise CurriculumError(f"Curriculum entry {index}: '{TASK_LEVELS[task]}' must be a list")
+            for topic in group['topics']:
+                for level in levels:
+                    item = (task, str(topic).strip(), str(level).strip())
+                    if item[1] and item[2] and item not in seen:
+                        seen.add(item)
+                        items.append(item)
+    return items
@@ -1 +1 @@
-# This file makes Python treat the directory as a package
+# This file makes Python treat the directory as a package
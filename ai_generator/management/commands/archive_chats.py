@@ -0,0 +1,50 @@
+"""
+Move old chats into the archive table.
+
+    python manage.py archive_chats                  # older than AI_CHAT_ARCHIVE['AFTER_DAYS']
+    python manage.py archive_chats --days 90 --batch-size 5000
+
+Safe to interrupt and to run from cron; each chunk is moved atomically.
+"""
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError
+from django.utils import timezone
+
+from ai_generator.archive import archive_chats
+from ai_generator.models import AIChat
+
+
+class Command(BaseCommand):
+    help = 'Move chats older than a cutoff from AIChat into ArchivedAIChat, in chunks'
+
+    def add_arguments(self, parser):
+        config = getattr(settings, 'AI_CHAT_ARCHIVE', {})
+        parser.add_argument('--days', type=int, default=config.get('AFTER_DAYS', 180),
+                            help='Archive chats older than this many days')
+        parser.add_argument('--batch-size', type=int, default=config.get('BATCH_SIZE', 1000))
+        parser.add_argument('--dry-run', action='store_true', help='Only count the chats to archive')
+
+    def handle(self, *args, **options):
+        if options['days'] < 1 or options['batch_size'] < 1:
+            raise CommandError('--days and --batch-size must be at least 1')
+        cutoff = timezone.now() - timedelta(days=options['days'])
+
+        if options['dry_run']:
+            count = AIChat.objects.filter(created_at__lt=cutoff).count()
+            self.stdout.write(f"{count} chats created before {cutoff.isoformat()} would be archived")
+            return
+
+        started = time.monotonic()
+        try:
+            total = archive_chats(
+                cutoff,
+                batch_size=options['batch_size'],
+                progress=lambda done: self.stdout.write(f"  {done} archived ({time.monotonic() - started:.0f}s)"),
+            )
+        except IntegrityError as e:
+            raise CommandError(f'A chat id is already in the archive; nothing from that chunk was moved: {str(e)}')
+        self.stdout.write(self.style.SUCCESS(f"Archived {total} chats created before {cutoff.isoformat()}"))
@@ -0,0 +1,293 @@
+"""
+Load/benchmark suite for the tutor API.
+
+Runs against a throwaway test database with the SimulatedBackend standing
+in for Gemini, so results are reproducible offline:
+
+    python manage.py benchmark --concurrency 16 --requests 500 --output bench.json
+    python manage.py benchmark --compare bench.json --fail-threshold 15
+"""
+import json
+import platform
+import resource
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from account.models import User
+from ai_generator.models import AIChat
+
+BENCH_PASSWORD = 'Bench-Passw0rd!'
+
+# name -> (method, url name, needs auth token, payload factory)
+ENDPOINTS = {
+    'chat': ('post', 'chat_with_ai', True, lambda i: {'message': f'Benchmark question number {i}'}),
+    'explain': ('post', 'explain_concept', False, lambda i: {'concept': f'benchmark concept {i % 20}'}),
+    'chat_list': ('get', 'list_user_chats', True, None),
+    'login': ('post', 'login', False, lambda i: {'email': 'bench0@example.com', 'password': BENCH_PASSWORD}),
+    'students': ('get', 'student-list', False, None),
+}
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[rank]
+
+
+def peak_rss_mb():
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    return usage / (1024 * 1024) if sys.platform == 'darwin' else usage / 1024
+
+
+def current_rss_mb():
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * resource.getpagesize() / (1024 * 1024)
+    except OSError:
+        return peak_rss_mb()
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the AI and account endpoints against a simulated upstream and a test database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--endpoints', default=','.join(ENDPOINTS),
+                            help=f'Comma-separated subset of: {", ".join(ENDPOINTS)}')
+        parser.add_argument('--requests', type=int, default=200, help='Requests per endpoint')
+        parser.add_argument('--concurrency', type=int, default=8, help='Concurrent client threads')
+        parser.add_argument('--warmup', type=int, default=10, help='Unmeasured requests per endpoint')
+        parser.add_argument('--users', type=int, default=20, help='Authenticated users driving the load')
+        parser.add_argument('--students', type=int, default=1000, help='Student rows to seed')
+        parser.add_argument('--chats-per-user', type=int, default=100, help='AIChat rows to seed per user')
+        parser.add_argument('--upstream-latency', type=float, default=0.2,
+                            help='Median simulated upstream latency in seconds (lognormal)')
+        parser.add_argument('--upstream-error-rate', type=float, default=0.0)
+        parser.add_argument('--no-cache', action='store_true', help='Disable the AI response cache')
+        parser.add_argument('--rate-limits', action='store_true',
+                            help='Keep the per-user/IP rate limits (off by default: all load comes from one IP)')
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--output', help='Write results as JSON to this path')
+        parser.add_argument('--compare', help='Baseline JSON from a previous run to compare against')
+        parser.add_argument('--fail-threshold', type=float, default=None,
+                            help='Exit with an error if p95 or throughput regress by more than this percent')
+
+    def handle(self, *args, **options):
+        names = [name.strip() for name in options['endpoints'].split(',') if name.strip()]
+        unknown = set(names) - set(ENDPOINTS)
+        if unknown:
+            raise CommandError(f"Unknown endpoints: {', '.join(sorted(unknown))}")
+
+        backend = {
+            'BACKEND': 'ai_generator.backends.SimulatedBackend',
+            'OPTIONS': {
+                'seed': options['seed'],
+                'latency': {'distribution': 'lognormal', 'median': options['upstream_latency'], 'sigma': 0.4},
+                'error_rate': options['upstream_error_rate'],
+            },
+        }
+        response_cache = dict(settings.AI_RESPONSE_CACHE, ENABLED=not options['no_cache'])
+        admission = settings.AI_ADMISSION
+        if not options['rate_limits']:
+            admission = dict(admission, RATE_LIMITS={})
+
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            with override_settings(AI_BACKEND=backend, AI_RESPONSE_CACHE=response_cache, AI_ADMISSION=admission):
+                tokens = self._seed(options)
+                results = {
+                    name: self._run_endpoint(name, tokens, options)
+                    for name in names
+                }
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        report = {
+            'created_at': timezone.now().isoformat(),
+            'python': platform.python_version(),
+            'database': connection.vendor,
+            'async_views': settings.AI_ASYNC_VIEWS,
+            'config': {
+                key: options[key] for key in (
+                    'requests', 'concurrency', 'users', 'students', 'chats_per_user',
+                    'upstream_latency', 'upstream_error_rate', 'no_cache', 'rate_limits', 'seed',
+                )
+            },
+            'peak_rss_mb': round(peak_rss_mb(), 1),
+            'endpoints': results,
+        }
+        self._print_report(report)
+
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(report, output, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+        if options['compare']:
+            self._compare(report, options['compare'], options['fail_threshold'])
+
+    def _seed(self, options):
+        """Create users with tokens, students and chat history; returns token keys"""
+        User.objects.bulk_create([
+            User(
+                username=f'bench{i}@example.com',
+                email=f'bench{i}@example.com',
+                is_student=True,
+                grade_level='7',
+            )
+            for i in range(options['users'])
+        ])
+        login_user = User.objects.get(email='bench0@example.com')
+        login_user.set_password(BENCH_PASSWORD)
+        login_user.save(update_fields=['password'])
+
+        User.objects.bulk_create([
+            User(
+                username=f'student{i}@example.com',
+                email=f'student{i}@example.com',
+                first_name='Student',
+                last_name=str(i),
+                is_student=True,
+                grade_level=str(1 + i % 12),
+            )
+            for i in range(options['students'])
+        ], batch_size=1000)
+
+        users = list(User.objects.filter(email__startswith='bench'))
+        AIChat.objects.bulk_create([
+            AIChat(user=user, message=f'Seed question {n}', ai_response='Seed answer ' * 20)
+            for user in users
+            for n in range(options['chats_per_user'])
+        ], batch_size=1000)
+
+        Token.objects.bulk_create([Token(user=user, key=Token.generate_key()) for user in users])
+        return list(Token.objects.values_list('key', flat=True))
+
+    def _request(self, client, name, index, token):
+        method, url_name, needs_auth, payload = ENDPOINTS[name]
+        kwargs = {}
+        if needs_auth:
+            kwargs['HTTP_AUTHORIZATION'] = f'Token {token}'
+        url = reverse(url_name)
+
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            if method == 'post':
+                response = client.post(url, payload(index), content_type='application/json', **kwargs)
+            else:
+                response = client.get(url, **kwargs)
+            if getattr(response, 'streaming', False):
+                b''.join(response.streaming_content)
+            elapsed = time.perf_counter() - started
+        return elapsed, len(queries), response.status_code
+
+    def _run_endpoint(self, name, tokens, options):
+        self.stdout.write(f"Benchmarking {name} ...")
+        local = threading.local()
+
+        def call(index):
+            if not hasattr(local, 'client'):
+                local.client = Client()
+            return self._request(local.client, name, index, tokens[index % len(tokens)])
+
+        def close_connections(barrier):
+            # The barrier makes every worker thread run exactly one of these
+            barrier.wait()
+            connections.close_all()
+
+        for index in range(options['warmup']):
+            call(index)
+
+        rss_before = current_rss_mb()
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as executor:
+            samples = list(executor.map(call, range(options['requests'])))
+            wall = time.perf_counter() - started
+            barrier = threading.Barrier(options['concurrency'])
+            list(executor.map(close_connections, [barrier] * options['concurrency']))
+
+        latencies = sorted(sample[0] * 1000 for sample in samples)
+        query_counts = [sample[1] for sample in samples]
+        errors = sum(1 for sample in samples if sample[2] >= 400)
+        return {
+            'requests': len(samples),
+            'errors': errors,
+            'wall_seconds': round(wall, 3),
+            'rps': round(len(samples) / wall, 2) if wall else 0.0,
+            'latency_ms': {
+                'mean': round(statistics.fmean(latencies), 2),
+                'p50': round(percentile(latencies, 50), 2),
+                'p95': round(percentile(latencies, 95), 2),
+                'p99': round(percentile(latencies, 99), 2),
+                'max': round(latencies[-1], 2),
+            },
+            'queries_per_request': {
+                'mean': round(statistics.fmean(query_counts), 2),
+                'max': max(query_counts),
+            },
+            'rss_mb': {
+                'before': round(rss_before, 1),
+                'after': round(current_rss_mb(), 1),
+            },
+        }
+
+    def _print_report(self, report):
+        header = f"{'endpoint':<12}{'rps':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'q/req':>8}{'errors':>8}{'rss MB':>9}"
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        for name, result in report['endpoints'].items():
+            latency = result['latency_ms']
+            self.stdout.write(
+                f"{name:<12}{result['rps']:>9.1f}{latency['p50']:>10.1f}{latency['p95']:>10.1f}"
+                f"{latency['p99']:>10.1f}{result['queries_per_request']['mean']:>8.1f}"
+                f"{result['errors']:>8}{result['rss_mb']['after']:>9.1f}"
+            )
+        self.stdout.write(f"Peak RSS: {report['peak_rss_mb']} MB")
+
+    def _compare(self, report, baseline_path, threshold):
+        try:
+            with open(baseline_path) as baseline_file:
+                baseline = json.load(baseline_file)
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Could not read baseline {baseline_path}: {e}")
+
+        regressions = []
+        self.stdout.write(f"\nComparison with {baseline_path}:")
+        for name, result in report['endpoints'].items():
+            before = baseline.get('endpoints', {}).get(name)
+            if not before:
+                continue
+            p95_change = _pct_change(before['latency_ms']['p95'], result['latency_ms']['p95'])
+            rps_change = _pct_change(before['rps'], result['rps'])
+            queries_change = result['queries_per_request']['mean'] - before['queries_per_request']['mean']
+            self.stdout.write(
+                f"  {name:<12} p95 {p95_change:+.1f}%  rps {rps_change:+.1f}%  queries/request {queries_change:+.1f}"
+            )
+            if threshold is not None and (p95_change > threshold or -rps_change > threshold or queries_change > 0):
+                regressions.append(name)
+
+        if regressions:
+            raise CommandError(f"Performance regression in: {', '.join(regressions)}")
+
+
+def _pct_change(before, after):
+    if not before:
+        return 0.0
+    return (after - before) / before * 100
@@ -0,0 +1,74 @@
+"""
+Export AIChat history as JSONL or CSV.
+
+    python manage.py export_chats --format csv --grade "grade 8" --since 2025-01-01 --gzip -o chats.csv.gz
+
+Rows are streamed in keyset batches straight to the output, so memory stays
+flat for exports of any size.
+"""
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from account.models import User
+from ai_generator.chat_export import EXPORT_FORMATS, filter_chats, iter_export
+from ai_generator.models import ArchivedAIChat
+from virtual_tutor.export import iter_gzip
+
+
+class Command(BaseCommand):
+    help = 'Stream AIChat rows as JSONL or CSV to a file or stdout'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=list(EXPORT_FORMATS), default='jsonl')
+        parser.add_argument('--user', action='append', default=[],
+                            help='User id or email; repeat for several users')
+        parser.add_argument('--grade', help="Only users with this grade_level")
+        parser.add_argument('--since', help='ISO 8601 date or datetime (inclusive)')
+        parser.add_argument('--before', help='ISO 8601 date or datetime (exclusive)')
+        parser.add_argument('--include-archived', action='store_true',
+                            help='Also export archived chats (written first)')
+        parser.add_argument('--gzip', action='store_true', help='Gzip the output')
+        parser.add_argument('-o', '--output', help='Output file (default: stdout)')
+
+    def handle(self, *args, **options):
+        user_ids = [self._user_id(user) for user in options['user']]
+        filters = {
+            'user_ids': user_ids, 'grade': options['grade'], 'since': options['since'], 'before': options['before'],
+        }
+        try:
+            chats = filter_chats(**filters)
+            archived = None
+            if options['include_archived']:
+                archived = filter_chats(queryset=ArchivedAIChat.objects.all(), **filters)
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        chunks = iter_export(chats, options['format'], archived=archived)
+        if options['gzip']:
+            chunks = iter_gzip(chunks)
+
+        if options['output']:
+            with open(options['output'], 'wb') as output:
+                written = self._write(chunks, output)
+            self.stderr.write(self.style.SUCCESS(f"Wrote {written} bytes to {options['output']}"))
+        else:
+            self._write(chunks, sys.stdout.buffer)
+            sys.stdout.buffer.flush()
+
+    @staticmethod
+    def _user_id(value):
+        if value.isdigit():
+            return int(value)
+        user_id = User.objects.filter(email__iexact=value).values_list('id', flat=True).first()
+        if user_id is None:
+            raise CommandError(f"No user with email {value}")
+        return user_id
+
+    @staticmethod
+    def _write(chunks, output):
+        written = 0
+        for chunk in chunks:
+            output.write(chunk)
+            written += len(chunk)
+        return written
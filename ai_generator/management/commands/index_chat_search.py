@@ -0,0 +1,55 @@
+"""
+Build the chat search index for chats not yet in it.
+
+    python manage.py index_chat_search            # index pending chats
+    python manage.py index_chat_search --rebuild  # re-tokenize every chat
+
+New chats are indexed as they are saved; run this once after deploying the
+search index, after changing the tokenizer (with --rebuild), or from cron to
+catch up on bulk inserts whose ids the database did not return.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from ai_generator.models import AIChat
+from ai_generator.search import INDEX_BATCH_SIZE, index_pending
+
+
+class Command(BaseCommand):
+    help = 'Add chats missing from the full-text search index'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rebuild', action='store_true', help='Mark every chat for re-indexing first')
+        parser.add_argument('--batch-size', type=int, default=INDEX_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            marked = self._mark_all(options['batch_size'] * 10)
+            self.stdout.write(f"Marked {marked} chats for re-indexing")
+
+        started = time.monotonic()
+        total = 0
+        while True:
+            # Batches of batches, so progress shows up on large tables
+            indexed = index_pending(batch_size=options['batch_size'], max_batches=20)
+            total += indexed
+            if indexed:
+                self.stdout.write(f"  {total} chats indexed ({time.monotonic() - started:.0f}s)")
+            if indexed < options['batch_size'] * 20:
+                break
+        self.stdout.write(self.style.SUCCESS(f"Indexed {total} chats"))
+
+    @staticmethod
+    def _mark_all(chunk_size):
+        # Keyset chunks keep each UPDATE (and its locks) short
+        marked = 0
+        last_id = 0
+        while True:
+            ids = list(
+                AIChat.objects.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:chunk_size]
+            )
+            if not ids:
+                return marked
+            marked += AIChat.objects.filter(id__in=ids).update(search_indexed=False)
+            last_id = ids[-1]
@@ -0,0 +1,118 @@
+"""
+Pre-generate a curriculum into the content library.
+
+    python manage.py pregenerate_curriculum syllabus.json --concurrency 8
+
+Items already in the library (for the current model and prompt version) are
+skipped, and each item is stored as soon as it is generated, so an
+interrupted run picks up where it stopped when started again. Upstream calls
+go through the usual resilience policy, so transient errors are retried.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from ai_generator.library import TASK_LEVELS, CurriculumError, load_curriculum, store
+from ai_generator.models import ContentLibraryEntry
+from ai_generator.services import PROMPT_TEMPLATE_VERSION, closing_connections, get_gemini_service
+
+
+class Command(BaseCommand):
+    help = 'Generate educational content and concept explanations for a curriculum into the content library'
+
+    def add_arguments(self, parser):
+        parser.add_argument('curriculum', help='JSON file with topics, grade_levels and difficulties')
+        parser.add_argument('--tasks', default=','.join(TASK_LEVELS),
+                            help=f'Comma-separated subset of: {", ".join(TASK_LEVELS)}')
+        parser.add_argument('--concurrency', type=int,
+                            default=getattr(settings, 'AI_CONTENT_LIBRARY', {}).get('CONCURRENCY', 4),
+                            help='Concurrent upstream calls')
+        parser.add_argument('--force', action='store_true', help='Regenerate items already in the library')
+        parser.add_argument('--dry-run', action='store_true', help='Only report what would be generated')
+
+    def handle(self, *args, **options):
+        tasks = [task.strip() for task in options['tasks'].split(',') if task.strip()]
+        unknown = set(tasks) - set(TASK_LEVELS)
+        if unknown:
+            raise CommandError(f"Unknown tasks: {', '.join(sorted(unknown))}")
+        if options['concurrency'] < 1:
+            raise CommandError('--concurrency must be at least 1')
+
+        try:
+            items = load_curriculum(options['curriculum'], tasks)
+        except CurriculumError as e:
+            raise CommandError(str(e))
+
+        service = get_gemini_service()
+        if not service.is_configured() and not options['dry_run']:
+            raise CommandError('Gemini AI is not properly configured. Please check your API key.')
+
+        keyed = [(service.content_key(*item), item) for item in items]
+        if not options['force']:
+            existing = self._existing_keys([key for key, _ in keyed])
+            keyed = [(key, item) for key, item in keyed if key not in existing]
+
+        self.stdout.write(
+            f"{len(items)} curriculum items, {len(items) - len(keyed)} already in the library, "
+            f"{len(keyed)} to generate"
+        )
+        if options['dry_run'] or not keyed:
+            return
+
+        failures = self._generate(service, keyed, options['concurrency'])
+        if failures:
+            for (task, subject, level), error in failures:
+                self.stderr.write(f"  {task}: {subject} ({level}): {error}")
+            raise CommandError(f"{len(failures)} items failed; run the command again to retry them")
+        self.stdout.write(self.style.SUCCESS(f"Generated {len(keyed)} items"))
+
+    @staticmethod
+    def _existing_keys(keys, chunk_size=500):
+        existing = set()
+        for start in range(0, len(keys), chunk_size):
+            existing.update(
+                ContentLibraryEntry.objects
+                .filter(key__in=keys[start:start + chunk_size])
+                .values_list('key', flat=True)
+            )
+        return existing
+
+    def _generate(self, service, keyed, concurrency):
+        done = 0
+        started = time.monotonic()
+        failures = []
+
+        @closing_connections
+        def run(key, item):
+            task, subject, level = item
+            prompt, context = service.task_prompt(task, subject, level)
+            result = service.generate_response(prompt, context, task)
+            if result['success']:
+                store(key, task, subject, level, service.model_name, PROMPT_TEMPLATE_VERSION, result['response'])
+            return result
+
+        executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='ai-pregenerate')
+        try:
+            futures = {executor.submit(run, key, item): item for key, item in keyed}
+            for future in as_completed(futures):
+                item = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = {'success': False, 'error': str(e)}
+                done += 1
+                if not result['success']:
+                    failures.append((item, result['error']))
+                if done % 25 == 0 or done == len(keyed):
+                    self.stdout.write(
+                        f"  {done}/{len(keyed)} done, {len(failures)} failed "
+                        f"({time.monotonic() - started:.0f}s)"
+                    )
+        except KeyboardInterrupt:
+            # Finished items are already stored; the next run skips them
+            executor.shutdown(wait=True, cancel_futures=True)
+            raise CommandError(f"Interrupted after {done}/{len(keyed)} items; run again to resume")
+        executor.shutdown(wait=True)
+        return failures
@@ -0,0 +1,38 @@
+"""
+Apply the chat retention policy.
+
+    python manage.py purge_expired_chats              # AI_CHAT_RETENTION['MAX_AGE_DAYS']
+    python manage.py purge_expired_chats --days 365 --dry-run
+
+Meant for cron; deletes in short chunks, so it can run while serving traffic.
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from ai_generator.retention import expired_chats, purge_expired_chats, retention_cutoff
+
+
+class Command(BaseCommand):
+    help = 'Delete live and archived chats older than the retention period'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, help="Override AI_CHAT_RETENTION['MAX_AGE_DAYS']")
+        parser.add_argument('--batch-size', type=int, help="Override BACKGROUND_DELETION['BATCH_SIZE']")
+        parser.add_argument('--dry-run', action='store_true', help='Only count the chats to delete')
+
+    def handle(self, *args, **options):
+        if options['days'] is not None and options['days'] < 1:
+            raise CommandError('--days must be at least 1')
+        cutoff = retention_cutoff(options['days'])
+        if cutoff is None:
+            self.stdout.write("No retention period configured; nothing to do")
+            return
+
+        if options['dry_run']:
+            for queryset in expired_chats(cutoff):
+                self.stdout.write(f"{queryset.count()} {queryset.model._meta.label} rows would be deleted")
+            return
+
+        deleted = purge_expired_chats(cutoff, batch_size=options['batch_size'])
+        for label, count in deleted.items():
+            self.stdout.write(f"  {label}: {count}")
+        self.stdout.write(self.style.SUCCESS(f"Purged chats created before {cutoff.isoformat()}"))
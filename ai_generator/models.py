@@ -1,16 +1,132 @@
-from django.db import models
-from django.contrib.auth import get_user_model
-
-User = get_user_model()
-
-class AIChat(models.Model):
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='ai_chats')
-    message = models.TextField(help_text="User's message to AI")
-    ai_response = models.TextField(help_text="AI's response")
-    created_at = models.DateTimeField(auto_now_add=True)
-    
-    class Meta:
-        ordering = ['-created_at']
-        
-    def __str__(self):
-        return f"Chat for {self.user.email} at {self.created_at}"
\ No newline at end of file
+from django.db import models
+from django.contrib.auth import get_user_model
+
+from virtual_tutor.fields import CompressedTextField
+
+User = get_user_model()
+
+class ChatSession(models.Model):
+    """A multi-turn conversation; turns are the AIChat rows pointing at it"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='chat_sessions')
+    title = models.CharField(max_length=200, blank=True)
+    summary = models.TextField(blank=True, help_text="Rolling summary of the turns no longer sent verbatim")
+    # Highest AIChat id folded into the summary; later turns are sent verbatim
+    summarized_through = models.BigIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-updated_at', '-id']
+        indexes = [
+            models.Index(fields=['user', 'updated_at'], name='chatsession_user_updated_idx'),
+        ]
+
+    def __str__(self):
+        return f"Session {self.title or self.pk} for {self.user.email}"
+
+
+class AIChat(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='ai_chats')
+    session = models.ForeignKey(
+        ChatSession, on_delete=models.CASCADE, related_name='chats', null=True, blank=True
+    )
+    message = CompressedTextField(help_text="User's message to AI")
+    ai_response = CompressedTextField(help_text="AI's response")
+    created_at = models.DateTimeField(auto_now_add=True)
+    # False until the chat's ChatSearchTerm rows are written (see search.py)
+    search_indexed = models.BooleanField(default=False)
+    
+    class Meta:
+        ordering = ['-created_at', '-id']
+        indexes = [
+            # Serves per-user history in both directions and keyset pagination on (created_at, id)
+            models.Index(fields=['user', 'created_at', 'id'], name='aichat_user_created_idx'),
+            # Loads a session's unsummarized turns in id order
+            models.Index(fields=['session', 'id'], name='aichat_session_idx'),
+            # Finds chats still waiting to be added to the search index
+            models.Index(fields=['search_indexed', 'id'], name='aichat_search_pending_idx'),
+        ]
+        
+    def __str__(self):
+        return f"Chat for {self.user.email} at {self.created_at}"
+
+
+class ArchivedAIChat(models.Model):
+    """Cold-tier copy of an AIChat moved out by the archive_chats command; keeps the original id"""
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_ai_chats')
+    # Plain id: sessions may be deleted while their archived turns are kept
+    session_id = models.BigIntegerField(null=True, blank=True)
+    message = CompressedTextField(min_length=0)
+    ai_response = CompressedTextField(min_length=0)
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at', '-id']
+        indexes = [
+            models.Index(fields=['user', 'created_at', 'id'], name='archivedchat_user_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"Archived chat {self.pk} for {self.user.email} at {self.created_at}"
+
+
+class ChatSearchTerm(models.Model):
+    """Inverted index entry: ``term`` occurs ``count`` times in ``chat`` (see search.py)"""
+    chat = models.ForeignKey(AIChat, on_delete=models.CASCADE, related_name='search_terms')
+    # Denormalized from the chat so per-user searches never touch AIChat
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    term = models.CharField(max_length=64)
+    count = models.PositiveSmallIntegerField(default=1)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['chat', 'term'], name='chatsearchterm_chat_term_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'term', 'chat'], name='chatsearchterm_user_term_idx'),
+            models.Index(fields=['term', 'chat'], name='chatsearchterm_term_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.term} in chat {self.chat_id}"
+
+
+class ContentLibraryEntry(models.Model):
+    """Pre-generated task content, looked up by its response-cache key (see library.py)"""
+    TASK_CHOICES = [
+        ('explain_concept', 'Concept explanation'),
+        ('educational_content', 'Educational content'),
+    ]
+
+    key = models.CharField(max_length=128, unique=True)
+    task = models.CharField(max_length=50, choices=TASK_CHOICES)
+    subject = models.CharField(max_length=255)
+    level = models.CharField(max_length=100)
+    model_name = models.CharField(max_length=100)
+    prompt_version = models.PositiveIntegerField()
+    content = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['task', 'subject', 'level']
+        verbose_name_plural = 'content library entries'
+        indexes = [
+            models.Index(fields=['task', 'subject'], name='contentlibrary_task_subj_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.task}: {self.subject} ({self.level})"
+
+
+class AIResponseCache(models.Model):
+    """Database-backed storage for ai_generator.cache.DatabaseCacheBackend"""
+    key = models.CharField(max_length=128, unique=True)
+    value = models.TextField()
+    expires_at = models.DateTimeField(db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.key} (expires {self.expires_at})"
@@ -0,0 +1,220 @@
+"""
+AIChat persistence with an optional write-behind buffer.
+
+With AI_CHAT_WRITE_BEHIND['ENABLED'] the views hand finished chats to a
+bounded in-process queue instead of inserting them on the response path. A
+background thread writes them with ``bulk_create`` once BATCH_SIZE rows are
+waiting or FLUSH_INTERVAL seconds have passed since the first one, and
+drains the queue when the process exits.
+
+Buffered chats are returned unsaved (``id`` is None). Callers that need the
+id right away pass ``sync=True``. When the queue is full a submit waits up
+to PUT_TIMEOUT seconds and then falls back to a synchronous insert, so a
+stalled database slows requests down instead of growing the queue.
+"""
+import atexit
+import logging
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import close_old_connections, connection
+from django.utils import timezone
+
+from virtual_tutor.metrics import Gauge
+
+from .models import AIChat
+from .search import index_new_chats
+
+logger = logging.getLogger(__name__)
+
+
+class ChatWriteBuffer:
+    """Bounded queue of unsaved AIChat rows drained by one flusher thread"""
+
+    def __init__(self, max_queue=10000, batch_size=200, flush_interval=0.5, put_timeout=0.05,
+                 shutdown_timeout=10):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self.shutdown_timeout = shutdown_timeout
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+        self.written = 0
+        self.batches = 0
+        self.rejected = 0
+        self.failed = 0
+
+    def _ensure_started(self):
+        # Also restarts the flusher in a child process forked after it started
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name='aichat-write-behind', daemon=True
+                )
+                self._thread.start()
+
+    def submit(self, chat, block=True):
+        """Queue ``chat`` for writing; False if the queue stayed full"""
+        if self._stopping.is_set():
+            return False
+        self._ensure_started()
+        try:
+            self._queue.put(chat, block=block, timeout=self.put_timeout if block else None)
+        except queue.Full:
+            self.rejected += 1
+            return False
+        return True
+
+    def flush(self):
+        """Block until every queued chat has been written (or has failed)"""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.join()
+
+    def stop(self):
+        """Stop accepting chats and write out whatever is still queued"""
+        self._stopping.set()
+        if self._thread is not None and self._thread.is_alive():
+            self._thread.join(self.shutdown_timeout)
+        pending = self._queue.qsize()
+        if pending:
+            logger.error(f"AIChat write-behind stopped with {pending} unsaved chats")
+
+    def _run(self):
+        while not (self._stopping.is_set() and self._queue.empty()):
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+
+            batch = [first]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 and not self._stopping.is_set():
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=max(remaining, 0)))
+                except queue.Empty:
+                    break
+
+            try:
+                self._write(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+        close_old_connections()
+
+    def _write(self, batch):
+        close_old_connections()
+        try:
+            AIChat.objects.bulk_create(batch)
+            self.written += len(batch)
+            self.batches += 1
+        except Exception as e:
+            logger.error(f"Error writing {len(batch)} buffered chats, retrying one by one: {str(e)}")
+            connection.close()
+        else:
+            # Off the request path, so the search index is brought up to date here
+            index_new_chats(batch)
+            return
+
+        # One bad row (e.g. a user deleted meanwhile) must not lose the rest
+        for chat in batch:
+            try:
+                chat.save(force_insert=True)
+                self.written += 1
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"Error writing buffered chat for user {chat.user_id}: {str(e)}")
+
+    def stats(self):
+        return {
+            'enabled': True,
+            'queued': self._queue.qsize(),
+            'written': self.written,
+            'batches': self.batches,
+            'sync_fallbacks': self.rejected,
+            'failed': self.failed,
+        }
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_write_buffer():
+    """Return the process-wide buffer, or None when write-behind is disabled"""
+    global _buffer
+    config = getattr(settings, 'AI_CHAT_WRITE_BEHIND', {})
+    if not config.get('ENABLED', False):
+        return None
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                _buffer = ChatWriteBuffer(
+                    max_queue=config.get('MAX_QUEUE', 10000),
+                    batch_size=config.get('BATCH_SIZE', 200),
+                    flush_interval=config.get('FLUSH_INTERVAL', 0.5),
+                    put_timeout=config.get('PUT_TIMEOUT', 0.05),
+                    shutdown_timeout=config.get('SHUTDOWN_TIMEOUT', 10),
+                )
+    return _buffer
+
+
+def _new_chat(user, message, ai_response, session):
+    # Buffered rows are re-stamped on insert; this is what the response reports
+    return AIChat(
+        user=user, session=session, message=message, ai_response=ai_response, created_at=timezone.now()
+    )
+
+
+def persist_chat(user, message, ai_response, sync=False, session=None):
+    """Persist a chat, write-behind when enabled; returns the (possibly unsaved) AIChat"""
+    chat = _new_chat(user, message, ai_response, session)
+    buffer = get_write_buffer()
+    if buffer is None or sync or not buffer.submit(chat):
+        chat.save()
+    return chat
+
+
+async def apersist_chat(user, message, ai_response, sync=False, session=None):
+    """Async persist_chat; never blocks the event loop on a full queue"""
+    chat = _new_chat(user, message, ai_response, session)
+    buffer = get_write_buffer()
+    if buffer is None or sync or not buffer.submit(chat, block=False):
+        await chat.asave()
+    return chat
+
+
+def write_behind_stats():
+    buffer = get_write_buffer()
+    return buffer.stats() if buffer else {'enabled': False}
+
+
+QUEUED = Gauge(
+    'ai_chat_write_behind_queued', 'Chats waiting in the write-behind buffer.',
+    function=lambda: _buffer._queue.qsize() if _buffer is not None else 0,
+)
+
+
+@atexit.register
+def _flush_on_exit():
+    if _buffer is not None:
+        _buffer.stop()
+
+
+def _reset_buffer(*, setting, **kwargs):
+    global _buffer
+    if setting == 'AI_CHAT_WRITE_BEHIND' and _buffer is not None:
+        _buffer.stop()
+        _buffer = None
+
+
+setting_changed.connect(_reset_buffer)
@@ -0,0 +1,442 @@
+"""
+Resilience policy for upstream LLM calls.
+
+Every call gets a per-task deadline (AI_RESILIENCE['DEADLINES']); each
+attempt is given whatever time is left as its timeout. Transient failures
+(rate limits, 5xx, timeouts, connection errors) are retried with
+exponential backoff and full jitter while the deadline allows; anything
+else (bad request, auth, blocked prompt) fails immediately.
+
+A circuit breaker opens after FAILURE_THRESHOLD consecutive transient
+failures. While it is open calls fail fast with CircuitOpen instead of
+queueing behind an unhealthy upstream; after RESET_TIMEOUT seconds a
+trial call is let through and its outcome closes or re-opens the circuit.
+
+With HEDGE_DELAY set, a non-streaming attempt that has not answered after
+that many seconds gets a duplicate request, and whichever answers first
+wins. Streams are retried only until their first chunk arrives.
+
+Each attempt holds its own upstream slot (``slot``/``aslot``, see
+admission.py), taken before the attempt and released before any backoff,
+so a call sleeping between retries does not keep others from upstream.
+"""
+import asyncio
+import logging
+import math
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from contextlib import AsyncExitStack, ExitStack, nullcontext
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from google.api_core import exceptions as google_exceptions
+
+from virtual_tutor.metrics import Counter, Gauge
+
+from .admission import aupstream_slot, upstream_slot
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_ERRORS = (
+    google_exceptions.TooManyRequests,
+    google_exceptions.Aborted,
+    google_exceptions.InternalServerError,
+    google_exceptions.BadGateway,
+    google_exceptions.ServiceUnavailable,
+    google_exceptions.GatewayTimeout,
+    google_exceptions.Unknown,
+    ConnectionError,
+    TimeoutError,
+)
+
+
+def is_retryable(exc):
+    return isinstance(exc, RETRYABLE_ERRORS)
+
+
+def is_timeout(exc):
+    return isinstance(exc, (TimeoutError, google_exceptions.DeadlineExceeded))
+
+
+class CircuitOpen(Exception):
+    def __init__(self, retry_after):
+        super().__init__('AI service is temporarily unavailable. Please retry shortly.')
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Closed -> open after consecutive failures -> half-open trial -> closed or open"""
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0, half_open_max_calls=1):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self._lock = threading.Lock()
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_calls = 0
+        self.times_opened = 0
+        self.rejected = 0
+
+    def before_call(self):
+        """Raise CircuitOpen unless a call may go upstream now"""
+        with self._lock:
+            if self.state == self.OPEN:
+                remaining = self.opened_at + self.reset_timeout - time.monotonic()
+                if remaining > 0:
+                    self.rejected += 1
+                    raise CircuitOpen(max(1, math.ceil(remaining)))
+                self.state = self.HALF_OPEN
+                self._trial_calls = 0
+            if self.state == self.HALF_OPEN:
+                if self._trial_calls >= self.half_open_max_calls:
+                    self.rejected += 1
+                    raise CircuitOpen(1)
+                self._trial_calls += 1
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.times_opened += 1
+                    logger.error(f"Upstream circuit opened after {self.failures} consecutive failures")
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    def release_trial(self):
+        """Give back a half-open trial whose call ended without an outcome (e.g. was cancelled)"""
+        with self._lock:
+            if self.state == self.HALF_OPEN and self._trial_calls > 0:
+                self._trial_calls -= 1
+
+    def record(self, exc):
+        # Client errors mean the upstream answered, so they count as healthy
+        if exc is not None and is_retryable(exc):
+            self.record_failure()
+        else:
+            self.record_success()
+
+    def stats(self):
+        return {
+            'state': self.state,
+            'consecutive_failures': self.failures,
+            'times_opened': self.times_opened,
+            'rejected': self.rejected,
+        }
+
+
+class UpstreamPolicy:
+    """Deadlines, retries, circuit breaking and hedging around one upstream"""
+
+    def __init__(self, deadlines=None, max_attempts=3, base_delay=0.5, max_delay=8.0,
+                 hedge_delay=None, hedge_workers=16, breaker=None, slot=nullcontext, aslot=nullcontext):
+        self.deadlines = deadlines or {}
+        self.slot = slot
+        self.aslot = aslot
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.hedge_delay = hedge_delay
+        self.breaker = breaker or CircuitBreaker()
+        self._executor = (
+            ThreadPoolExecutor(max_workers=hedge_workers, thread_name_prefix='ai-hedge')
+            if hedge_delay else None
+        )
+        self.retries = 0
+        self.hedges = 0
+
+    def deadline_for(self, task):
+        return self.deadlines.get(task, self.deadlines.get('default', 30))
+
+    def backoff(self, attempt):
+        """Full-jitter exponential backoff before retry number ``attempt`` (1-based)"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+    def _retry_delay(self, task, attempt, exc, deadline):
+        """Seconds to wait before retrying, or None to give up and raise ``exc``"""
+        if not is_retryable(exc) or attempt >= self.max_attempts:
+            return None
+        delay = self.backoff(attempt)
+        if time.monotonic() + delay >= deadline:
+            return None
+        self.retries += 1
+        RETRIES.inc(task=task)
+        logger.warning(f"Retrying {task} after {type(exc).__name__} (attempt {attempt}): {str(exc)}")
+        return delay
+
+    @staticmethod
+    def _remaining(task, deadline):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError(f'Upstream deadline exceeded for {task}.')
+        return remaining
+
+    def call(self, task, fn):
+        """Return ``fn(timeout)`` under the task's deadline, retrying transient failures"""
+        deadline = time.monotonic() + self.deadline_for(task)
+        attempt = 0
+        while True:
+            with self.slot():
+                remaining = self._remaining(task, deadline)
+                self.breaker.before_call()
+                attempt += 1
+                try:
+                    result = self._attempt(fn, remaining)
+                except Exception as e:
+                    self.breaker.record(e)
+                    delay = self._retry_delay(task, attempt, e, deadline)
+                    if delay is None:
+                        raise
+                except BaseException:
+                    self.breaker.release_trial()
+                    raise
+                else:
+                    self.breaker.record_success()
+                    return result
+            time.sleep(delay)
+
+    def _attempt(self, fn, timeout):
+        if not self.hedge_delay or timeout <= self.hedge_delay:
+            return fn(timeout)
+
+        started = time.monotonic()
+        primary = self._executor.submit(fn, timeout)
+        try:
+            return primary.result(timeout=self.hedge_delay)
+        except FutureTimeoutError:
+            pass
+
+        self.hedges += 1
+        hedge = self._executor.submit(fn, timeout - self.hedge_delay)
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            done, pending = wait(
+                pending, timeout=max(0, timeout - (time.monotonic() - started)), return_when=FIRST_COMPLETED
+            )
+            if not done:
+                # The losing calls finish in the background and are discarded
+                raise TimeoutError('Upstream attempt timed out.')
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    async def acall(self, task, fn):
+        """Async ``call``; ``fn(timeout)`` returns an awaitable"""
+        deadline = time.monotonic() + self.deadline_for(task)
+        attempt = 0
+        while True:
+            async with self.aslot():
+                remaining = self._remaining(task, deadline)
+                self.breaker.before_call()
+                attempt += 1
+                try:
+                    result = await self._aattempt(fn, remaining)
+                except Exception as e:
+                    self.breaker.record(e)
+                    delay = self._retry_delay(task, attempt, e, deadline)
+                    if delay is None:
+                        raise
+                except BaseException:
+                    # Cancelled: no outcome, so a half-open trial must not stay taken
+                    self.breaker.release_trial()
+                    raise
+                else:
+                    self.breaker.record_success()
+                    return result
+            await asyncio.sleep(delay)
+
+    async def _aattempt(self, fn, timeout):
+        if not self.hedge_delay or timeout <= self.hedge_delay:
+            return await asyncio.wait_for(fn(timeout), timeout)
+
+        started = time.monotonic()
+        primary = asyncio.ensure_future(fn(timeout))
+        tasks = [primary]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=self.hedge_delay)
+            if done:
+                return primary.result()
+
+            self.hedges += 1
+            tasks.append(asyncio.ensure_future(fn(timeout - self.hedge_delay)))
+            pending = set(tasks)
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, timeout=max(0, timeout - (time.monotonic() - started)),
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    raise TimeoutError('Upstream attempt timed out.')
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def stream(self, task, open_stream):
+        """Yield from ``open_stream(timeout)``, retrying transient failures before the first chunk"""
+        deadline = time.monotonic() + self.deadline_for(task)
+        attempt = 0
+        while True:
+            # The slot of the attempt that succeeds is held until the stream ends
+            slot = ExitStack()
+            slot.enter_context(self.slot())
+            try:
+                remaining = self._remaining(task, deadline)
+                self.breaker.before_call()
+                attempt += 1
+                chunks = open_stream(remaining)
+            except BaseException:
+                slot.close()
+                raise
+            try:
+                first = next(chunks)
+            except StopIteration:
+                slot.close()
+                self.breaker.record_success()
+                return
+            except Exception as e:
+                slot.close()
+                self.breaker.record(e)
+                delay = self._retry_delay(task, attempt, e, deadline)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                continue
+            break
+
+        error = None
+        try:
+            yield first
+            yield from chunks
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            slot.close()
+            # A client disconnect (GeneratorExit) counts as a healthy call
+            self.breaker.record(error)
+
+    async def astream(self, task, open_stream):
+        deadline = time.monotonic() + self.deadline_for(task)
+        attempt = 0
+        while True:
+            slot = AsyncExitStack()
+            await slot.enter_async_context(self.aslot())
+            try:
+                remaining = self._remaining(task, deadline)
+                self.breaker.before_call()
+                attempt += 1
+                chunks = open_stream(remaining)
+            except BaseException:
+                await slot.aclose()
+                raise
+            try:
+                first = await asyncio.wait_for(chunks.__anext__(), remaining)
+            except StopAsyncIteration:
+                await slot.aclose()
+                self.breaker.record_success()
+                return
+            except Exception as e:
+                await chunks.aclose()
+                await slot.aclose()
+                self.breaker.record(e)
+                delay = self._retry_delay(task, attempt, e, deadline)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                continue
+            except BaseException:
+                # Cancelled (e.g. the client went away) before the first chunk
+                self.breaker.release_trial()
+                await chunks.aclose()
+                await slot.aclose()
+                raise
+            break
+
+        error = None
+        try:
+            yield first
+            async for chunk in chunks:
+                yield chunk
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            await slot.aclose()
+            self.breaker.record(error)
+
+    def stats(self):
+        return {
+            'retries': self.retries,
+            'hedges': self.hedges,
+            'circuit': self.breaker.stats(),
+        }
+
+
+_policy = None
+_policy_lock = threading.Lock()
+
+
+def get_upstream_policy():
+    """Return the process-wide policy built from AI_RESILIENCE"""
+    global _policy
+    if _policy is None:
+        with _policy_lock:
+            if _policy is None:
+                config = getattr(settings, 'AI_RESILIENCE', {})
+                retry = config.get('RETRY', {})
+                breaker = config.get('CIRCUIT_BREAKER', {})
+                _policy = UpstreamPolicy(
+                    deadlines=config.get('DEADLINES'),
+                    max_attempts=retry.get('MAX_ATTEMPTS', 3),
+                    base_delay=retry.get('BASE_DELAY', 0.5),
+                    max_delay=retry.get('MAX_DELAY', 8.0),
+                    hedge_delay=config.get('HEDGE_DELAY'),
+                    breaker=CircuitBreaker(
+                        failure_threshold=breaker.get('FAILURE_THRESHOLD', 5),
+                        reset_timeout=breaker.get('RESET_TIMEOUT', 30.0),
+                        half_open_max_calls=breaker.get('HALF_OPEN_MAX_CALLS', 1),
+                    ),
+                    slot=upstream_slot,
+                    aslot=aupstream_slot,
+                )
+    return _policy
+
+
+RETRIES = Counter('ai_upstream_retries_total', 'Upstream attempts retried after a transient failure.', ['task'])
+CIRCUIT_OPEN = Gauge(
+    'ai_upstream_circuit_open', 'Whether the upstream circuit breaker is open.',
+    multiprocess_mode='liveall',
+    function=lambda: _policy is not None and _policy.breaker.state == CircuitBreaker.OPEN,
+)
+
+
+def _reset_policy(*, setting, **kwargs):
+    global _policy
+    if setting == 'AI_RESILIENCE':
+        _policy = None
+
+
+setting_changed.connect(_reset_policy)
@@ -0,0 +1,40 @@
+"""
+Age-based retention for chat history.
+
+With AI_CHAT_RETENTION['MAX_AGE_DAYS'] set, python manage.py
+purge_expired_chats deletes live and archived chats older than that, in the
+same short chunks as account deletion (virtual_tutor.deletion). The search
+terms of each chunk of chats are deleted in chunks of their own first.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from virtual_tutor.deletion import delete_in_batches
+
+from .models import AIChat, ArchivedAIChat
+
+
+def retention_cutoff(max_age_days=None):
+    """Creation time before which chats are purged, or None when retention is off"""
+    if max_age_days is None:
+        max_age_days = getattr(settings, 'AI_CHAT_RETENTION', {}).get('MAX_AGE_DAYS')
+    if not max_age_days:
+        return None
+    return timezone.now() - timedelta(days=max_age_days)
+
+
+def expired_chats(cutoff):
+    return [
+        AIChat.objects.filter(created_at__lt=cutoff),
+        ArchivedAIChat.objects.filter(created_at__lt=cutoff),
+    ]
+
+
+def purge_expired_chats(cutoff, batch_size=None):
+    """Delete chats created before ``cutoff``; returns {model label: rows deleted}"""
+    return {
+        queryset.model._meta.label: delete_in_batches(queryset, batch_size=batch_size)
+        for queryset in expired_chats(cutoff)
+    }
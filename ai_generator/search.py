@@ -0,0 +1,300 @@
+"""
+Full-text search over chat history with a maintained inverted index.
+
+Every AIChat's message and response are tokenized into ChatSearchTerm rows
+(term, chat, user, count), so a search is a few indexed lookups on exact
+terms instead of ``LIKE '%term%'`` scans over two text columns, and works
+the same on every database backend.
+
+A chat matches when it contains every query term. Results are ranked by
+tf-idf: each term's count in the chat weighted by log(1 + N / df), where N and
+df are counted over the searched user's chats (or all chats in the admin);
+N is cached for a few minutes (see document_count).
+
+New chats are saved flagged ``search_indexed = False`` and indexed off the
+request path: the post_save receiver and the batch endpoints call
+schedule_indexing once the transaction commits, which wakes a per-process
+SearchIndexer thread that runs index_pending (or indexes right away when
+AI_CHAT_SEARCH['BACKGROUND'] is False). The write-behind flusher is off the
+request path already and calls index_new_chats itself. A chat whose
+indexing is lost to a restart stays flagged; ``python manage.py
+index_chat_search`` backfills those and existing rows.
+"""
+import atexit
+import logging
+import math
+import re
+import threading
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.db import close_old_connections, transaction
+from django.db.models import Case, Count, ExpressionWrapper, F, FloatField, Sum, Value, When
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .models import AIChat, ChatSearchTerm
+
+logger = logging.getLogger(__name__)
+
+WORD_RE = re.compile(r'\w+')
+MIN_TERM_LENGTH = 2
+MAX_TERM_LENGTH = 64
+MAX_TERMS_PER_CHAT = 1000
+MAX_QUERY_TERMS = 8
+INDEX_BATCH_SIZE = 500
+
+STOP_WORDS = frozenset(
+    'a an and are as at be but by can do does for from had has have how i if in into is it its me my '
+    'no not of on or our so than that the their them then there these they this to was we were what '
+    'when where which who why will with you your'.split()
+)
+
+
+def tokenize(text):
+    """Counter of index terms in ``text``: lower-cased words minus stop words"""
+    terms = Counter()
+    for word in WORD_RE.findall(text.lower()):
+        if MIN_TERM_LENGTH <= len(word) <= MAX_TERM_LENGTH and word not in STOP_WORDS:
+            terms[word] += 1
+    return terms
+
+
+def query_terms(query):
+    """Distinct terms of a search query, in order, at most MAX_QUERY_TERMS"""
+    return list(dict.fromkeys(tokenize(query)))[:MAX_QUERY_TERMS]
+
+
+def _chat_terms(chat):
+    counts = tokenize(f"{chat.message}\n{chat.ai_response}")
+    return [
+        ChatSearchTerm(chat_id=chat.pk, user_id=chat.user_id, term=term, count=min(count, 32767))
+        for term, count in counts.most_common(MAX_TERMS_PER_CHAT)
+    ]
+
+
+def index_chats(chats):
+    """(Re)build the index rows of saved ``chats``"""
+    chats = [chat for chat in chats if chat.pk is not None]
+    if not chats:
+        return
+    ids = [chat.pk for chat in chats]
+    terms = [term for chat in chats for term in _chat_terms(chat)]
+    with transaction.atomic():
+        ChatSearchTerm.objects.filter(chat_id__in=ids).delete()
+        # Concurrent indexers of the same chat produce the same rows
+        ChatSearchTerm.objects.bulk_create(terms, batch_size=1000, ignore_conflicts=True)
+        AIChat.objects.filter(id__in=ids).update(search_indexed=True)
+    for chat in chats:
+        chat.search_indexed = True
+
+
+def index_pending(batch_size=INDEX_BATCH_SIZE, max_batches=None):
+    """Index chats still flagged as unindexed, oldest first; returns how many were indexed"""
+    indexed = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        chats = list(
+            AIChat.objects.filter(search_indexed=False)
+            .order_by('id')
+            .only('id', 'user_id', 'message', 'ai_response')[:batch_size]
+        )
+        if not chats:
+            break
+        index_chats(chats)
+        indexed += len(chats)
+        batches += 1
+        if len(chats) < batch_size:
+            break
+    return indexed
+
+
+def index_new_chats(chats):
+    """Index chats just written with bulk_create, right away (for callers already off the request path)"""
+    try:
+        index_chats(chats)
+        if any(chat.pk is None for chat in chats):
+            # The backend did not return the new ids; find them by their flag
+            index_pending(max_batches=max(1, math.ceil(len(chats) / INDEX_BATCH_SIZE)))
+    except Exception as e:
+        # The chats are saved; index_pending picks them up later
+        logger.error(f"Error indexing {len(chats)} chats for search: {str(e)}")
+
+
+class SearchIndexer:
+    """Runs index_pending on a daemon thread each time it is scheduled"""
+
+    def __init__(self, batch_size=INDEX_BATCH_SIZE, shutdown_timeout=5):
+        self.batch_size = batch_size
+        self.shutdown_timeout = shutdown_timeout
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+        self.indexed = 0
+        self.failed = 0
+
+    def _ensure_started(self):
+        # Also restarts the indexer in a child process forked after it started
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='chat-search-indexer', daemon=True)
+                self._thread.start()
+
+    def schedule(self):
+        """Index pending chats soon; False once the indexer is stopping"""
+        if self._stopping.is_set():
+            return False
+        self._ensure_started()
+        self._wake.set()
+        return True
+
+    def stop(self):
+        # Chats left unindexed keep their flag for the next run or the command
+        self._stopping.set()
+        self._wake.set()
+        if self._thread is not None and self._thread.is_alive():
+            self._thread.join(self.shutdown_timeout)
+
+    def _run(self):
+        while not self._stopping.is_set():
+            self._wake.wait()
+            self._wake.clear()
+            if self._stopping.is_set():
+                break
+            close_old_connections()
+            try:
+                self.indexed += index_pending(self.batch_size)
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"Error indexing pending chats for search: {str(e)}")
+        close_old_connections()
+
+
+_indexer = None
+_indexer_lock = threading.Lock()
+
+
+def _config():
+    return getattr(settings, 'AI_CHAT_SEARCH', {})
+
+
+def get_search_indexer():
+    """Return the process-wide indexer, or None when chats are indexed inline"""
+    global _indexer
+    if not _config().get('BACKGROUND', True):
+        return None
+    if _indexer is None:
+        with _indexer_lock:
+            if _indexer is None:
+                _indexer = SearchIndexer(batch_size=_config().get('BATCH_SIZE', INDEX_BATCH_SIZE))
+    return _indexer
+
+
+def schedule_indexing():
+    """Index chats flagged search_indexed=False, in the background when enabled"""
+    indexer = get_search_indexer()
+    if indexer is not None and indexer.schedule():
+        return
+    try:
+        index_pending()
+    except Exception as e:
+        # The chats are saved; the next run or index_chat_search picks them up
+        logger.error(f"Error indexing pending chats for search: {str(e)}")
+
+
+@receiver(post_save, sender=AIChat)
+def _index_saved_chat(sender, instance, created=False, raw=False, update_fields=None, **kwargs):
+    if raw or (update_fields is not None and not {'message', 'ai_response'} & set(update_fields)):
+        return
+    if not created and instance.search_indexed:
+        # Edited text: flag the chat so the indexer re-tokenizes it
+        AIChat.objects.filter(pk=instance.pk).update(search_indexed=False)
+        instance.search_indexed = False
+    # Indexing in the request would put tokenizing and the term inserts on its path
+    transaction.on_commit(schedule_indexing)
+
+
+def _idf_weights(terms, scope, total):
+    df = dict(
+        scope.filter(term__in=terms).values('term').annotate(df=Count('id')).values_list('term', 'df')
+    )
+    return {term: math.log(1 + total / df[term]) for term in terms if df.get(term)}
+
+
+def document_count(user=None):
+    """Chats searched over (the user's, or all), cached for DOC_COUNT_TIMEOUT: idf needs no exact count"""
+    cache = caches[_config().get('CACHE_ALIAS', 'default')]
+    key = f"search:doc_count:{user.pk if user is not None else 'all'}"
+    total = cache.get(key)
+    if total is None:
+        chats = AIChat.objects.filter(user=user) if user is not None else AIChat.objects.all()
+        total = chats.count()
+        cache.set(key, total, _config().get('DOC_COUNT_TIMEOUT', 300))
+    return total
+
+
+def ranked_chat_ids(query, user=None, offset=0, limit=20):
+    """[(chat id, score)] of chats matching every term of ``query``, best first"""
+    terms = query_terms(query)
+    if not terms:
+        return []
+    scope = ChatSearchTerm.objects.all()
+    if user is not None:
+        scope = scope.filter(user=user)
+
+    weights = _idf_weights(terms, scope, max(1, document_count(user)))
+    if len(weights) < len(terms):
+        # Some term occurs nowhere, so no chat can contain them all
+        return []
+
+    score = Sum(Case(
+        *[
+            When(term=term, then=ExpressionWrapper(F('count') * Value(weight), output_field=FloatField()))
+            for term, weight in weights.items()
+        ],
+        output_field=FloatField(),
+    ))
+    rows = (
+        scope.filter(term__in=terms)
+        .values('chat_id')
+        .annotate(matched=Count('id'), score=score)
+        .filter(matched=len(terms))
+        .order_by('-score', '-chat_id')
+        .values_list('chat_id', 'score')[offset:offset + limit]
+    )
+    return list(rows)
+
+
+def matching_chat_ids(query):
+    """Subquery of ids of chats (of any user) containing every term of ``query``"""
+    terms = query_terms(query)
+    if not terms:
+        return AIChat.objects.none().values('id')
+    return (
+        ChatSearchTerm.objects.filter(term__in=terms)
+        .values('chat_id')
+        .annotate(matched=Count('id'))
+        .filter(matched=len(terms))
+        .values('chat_id')
+    )
+
+
+@atexit.register
+def _stop_on_exit():
+    if _indexer is not None:
+        _indexer.stop()
+
+
+def _reset_indexer(*, setting, **kwargs):
+    global _indexer
+    if setting == 'AI_CHAT_SEARCH' and _indexer is not None:
+        _indexer.stop()
+        _indexer = None
+
+
+setting_changed.connect(_reset_indexer)
@@ -1,20 +1,62 @@
-from rest_framework import serializers
-from .models import AIChat
-
-class AIChatSerializer(serializers.ModelSerializer):
-    class Meta:
-        model = AIChat
-        fields = ['id', 'message', 'ai_response', 'created_at']
-        read_only_fields = ['id', 'ai_response', 'created_at']
-
-class AIChatCreateSerializer(serializers.ModelSerializer):
-    class Meta:
-        model = AIChat
-        fields = ['message']
-        
-    def validate_message(self, value):
-        if not value.strip():
-            raise serializers.ValidationError("Message cannot be empty.")
-        if len(value) > 2000:
-            raise serializers.ValidationError("Message is too long. Maximum 2000 characters allowed.")
-        return value.strip()
\ No newline at end of file
+from rest_framework import serializers
+from .models import AIChat, ArchivedAIChat, ChatSession
+
+class AIChatSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = AIChat
+        fields = ['id', 'session', 'message', 'ai_response', 'created_at']
+        read_only_fields = ['id', 'session', 'ai_response', 'created_at']
+
+class ArchivedAIChatSerializer(serializers.ModelSerializer):
+    """Same shape as AIChatSerializer, plus archived=True"""
+    session = serializers.IntegerField(source='session_id', read_only=True, allow_null=True)
+    archived = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ArchivedAIChat
+        fields = ['id', 'session', 'message', 'ai_response', 'created_at', 'archived']
+        read_only_fields = fields
+
+    def get_archived(self, obj):
+        return True
+
+# Columns read by chat_rows()
+CHAT_VALUE_FIELDS = ['id', 'session_id', 'message', 'ai_response', 'created_at']
+
+def chat_rows(rows):
+    """
+    AIChatSerializer output for ``.values(*CHAT_VALUE_FIELDS)`` rows, without
+    model instances or per-field serializer calls (list endpoints)
+    Rows with an 'archived' key get it too, as ArchivedAIChatSerializer does.
+    Must stay in step with the serializers: the output renders to the same bytes
+    """
+    datetime = serializers.DateTimeField().to_representation
+    for row in rows:
+        data = {
+            'id': row['id'],
+            'session': row['session_id'],
+            'message': row['message'],
+            'ai_response': row['ai_response'],
+            'created_at': datetime(row['created_at']),
+        }
+        if 'archived' in row:
+            data['archived'] = row['archived']
+        yield data
+
+class AIChatCreateSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = AIChat
+        fields = ['message']
+        
+    def validate_message(self, value):
+        if not value.strip():
+            raise serializers.ValidationError("Message cannot be empty.")
+        if len(value) > 2000:
+            raise serializers.ValidationError("Message is too long. Maximum 2000 characters allowed.")
+        return value.strip()
+
+class ChatSessionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ChatSession
+        fields = ['id', 'title', 'summary', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'summary', 'created_at', 'updated_at']
@@ -1,69 +1,467 @@
-import google.generativeai as genai
-from django.conf import settings
-import logging
-
-logger = logging.getLogger(__name__)
-
-class GeminiService:
-    """Service for handling Google Gemini AI operations"""
-    
-    def __init__(self):
-        self.api_key = settings.GEMINI_API_KEY
-        if self.api_key:
-            genai.configure(api_key=self.api_key)
-            self.model = genai.GenerativeModel('gemini-1.5-flash')
-        else:
-            self.model = None
-    
-    def is_configured(self):
-        """Check if Gemini is properly configured"""
-        return self.model is not None and self.api_key
-    
-    def generate_response(self, message, context="You are a helpful AI tutor assistant. Give answers in a friendly and educational manner. 100 words only"):
-        """Generate response using Gemini AI"""
-        if not self.is_configured():
-            return {
-                'success': False,
-                'error': 'Gemini AI is not properly configured. Please check your API key.'
-            }
-        
-        try:
-            # Prepare the prompt with context
-            prompt = f"{context}\n\nUser: {message}\nAI:"
-            
-            response = self.model.generate_content(prompt)
-            
-            if response.text:
-                return {
-                    'success': True,
-                    'response': response.text.strip()
-                }     
-            else:
-                return {
-                    'success': False,
-                    'error': 'No response generated'
-                }
-                
-        except Exception as e:
-            logger.error(f"Error generating Gemini response: {str(e)}")
-            return {
-                'success': False,
-                'error': str(e)
-            }
-    
-    def generate_educational_content(self, topic, grade_level="general"):
-        """Generate educational content for a specific topic"""
-        context = f"""You are an expert educational AI tutor. Create engaging and educational content about the given topic. 
-        Tailor the content for {grade_level} level understanding. 
-        Make it informative, clear, and engaging."""
-        
-        prompt = f"Create educational content about: {topic}"
-        return self.generate_response(prompt, context)
-    
-    def explain_concept(self, concept, difficulty="intermediate"):
-        """Explain a concept in simple terms"""
-        context = f"""You are a patient AI tutor. Explain concepts clearly and simply at a {difficulty} level. 
-        Use examples and analogies when helpful. Break down complex ideas into understandable parts."""
-        
-        prompt = f"Please explain this concept: {concept}"
-        return self.generate_response(prompt, context)
\ No newline at end of file
+from django.conf import settings
+from django.db import connections
+import asyncio
+import functools
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from virtual_tutor.profiling import span
+
+from .admission import UpstreamBusy
+from .backends import get_backend
+from .resilience import CircuitOpen, get_upstream_policy, is_timeout
+from .cache import get_response_cache, make_cache_key
+from .coalescing import get_single_flight, make_flight_key
+from . import library
+from .instrumentation import (
+    ainstrument_stream, instrument_stream, observe_prompt, observe_response, track_upstream
+)
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever the task prompts below change so cached responses are invalidated
+PROMPT_TEMPLATE_VERSION = 1
+
+DEFAULT_CONTEXT = "You are a helpful AI tutor assistant. Give answers in a friendly and educational manner. 100 words only"
+
+SUMMARY_CONTEXT = (
+    "You keep a running summary of a tutoring conversation. Merge the new turns into the "
+    "existing summary, keeping the student's goals, what has been explained and any open "
+    "questions. Reply with the updated summary only, {max_words} words at most."
+)
+
+
+def closing_connections(fn):
+    """Wrap ``fn`` for a worker thread, closing the thread's DB connections after every call"""
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            # Worker threads must not leak their own DB connections
+            connections.close_all()
+    return wrapper
+
+
+class GeminiService:
+    """Service for handling Google Gemini AI operations"""
+
+    def __init__(self, model_name=None, backend=None):
+        self._model_name = model_name
+        self._backend = backend
+
+    @property
+    def backend(self):
+        return self._backend or get_backend()
+
+    @property
+    def model_name(self):
+        return self._model_name or self.backend.default_model_name()
+
+    def is_configured(self):
+        """Check if Gemini is properly configured"""
+        return self.backend.is_configured()
+
+    def generate_response(self, message, context=DEFAULT_CONTEXT, task='chat'):
+        """Generate response using Gemini AI.
+
+        Identical prompts already in flight are coalesced into one upstream
+        call; results handed to waiting callers carry ``coalesced: True``.
+        ``task`` selects the deadline from AI_RESILIENCE['DEADLINES'].
+        """
+        single_flight = get_single_flight()
+        if single_flight is None:
+            return self._generate_response(message, context, task)
+
+        key = make_flight_key(self.model_name, context, message)
+        try:
+            result, shared = single_flight.do(key, lambda: self._generate_response(message, context, task))
+        except TimeoutError as e:
+            return {
+                'success': False,
+                'error': str(e)
+            }
+        return dict(result, coalesced=True) if shared else result
+
+    def _generate_response(self, message, context, task='chat'):
+        backend = self.backend
+        if not backend.is_configured():
+            return {
+                'success': False,
+                'error': 'Gemini AI is not properly configured. Please check your API key.'
+            }
+
+        try:
+            # Prepare the prompt with context
+            prompt = f"{context}\n\nUser: {message}\nAI:"
+
+            observe_prompt(task, prompt)
+
+            def attempt(timeout):
+                with track_upstream(task):
+                    return backend.generate(self.model_name, prompt, timeout=timeout)
+
+            # The policy takes an upstream slot per attempt, not across its backoffs
+            with span('upstream'):
+                text = get_upstream_policy().call(task, attempt)
+
+            if text:
+                observe_response(task, text)
+                return {
+                    'success': True,
+                    'response': text.strip()
+                }
+            else:
+                return {
+                    'success': False,
+                    'error': 'No response generated'
+                }
+
+        except (UpstreamBusy, CircuitOpen) as e:
+            return {
+                'success': False,
+                'error': str(e),
+                'overloaded': True,
+                'retry_after': e.retry_after
+            }
+        except Exception as e:
+            logger.error(f"Error generating Gemini response: {str(e)}")
+            result = {
+                'success': False,
+                'error': str(e)
+            }
+            if is_timeout(e):
+                result['timed_out'] = True
+            return result
+
+    def stream_response(self, message, context=DEFAULT_CONTEXT, task='chat'):
+        """Yield response text chunks as Gemini generates them.
+
+        Errors are raised to the caller, which owns the open stream and
+        decides how to report them to the client.
+        """
+        backend = self.backend
+        if not backend.is_configured():
+            raise RuntimeError('Gemini AI is not properly configured. Please check your API key.')
+
+        prompt = f"{context}\n\nUser: {message}\nAI:"
+        observe_prompt(task, prompt)
+        # The policy holds an upstream slot until the stream finishes or the client goes away
+        yield from get_upstream_policy().stream(
+            task, lambda timeout: instrument_stream(
+                task, backend.stream(self.model_name, prompt, timeout=timeout)
+            )
+        )
+
+    async def agenerate_response(self, message, context=DEFAULT_CONTEXT, task='chat'):
+        """Async variant of generate_response for ASGI views"""
+        single_flight = get_single_flight()
+        if single_flight is None:
+            return await self._agenerate_response(message, context, task)
+
+        key = make_flight_key(self.model_name, context, message)
+        try:
+            result, shared = await single_flight.ado(key, lambda: self._agenerate_response(message, context, task))
+        except TimeoutError as e:
+            return {
+                'success': False,
+                'error': str(e)
+            }
+        return dict(result, coalesced=True) if shared else result
+
+    async def _agenerate_response(self, message, context, task='chat'):
+        backend = self.backend
+        if not backend.is_configured():
+            return {
+                'success': False,
+                'error': 'Gemini AI is not properly configured. Please check your API key.'
+            }
+
+        try:
+            prompt = f"{context}\n\nUser: {message}\nAI:"
+
+            observe_prompt(task, prompt)
+
+            async def attempt(timeout):
+                with track_upstream(task):
+                    return await backend.agenerate(self.model_name, prompt, timeout=timeout)
+
+            with span('upstream'):
+                text = await get_upstream_policy().acall(task, attempt)
+
+            if text:
+                observe_response(task, text)
+                return {
+                    'success': True,
+                    'response': text.strip()
+                }
+            else:
+                return {
+                    'success': False,
+                    'error': 'No response generated'
+                }
+
+        except (UpstreamBusy, CircuitOpen) as e:
+            return {
+                'success': False,
+                'error': str(e),
+                'overloaded': True,
+                'retry_after': e.retry_after
+            }
+        except Exception as e:
+            logger.error(f"Error generating Gemini response: {str(e)}")
+            result = {
+                'success': False,
+                'error': str(e)
+            }
+            if is_timeout(e):
+                result['timed_out'] = True
+            return result
+
+    async def astream_response(self, message, context=DEFAULT_CONTEXT, task='chat'):
+        """Async variant of stream_response"""
+        backend = self.backend
+        if not backend.is_configured():
+            raise RuntimeError('Gemini AI is not properly configured. Please check your API key.')
+
+        prompt = f"{context}\n\nUser: {message}\nAI:"
+        observe_prompt(task, prompt)
+        chunks = get_upstream_policy().astream(
+            task, lambda timeout: ainstrument_stream(
+                task, backend.astream(self.model_name, prompt, timeout=timeout)
+            )
+        )
+        async for chunk in chunks:
+            yield chunk
+
+    def _summary_prompt(self, summary, transcript, max_words):
+        message = f"Existing summary: {summary or '(none)'}\n\nNew turns:\n{transcript}"
+        return message, SUMMARY_CONTEXT.format(max_words=max_words)
+
+    def summarize_conversation(self, summary, transcript, max_words=150):
+        """Fold a transcript of older turns into a conversation summary"""
+        message, context = self._summary_prompt(summary, transcript, max_words)
+        return self._generate_response(message, context, task='summary')
+
+    async def asummarize_conversation(self, summary, transcript, max_words=150):
+        message, context = self._summary_prompt(summary, transcript, max_words)
+        return await self._agenerate_response(message, context, task='summary')
+
+    def count_tokens(self, text):
+        """Count tokens for ``text`` with the active backend"""
+        return self.backend.count_tokens(self.model_name, text)
+
+    def _cached_generate(self, task, subject, level, message, context, use_cache):
+        """Serve a task response from the response cache or the content library, generating it on a miss"""
+        cache = get_response_cache()
+        if not use_cache:
+            return self.generate_response(message, context, task)
+
+        key = self.content_key(task, subject, level)
+        cached = cache.get(key)
+        if cached is None:
+            cached = library.lookup(key)
+            if cached is not None:
+                cache.set(task, key, cached)
+        if cached is not None:
+            return {
+                'success': True,
+                'response': cached,
+                'cached': True
+            }
+
+        result = self.generate_response(message, context, task)
+        if result['success'] and not result.get('coalesced'):
+            cache.set(task, key, result['response'])
+        return result
+
+    def _cached_stream(self, task, subject, level, message, context, use_cache):
+        """Streaming counterpart of _cached_generate; only complete responses are cached"""
+        cache = get_response_cache()
+        if not use_cache:
+            yield from self.stream_response(message, context, task)
+            return
+
+        key = self.content_key(task, subject, level)
+        cached = cache.get(key)
+        if cached is None:
+            cached = library.lookup(key)
+            if cached is not None:
+                cache.set(task, key, cached)
+        if cached is not None:
+            yield cached
+            return
+
+        chunks = []
+        for chunk in self.stream_response(message, context, task):
+            chunks.append(chunk)
+            yield chunk
+        text = ''.join(chunks).strip()
+        if text:
+            cache.set(task, key, text)
+
+    async def _acached_generate(self, task, subject, level, message, context, use_cache):
+        cache = get_response_cache()
+        if not use_cache:
+            return await self.agenerate_response(message, context, task)
+
+        key = self.content_key(task, subject, level)
+        cached = await cache.aget(key)
+        if cached is None:
+            cached = await library.alookup(key)
+            if cached is not None:
+                await cache.aset(task, key, cached)
+        if cached is not None:
+            return {
+                'success': True,
+                'response': cached,
+                'cached': True
+            }
+
+        result = await self.agenerate_response(message, context, task)
+        if result['success'] and not result.get('coalesced'):
+            await cache.aset(task, key, result['response'])
+        return result
+
+    async def _acached_stream(self, task, subject, level, message, context, use_cache):
+        cache = get_response_cache()
+        if not use_cache:
+            async for chunk in self.astream_response(message, context, task):
+                yield chunk
+            return
+
+        key = self.content_key(task, subject, level)
+        cached = await cache.aget(key)
+        if cached is None:
+            cached = await library.alookup(key)
+            if cached is not None:
+                await cache.aset(task, key, cached)
+        if cached is not None:
+            yield cached
+            return
+
+        chunks = []
+        async for chunk in self.astream_response(message, context, task):
+            chunks.append(chunk)
+            yield chunk
+        text = ''.join(chunks).strip()
+        if text:
+            await cache.aset(task, key, text)
+
+    def _educational_content_prompt(self, topic, grade_level):
+        context = f"""You are an expert educational AI tutor. Create engaging and educational content about the given topic. 
+        Tailor the content for {grade_level} level understanding. 
+        Make it informative, clear, and engaging."""
+
+        prompt = f"Create educational content about: {topic}"
+        return prompt, context
+
+    def _explain_concept_prompt(self, concept, difficulty):
+        context = f"""You are a patient AI tutor. Explain concepts clearly and simply at a {difficulty} level. 
+        Use examples and analogies when helpful. Break down complex ideas into understandable parts."""
+
+        prompt = f"Please explain this concept: {concept}"
+        return prompt, context
+
+    def task_prompt(self, task, subject, level):
+        """(prompt, context) for a content-library task"""
+        builders = {
+            'explain_concept': self._explain_concept_prompt,
+            'educational_content': self._educational_content_prompt,
+        }
+        return builders[task](subject, level)
+
+    def content_key(self, task, subject, level):
+        """Key of a task response in both the response cache and the content library"""
+        return make_cache_key(task, subject, level, self.model_name, PROMPT_TEMPLATE_VERSION)
+
+    def generate_educational_content(self, topic, grade_level="general", use_cache=True):
+        """Generate educational content for a specific topic"""
+        prompt, context = self._educational_content_prompt(topic, grade_level)
+        return self._cached_generate('educational_content', topic, grade_level, prompt, context, use_cache)
+
+    def explain_concept(self, concept, difficulty="intermediate", use_cache=True):
+        """Explain a concept in simple terms"""
+        prompt, context = self._explain_concept_prompt(concept, difficulty)
+        return self._cached_generate('explain_concept', concept, difficulty, prompt, context, use_cache)
+
+    def stream_explain_concept(self, concept, difficulty="intermediate", use_cache=True):
+        """Stream a concept explanation chunk by chunk"""
+        prompt, context = self._explain_concept_prompt(concept, difficulty)
+        return self._cached_stream('explain_concept', concept, difficulty, prompt, context, use_cache)
+
+    async def agenerate_educational_content(self, topic, grade_level="general", use_cache=True):
+        prompt, context = self._educational_content_prompt(topic, grade_level)
+        return await self._acached_generate('educational_content', topic, grade_level, prompt, context, use_cache)
+
+    async def aexplain_concept(self, concept, difficulty="intermediate", use_cache=True):
+        prompt, context = self._explain_concept_prompt(concept, difficulty)
+        return await self._acached_generate('explain_concept', concept, difficulty, prompt, context, use_cache)
+
+    def _batch_method(self, task, is_async=False):
+        methods = {
+            'explain_concept': (self.explain_concept, self.aexplain_concept),
+            'educational_content': (self.generate_educational_content, self.agenerate_educational_content),
+        }
+        return methods[task][1 if is_async else 0]
+
+    def generate_batch(self, task, items, use_cache=True):
+        """Run a task for many (subject, level) pairs with bounded concurrency.
+
+        Results are returned in input order; a failing item never fails the batch.
+        """
+        method = self._batch_method(task)
+
+        @closing_connections
+        def run(item):
+            subject, level = item
+            try:
+                return method(subject, level, use_cache=use_cache)
+            except Exception as e:
+                logger.error(f"Error in batch {task} item: {str(e)}")
+                return {
+                    'success': False,
+                    'error': str(e)
+                }
+
+        max_workers = max(1, min(settings.AI_BATCH_CONCURRENCY, len(items)))
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='ai-batch') as executor:
+            return list(executor.map(run, items))
+
+    async def agenerate_batch(self, task, items, use_cache=True):
+        """Async variant of generate_batch bounded by a semaphore"""
+        method = self._batch_method(task, is_async=True)
+        semaphore = asyncio.Semaphore(settings.AI_BATCH_CONCURRENCY)
+
+        async def run(item):
+            subject, level = item
+            async with semaphore:
+                try:
+                    return await method(subject, level, use_cache=use_cache)
+                except Exception as e:
+                    logger.error(f"Error in batch {task} item: {str(e)}")
+                    return {
+                        'success': False,
+                        'error': str(e)
+                    }
+
+        return await asyncio.gather(*(run(item) for item in items))
+
+    def astream_explain_concept(self, concept, difficulty="intermediate", use_cache=True):
+        prompt, context = self._explain_concept_prompt(concept, difficulty)
+        return self._acached_stream('explain_concept', concept, difficulty, prompt, context, use_cache)
+
+
+_default_service = None
+_default_service_lock = threading.Lock()
+
+
+def get_gemini_service():
+    """Return the process-wide GeminiService used by the views"""
+    global _default_service
+    if _default_service is None:
+        with _default_service_lock:
+            if _default_service is None:
+                _default_service = GeminiService()
+    return _default_service
@@ -0,0 +1,81 @@
+"""
+Server-sent events helpers for streaming AI responses to the client.
+
+Each generated chunk is sent as a ``token`` event. Once the upstream stream
+is exhausted ``on_complete`` runs (e.g. to persist the AIChat row) and its
+return value is sent as the final ``done`` event. If the client disconnects
+first the stream is closed and ``on_complete`` never runs.
+
+Async chunk iterators (ASGI) take a coroutine ``on_complete``.
+"""
+import asyncio
+import json
+import logging
+
+from django.http import StreamingHttpResponse
+from rest_framework.utils.encoders import JSONEncoder
+
+logger = logging.getLogger(__name__)
+
+
+def format_sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, cls=JSONEncoder)}\n\n"
+
+
+def _events(chunks, on_complete, error_message):
+    parts = []
+    try:
+        for chunk in chunks:
+            parts.append(chunk)
+            yield format_sse('token', {'text': chunk})
+
+        text = ''.join(parts).strip()
+        if not text:
+            yield format_sse('error', {'error': 'AI service error: No response generated'})
+            return
+        yield format_sse('done', on_complete(text))
+    except GeneratorExit:
+        logger.info("Client disconnected from AI stream after %d chunks", len(parts))
+        raise
+    except Exception as e:
+        logger.error(f"Error streaming AI response: {str(e)}")
+        yield format_sse('error', {'error': error_message})
+    finally:
+        close = getattr(chunks, 'close', None)
+        if close is not None:
+            close()
+
+
+async def _aevents(chunks, on_complete, error_message):
+    parts = []
+    try:
+        async for chunk in chunks:
+            parts.append(chunk)
+            yield format_sse('token', {'text': chunk})
+
+        text = ''.join(parts).strip()
+        if not text:
+            yield format_sse('error', {'error': 'AI service error: No response generated'})
+            return
+        yield format_sse('done', await on_complete(text))
+    except (GeneratorExit, asyncio.CancelledError):
+        logger.info("Client disconnected from AI stream after %d chunks", len(parts))
+        raise
+    except Exception as e:
+        logger.error(f"Error streaming AI response: {str(e)}")
+        yield format_sse('error', {'error': error_message})
+    finally:
+        await chunks.aclose()
+
+
+def event_stream_response(chunks, on_complete, error_message='Failed to generate AI response.'):
+    """Wrap an iterator of text chunks in a ``text/event-stream`` response"""
+    if hasattr(chunks, '__aiter__'):
+        events = _aevents(chunks, on_complete, error_message)
+    else:
+        events = _events(chunks, on_complete, error_message)
+    response = StreamingHttpResponse(events, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream, which would defeat time-to-first-token
+    response['X-Accel-Buffering'] = 'no'
+    return response
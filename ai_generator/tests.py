@@ -1,3 +1,293 @@
-from django.test import TestCase
-
-# Create your tests here.
+import asyncio
+from contextlib import contextmanager
+from unittest import mock
+
+from django.contrib.admin.sites import site
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.db import IntegrityError
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from virtual_tutor.fields import CompressedTextField
+from virtual_tutor.pagination import encode_cursor
+
+from .admission import AnonTokenBucketThrottle, UpstreamLimiter
+from .archive import archive_batch
+from .cache import (
+    DatabaseCacheBackend,
+    DjangoCacheBackend,
+    LocalLRUCacheBackend,
+    get_response_cache,
+)
+from .conversation import compact_session
+from .models import AIChat, ArchivedAIChat, ChatSearchTerm, ChatSession
+from .resilience import CircuitBreaker, UpstreamPolicy
+from .search import ranked_chat_ids
+
+
+class ResponseCacheBackendTests(TestCase):
+    def test_every_backend_builds_from_default_options(self):
+        for backend_class in (LocalLRUCacheBackend, DjangoCacheBackend, DatabaseCacheBackend):
+            path = f'{backend_class.__module__}.{backend_class.__name__}'
+            config = {
+                'ENABLED': True,
+                'BACKEND': path,
+                'OPTIONS': {'max_entries': 10},
+                'TIMEOUTS': {},
+            }
+            with self.subTest(backend=path), override_settings(AI_RESPONSE_CACHE=config):
+                cache = get_response_cache()
+                self.assertIsInstance(cache.backend, backend_class)
+                cache.backend.set('key', 'value', 60)
+                self.assertEqual(cache.backend.get('key'), 'value')
+
+
+class DatabaseCacheCullTests(TestCase):
+    def test_cull_runs_on_a_fraction_of_writes(self):
+        backend = DatabaseCacheBackend(max_entries=2, cull_frequency=100)
+        with mock.patch.object(backend, '_cull') as cull, \
+                mock.patch('ai_generator.cache.random.random', side_effect=[0.5, 0.001]):
+            backend.set('a', 'value', 60)
+            self.assertFalse(cull.called)
+            backend.set('b', 'value', 60)
+            self.assertTrue(cull.called)
+
+    def test_cull_bounds_the_table(self):
+        backend = DatabaseCacheBackend(max_entries=2, cull_frequency=1)
+        for key in 'abcde':
+            backend.set(key, 'value', 60)
+        self.assertLessEqual(backend.model.objects.count(), 2)
+
+
+class ArchiveTests(TestCase):
+    def test_id_collision_keeps_the_chat(self):
+        user = get_user_model().objects.create_user(username='a@x.com', email='a@x.com', password='x')
+        chat = AIChat.objects.create(user=user, message='new', ai_response='answer')
+        ArchivedAIChat.objects.create(
+            id=chat.pk, user=user, message='old', ai_response='answer', created_at=timezone.now(),
+        )
+        with self.assertRaises(IntegrityError):
+            archive_batch(timezone.now(), 10)
+        self.assertTrue(AIChat.objects.filter(pk=chat.pk).exists())
+        self.assertEqual(ArchivedAIChat.objects.get(pk=chat.pk).message, 'old')
+
+
+class AdminChangelistTests(TestCase):
+    def test_changelists_decompress_only_the_previewed_text(self):
+        admin_user = get_user_model().objects.create_superuser(username='su@x.com', email='su@x.com', password='x')
+        for i in range(3):
+            AIChat.objects.create(user=admin_user, message=f'question {i}', ai_response='answer ' * 50)
+            ArchivedAIChat.objects.create(
+                id=100 + i, user=admin_user, message='old', ai_response='answer', created_at=timezone.now(),
+            )
+        self.client.force_login(admin_user)
+
+        decompress = mock.Mock(side_effect=CompressedTextField.decompress)
+        with mock.patch.object(CompressedTextField, 'decompress', decompress):
+            self.assertEqual(self.client.get('/admin/ai_generator/aichat/').status_code, 200)
+            self.assertEqual(decompress.call_count, 3)
+            self.assertEqual(self.client.get('/admin/ai_generator/archivedaichat/').status_code, 200)
+            self.assertEqual(decompress.call_count, 3)
+
+
+class ChatHistoryCursorTests(TestCase):
+    def test_malformed_cursor_is_rejected(self):
+        client = APIClient()
+        client.force_authenticate(get_user_model().objects.create_user(username='c@x.com', email='c@x.com', password='x'))
+        for values in ([1, 2], [[1], 2], ['2026-01-01T00:00:00+00:00', 'x'], [{}, None]):
+            with self.subTest(cursor=values):
+                response = client.get('/api/ai/chat/list/', {'cursor': encode_cursor(*values)})
+                self.assertEqual(response.status_code, 400)
+
+
+class UpstreamPolicySlotTests(TestCase):
+    def test_slot_is_released_during_backoff(self):
+        held = []
+
+        @contextmanager
+        def slot():
+            held.append(True)
+            try:
+                yield
+            finally:
+                held.pop()
+
+        calls = []
+
+        def fn(timeout):
+            calls.append(len(held))
+            if len(calls) == 1:
+                raise ConnectionError('reset')
+            return 'ok'
+
+        sleeps = []
+        policy = UpstreamPolicy(deadlines={'default': 30}, base_delay=0.01, slot=slot)
+        with mock.patch('ai_generator.resilience.time.sleep', side_effect=lambda delay: sleeps.append(len(held))):
+            self.assertEqual(policy.call('chat', fn), 'ok')
+        self.assertEqual(calls, [1, 1])
+        self.assertEqual(sleeps, [0])
+
+    def test_cancelled_stream_releases_slot(self):
+        limiter = UpstreamLimiter(max_concurrency=2, max_queue=0, queue_timeout=0.1, retry_after=1)
+        policy = UpstreamPolicy(deadlines={'default': 30}, slot=limiter.slot, aslot=limiter.aslot)
+
+        async def never(timeout):
+            await asyncio.sleep(30)
+            yield 'late'
+
+        async def consume():
+            return [chunk async for chunk in policy.astream('chat', never)]
+
+        async def cancel_stream():
+            task = asyncio.ensure_future(consume())
+            await asyncio.sleep(0.01)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+            # Checked before asyncio.run finalizes leftover generators
+            return limiter.stats()['active']
+
+        self.assertEqual(asyncio.run(cancel_stream()), 0)
+
+
+class CircuitBreakerCancellationTests(TestCase):
+    def _half_open_policy(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+        breaker.record_failure()
+        return UpstreamPolicy(deadlines={'default': 30}, breaker=breaker)
+
+    def _cancel(self, coroutine_factory):
+        async def run():
+            task = asyncio.ensure_future(coroutine_factory())
+            await asyncio.sleep(0.01)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+        asyncio.run(run())
+
+    def test_cancelled_half_open_call_gives_back_the_trial(self):
+        policy = self._half_open_policy()
+
+        async def hang(timeout):
+            await asyncio.sleep(30)
+
+        self._cancel(lambda: policy.acall('chat', hang))
+        policy.breaker.before_call()
+
+    def test_cancelled_half_open_stream_gives_back_the_trial(self):
+        policy = self._half_open_policy()
+
+        async def hang(timeout):
+            await asyncio.sleep(30)
+            yield 'late'
+
+        async def consume():
+            return [chunk async for chunk in policy.astream('chat', hang)]
+
+        self._cancel(consume)
+        policy.breaker.before_call()
+
+
+@override_settings(AI_ADMISSION={
+    'RATE_LIMITS': {'user': {'burst': 3, 'rate': 0.1}, 'anon': None, 'ip': None},
+    'CACHE_ALIAS': 'default',
+    'MAX_UPSTREAM_CONCURRENCY': None,
+})
+class BatchThrottleTests(TestCase):
+    def test_batch_larger_than_burst_is_rejected(self):
+        client = APIClient()
+        client.force_authenticate(get_user_model().objects.create_user(username='b@x.com', email='b@x.com', password='x'))
+        items = [{'concept': f'concept {i}'} for i in range(4)]
+        response = client.post('/api/ai/explain/batch/', {'items': items}, format='json')
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('split the batch', response.json()['detail'])
+
+
+@override_settings(AI_ADMISSION={
+    'RATE_LIMITS': {'user': None, 'anon': {'burst': 1, 'rate': 0.01}, 'ip': None},
+    'CACHE_ALIAS': 'default',
+    'MAX_UPSTREAM_CONCURRENCY': None,
+})
+class AnonThrottleTests(TestCase):
+    def test_forwarded_for_does_not_pick_a_new_bucket(self):
+        factory = APIRequestFactory()
+        allowed = []
+        for i in range(2):
+            request = Request(factory.get('/', REMOTE_ADDR='10.9.8.7', HTTP_X_FORWARDED_FOR=f'192.0.2.{i}'))
+            request.user = AnonymousUser()
+            allowed.append(AnonTokenBucketThrottle().allow_request(request, None))
+        self.assertEqual(allowed, [True, False])
+
+
+class FakeSummarizer:
+    def __init__(self):
+        self.transcripts = []
+
+    def summarize_conversation(self, summary, transcript, max_words):
+        self.transcripts.append(transcript)
+        return {'success': True, 'response': f'summary {len(self.transcripts)}'}
+
+
+@override_settings(AI_CONVERSATION={'HISTORY_TOKEN_BUDGET': 10000, 'COMPACT_TO': 0.5, 'MAX_HISTORY_TURNS': 3})
+class CompactSessionTests(TestCase):
+    def test_turns_beyond_the_window_are_folded_oldest_first(self):
+        user = get_user_model().objects.create_user(username='k@x.com', email='k@x.com', password='x')
+        session = ChatSession.objects.create(user=user)
+        chats = [
+            AIChat.objects.create(user=user, session=session, message=f'question {i}', ai_response='answer')
+            for i in range(5)
+        ]
+        service = FakeSummarizer()
+        self.assertTrue(compact_session(session, service))
+        self.assertIn('question 0', service.transcripts[0])
+        self.assertIn('question 1', service.transcripts[0])
+        self.assertNotIn('question 2', service.transcripts[0])
+        self.assertEqual(session.summarized_through, chats[1].pk)
+        self.assertFalse(compact_session(session, service))
+
+
+@override_settings(AI_CHAT_SEARCH={'BACKGROUND': False})
+class SearchIndexingTests(TestCase):
+    def test_saved_chat_is_indexed_after_commit(self):
+        user = get_user_model().objects.create_user(username='i@x.com', email='i@x.com', password='x')
+        with self.captureOnCommitCallbacks() as callbacks:
+            chat = AIChat.objects.create(user=user, message='photosynthesis', ai_response='chlorophyll')
+        self.assertFalse(ChatSearchTerm.objects.filter(chat=chat).exists())
+
+        for callback in callbacks:
+            callback()
+        self.assertTrue(ChatSearchTerm.objects.filter(chat=chat, term='photosynthesis').exists())
+
+        chat.message = 'mitosis'
+        with self.captureOnCommitCallbacks(execute=True):
+            chat.save()
+        self.assertEqual(
+            set(ChatSearchTerm.objects.filter(chat=chat).values_list('term', flat=True)), {'mitosis', 'chlorophyll'}
+        )
+
+    def test_admin_search_combines_email_and_term_matches(self):
+        alice = get_user_model().objects.create_user(username='a@x.com', email='alice@x.com', password='x')
+        bob = get_user_model().objects.create_user(username='b@x.com', email='bob@x.com', password='x')
+        with self.captureOnCommitCallbacks(execute=True):
+            by_email = AIChat.objects.create(user=alice, message='hello', ai_response='hi')
+            by_term = AIChat.objects.create(user=bob, message='alice in wonderland', ai_response='a book')
+            AIChat.objects.create(user=bob, message='hello', ai_response='hi')
+
+        model_admin = site._registry[AIChat]
+        results, _ = model_admin.get_search_results(RequestFactory().get('/'), AIChat.objects.all(), 'alice')
+        self.assertEqual(set(results), {by_email, by_term})
+
+    def test_search_reuses_cached_document_count(self):
+        cache.clear()
+        user = get_user_model().objects.create_user(username='d@x.com', email='d@x.com', password='x')
+        with self.captureOnCommitCallbacks(execute=True):
+            chat = AIChat.objects.create(user=user, message='osmosis', ai_response='water')
+        self.assertEqual([pk for pk, _ in ranked_chat_ids('osmosis', user=user)], [chat.pk])
+
+        with mock.patch('django.db.models.query.QuerySet.count') as count:
+            self.assertEqual([pk for pk, _ in ranked_chat_ids('osmosis', user=user)], [chat.pk])
+        count.assert_not_called()
@@ -1,16 +1,26 @@
-from django.urls import path
-from . import views
-
-urlpatterns = [
-    # AI Chat Endpoints
-    path('chat/', views.chat_with_ai, name='chat_with_ai'),
-    path('chat/list/', views.list_user_chats, name='list_user_chats'),
-    
-    # Educational AI Endpoints
-    path('explain/', views.explain_concept, name='explain_concept'),
-    path('content/generate/', views.generate_educational_content, name='generate_educational_content'),
-    
-    # System Status
-    path('status/', views.api_status, name='api_status'),
-    path('service/status/', views.service_status, name='service_status'),
-]
+from django.conf import settings
+from django.urls import path
+from . import views, async_views
+
+# Under ASGI the AI endpoints are served by native async views
+ai_views = async_views if settings.AI_ASYNC_VIEWS else views
+
+urlpatterns = [
+    # AI Chat Endpoints
+    path('chat/', ai_views.chat_with_ai, name='chat_with_ai'),
+    path('chat/list/', views.list_user_chats, name='list_user_chats'),
+    path('chat/export/', views.export_chats, name='export_chats'),
+    path('chat/search/', views.search_chats, name='search_chats'),
+    path('chat/sessions/', views.chat_sessions, name='chat_sessions'),
+    path('chat/sessions/<int:session_id>/', views.chat_session_detail, name='chat_session_detail'),
+    
+    # Educational AI Endpoints
+    path('explain/', ai_views.explain_concept, name='explain_concept'),
+    path('content/generate/', ai_views.generate_educational_content, name='generate_educational_content'),
+    path('explain/batch/', ai_views.explain_concepts_batch, name='explain_concepts_batch'),
+    path('content/generate/batch/', ai_views.generate_educational_content_batch, name='generate_educational_content_batch'),
+    
+    # System Status
+    path('status/', views.api_status, name='api_status'),
+    path('service/status/', views.service_status, name='service_status'),
+]
@@ -0,0 +1,41 @@
+"""Request and response helpers shared by the sync and async AI views"""
+
+
+def is_truthy(value):
+    if isinstance(value, str):
+        return value.strip().lower() in ('1', 'true', 'yes', 'on')
+    return bool(value)
+
+
+def use_response_cache(request):
+    """Clients can bypass the response cache with no_cache=true or Cache-Control: no-cache"""
+    if is_truthy(request.data.get('no_cache', False)):
+        return False
+    return 'no-cache' not in request.headers.get('Cache-Control', '').lower()
+
+
+def stream_requested(request):
+    """Clients opt into server-sent events with stream=true in the body or query string"""
+    return is_truthy(request.data.get('stream', request.query_params.get('stream', False)))
+
+
+def sync_save_requested(request):
+    """With write-behind enabled, sync_save=true still saves the chat before responding so chat_id is set"""
+    return is_truthy(request.data.get('sync_save', request.query_params.get('sync_save', False)))
+
+
+def service_error(result):
+    """(body, status, headers) for a failed service result.
+
+    An overloaded or circuit-broken upstream is a 503 with Retry-After and
+    a missed deadline a 504; anything else stays a 500.
+    """
+    if result.get('overloaded'):
+        return (
+            {'error': 'AI service is busy. Please try again shortly.'},
+            503,
+            {'Retry-After': str(result['retry_after'])}
+        )
+    if result.get('timed_out'):
+        return {'error': 'AI service timed out. Please try again.'}, 504, {}
+    return {'error': f'AI service error: {result["error"]}'}, 500, {}
@@ -1,243 +1,578 @@
-from rest_framework import status
-from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import IsAuthenticated, AllowAny
-from rest_framework.response import Response
-from django.shortcuts import get_object_or_404
-from .models import AIChat
-from .serializers import (
-    AIChatSerializer,
-    AIChatCreateSerializer
-)
-from .services import GeminiService
-import logging
-
-logger = logging.getLogger(__name__)
-
-@api_view(['POST'])
-@permission_classes([AllowAny])
-def chat_with_ai(request):
-    """Chat with Gemini AI"""
-    serializer = AIChatCreateSerializer(data=request.data)
-    
-    if serializer.is_valid():
-        try:
-            gemini_service = GeminiService()
-            
-            if not gemini_service.is_configured():
-                return Response(
-                    {'error': 'AI chat service is not configured. Please contact administrator.'},
-                    status=status.HTTP_503_SERVICE_UNAVAILABLE
-                )
-            
-            message = serializer.validated_data['message']
-            result = gemini_service.generate_response(message)
-            
-            if result['success']:
-                # Save chat to database only if user is authenticated
-                chat = None
-                if request.user.is_authenticated:
-                    chat = AIChat.objects.create(
-                        user=request.user,
-                        message=message,
-                        ai_response=result['response']
-                    )
-                    response_serializer = AIChatSerializer(chat)
-                    return Response(response_serializer.data, status=status.HTTP_201_CREATED)
-                else:
-                    # For anonymous users, just return the response
-                    return Response({
-                        'message': message,
-                        'ai_response': result['response'],
-                        'created_at': None,
-                        'user': None
-                    }, status=status.HTTP_201_CREATED)
-            else:
-                return Response(
-                    {'error': f'AI service error: {result["error"]}'},
-                    status=status.HTTP_500_INTERNAL_SERVER_ERROR
-                )
-                
-        except Exception as e:
-            logger.error(f"Error in chat_with_ai: {str(e)}")
-            return Response(
-                {'error': 'Failed to generate AI response. Please try again.'},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
-    
-    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-
-@api_view(['POST'])
-@permission_classes([AllowAny])
-def explain_concept(request):
-    """Get AI explanation for a concept"""
-    concept = request.data.get('concept', '').strip()
-    difficulty = request.data.get('difficulty', 'intermediate')
-    
-    if not concept:
-        return Response(
-            {'error': 'Concept field is required.'},
-            status=status.HTTP_400_BAD_REQUEST
-        )
-    
-    try:
-        gemini_service = GeminiService()
-        
-        if not gemini_service.is_configured():
-            return Response(
-                {'error': 'AI service is not configured.'},
-                status=status.HTTP_503_SERVICE_UNAVAILABLE
-            )
-        
-        result = gemini_service.explain_concept(concept, difficulty)
-        
-        if result['success']:
-            # Save as chat only if user is authenticated
-            chat_id = None
-            if request.user.is_authenticated:
-                chat = AIChat.objects.create(
-                    user=request.user,
-                    message=f"Explain concept: {concept} (difficulty: {difficulty})",
-                    ai_response=result['response']
-                )
-                chat_id = chat.id
-            
-            return Response({
-                'concept': concept,
-                'difficulty': difficulty,
-                'explanation': result['response'],
-                'chat_id': chat_id
-            })
-        else:
-            return Response(
-                {'error': f'AI service error: {result["error"]}'},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
-            
-    except Exception as e:
-        logger.error(f"Error in explain_concept: {str(e)}")
-        return Response(
-            {'error': 'Failed to generate explanation.'},
-            status=status.HTTP_500_INTERNAL_SERVER_ERROR
-        )
-
-@api_view(['POST'])
-@permission_classes([AllowAny])
-def generate_educational_content(request):
-    """Generate educational content for a topic"""
-    topic = request.data.get('topic', '').strip()
-    grade_level = request.data.get('grade_level', 'general')
-    
-    if not topic:
-        return Response(
-            {'error': 'Topic field is required.'},
-            status=status.HTTP_400_BAD_REQUEST
-        )
-    
-    try:
-        gemini_service = GeminiService()
-        
-        if not gemini_service.is_configured():
-            return Response(
-                {'error': 'AI service is not configured.'},
-                status=status.HTTP_503_SERVICE_UNAVAILABLE
-            )
-        
-        result = gemini_service.generate_educational_content(topic, grade_level)
-        
-        if result['success']:
-            # Save as chat only if user is authenticated
-            chat_id = None
-            if request.user.is_authenticated:
-                chat = AIChat.objects.create(
-                    user=request.user,
-                    message=f"Generate educational content for: {topic} (grade: {grade_level})",
-                    ai_response=result['response']
-                )
-                chat_id = chat.id
-            
-            return Response({
-                'topic': topic,
-                'grade_level': grade_level,
-                'content': result['response'],
-                'chat_id': chat_id
-            })
-        else:
-            return Response(
-                {'error': f'AI service error: {result["error"]}'},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
-            
-    except Exception as e:
-        logger.error(f"Error in generate_educational_content: {str(e)}")
-        return Response(
-            {'error': 'Failed to generate educational content.'},
-            status=status.HTTP_500_INTERNAL_SERVER_ERROR
-        )
-
-@api_view(['GET'])
-@permission_classes([IsAuthenticated])
-def list_user_chats(request):
-    """List user's AI chats - requires authentication"""
-    try:
-        chats = AIChat.objects.filter(user=request.user)[:20]  # Last 20 chats
-        serializer = AIChatSerializer(chats, many=True)
-        return Response(serializer.data)
-        
-    except Exception as e:
-        logger.error(f"Error listing user chats: {str(e)}")
-        return Response(
-            {'error': 'Failed to retrieve chats.'},
-            status=status.HTTP_500_INTERNAL_SERVER_ERROR
-        ) 
-
-@api_view(['GET']) 
-@permission_classes([AllowAny])
-def api_status(request):
-    """Check API services status"""
-    try:
-        from .services import GeminiService
-        
-        gemini_service = GeminiService()
-        
-        # Test Gemini configuration
-        gemini_configured = bool(gemini_service.api_key and gemini_service.model)
-        
-        return Response({
-            'gemini': {
-                'configured': gemini_configured,
-                'connected': gemini_configured,
-                'model': 'gemini-1.5-flash'
-            }
-        })
-
-    except Exception as e:
-        logger.error(f"Error checking API status: {str(e)}")
-        return Response(
-            {'error': 'Failed to check API status.'},
-            status=status.HTTP_500_INTERNAL_SERVER_ERROR
-        )
-
-
-@api_view(['GET'])
-@permission_classes([AllowAny])
-def service_status(request):
-    """Check AI service status"""
-    try:
-        gemini_service = GeminiService()
-        
-        # Test Gemini configuration
-        gemini_configured = gemini_service.is_configured()
-        
-        return Response({
-            'gemini': {
-                'configured': gemini_configured,
-                'service': 'Google Gemini AI'
-            }
-        })
-
-    except Exception as e:
-        logger.error(f"Error checking service status: {str(e)}")
-        return Response(
-            {'error': 'Failed to check service status.'},
-            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes, throttle_classes
+from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.response import Response
+from django.shortcuts import get_object_or_404
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from virtual_tutor.pagination import (
+    InvalidCursor,
+    decode_cursor,
+    encode_cursor,
+    parse_limit,
+    set_next_cursor
+)
+from virtual_tutor.export import streaming_file_response
+from virtual_tutor.profiling import span
+from .models import AIChat, ArchivedAIChat, ChatSession
+from .serializers import (
+    CHAT_VALUE_FIELDS,
+    AIChatSerializer,
+    AIChatCreateSerializer,
+    chat_rows,
+    ChatSessionSerializer
+)
+from .services import DEFAULT_CONTEXT, get_gemini_service
+from .conversation import build_context, get_session, record_turn
+from .cache import get_response_cache
+from .batch import (
+    BatchValidationError,
+    parse_batch_items,
+    build_batch_results,
+    batch_response_data
+)
+from .admission import AI_THROTTLE_CLASSES, get_upstream_limiter
+from .coalescing import get_single_flight
+from .resilience import get_upstream_policy
+from .streaming import event_stream_response
+from .persistence import persist_chat, write_behind_stats
+from .chat_export import EXPORT_FORMATS, filter_chats, iter_export
+from .search import ranked_chat_ids, schedule_indexing
+from .utils import is_truthy, service_error, stream_requested, sync_save_requested, use_response_cache
+import logging
+
+logger = logging.getLogger(__name__)
+
+@api_view(['POST'])
+@permission_classes([AllowAny])
+@throttle_classes(AI_THROTTLE_CLASSES)
+def chat_with_ai(request):
+    """Chat with Gemini AI"""
+    serializer = AIChatCreateSerializer(data=request.data)
+    with span('serialize'):
+        is_valid = serializer.is_valid()
+    
+    if is_valid:
+        try:
+            gemini_service = get_gemini_service()
+            sync_save = sync_save_requested(request)
+            
+            if not gemini_service.is_configured():
+                return Response(
+                    {'error': 'AI chat service is not configured. Please contact administrator.'},
+                    status=status.HTTP_503_SERVICE_UNAVAILABLE
+                )
+            
+            message = serializer.validated_data['message']
+
+            # Follow-ups in a session carry its summary and recent turns (see conversation.py)
+            session = None
+            session_id = request.data.get('session_id')
+            if session_id not in (None, ''):
+                session = get_session(request.user, session_id)
+                if session is None:
+                    return Response({'error': 'Chat session not found.'}, status=status.HTTP_404_NOT_FOUND)
+            context = build_context(session) if session else DEFAULT_CONTEXT
+
+            def store_chat(text):
+                if session:
+                    return record_turn(session, request.user, message, text)
+                return persist_chat(request.user, message, text, sync=sync_save)
+
+            if stream_requested(request):
+                def save_chat(text):
+                    # Runs once the stream completes; nothing is saved if the client disconnects
+                    if not request.user.is_authenticated:
+                        return {'message': message, 'chat_id': None, 'created_at': None}
+                    chat = store_chat(text)
+                    return {
+                        'message': message,
+                        'chat_id': chat.id,
+                        'session_id': chat.session_id,
+                        'created_at': chat.created_at
+                    }
+
+                return event_stream_response(
+                    gemini_service.stream_response(message, context),
+                    save_chat,
+                    error_message='Failed to generate AI response. Please try again.'
+                )
+
+            result = gemini_service.generate_response(message, context)
+            
+            if result['success']:
+                # Save chat to database only if user is authenticated
+                chat = None
+                if request.user.is_authenticated:
+                    chat = store_chat(result['response'])
+                    with span('serialize'):
+                        data = AIChatSerializer(chat).data
+                    return Response(data, status=status.HTTP_201_CREATED)
+                else:
+                    # For anonymous users, just return the response
+                    return Response({
+                        'message': message,
+                        'ai_response': result['response'],
+                        'created_at': None,
+                        'user': None
+                    }, status=status.HTTP_201_CREATED)
+            else:
+                body, status_code, headers = service_error(result)
+                return Response(body, status=status_code, headers=headers)
+                
+        except Exception as e:
+            logger.error(f"Error in chat_with_ai: {str(e)}")
+            return Response(
+                {'error': 'Failed to generate AI response. Please try again.'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+    
+    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+@api_view(['POST'])
+@permission_classes([AllowAny])
+@throttle_classes(AI_THROTTLE_CLASSES)
+def explain_concept(request):
+    """Get AI explanation for a concept"""
+    concept = request.data.get('concept', '').strip()
+    difficulty = request.data.get('difficulty', 'intermediate')
+    
+    if not concept:
+        return Response(
+            {'error': 'Concept field is required.'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    try:
+        gemini_service = get_gemini_service()
+        sync_save = sync_save_requested(request)
+        
+        if not gemini_service.is_configured():
+            return Response(
+                {'error': 'AI service is not configured.'},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+        
+        if stream_requested(request):
+            def save_chat(text):
+                chat_id = None
+                if request.user.is_authenticated:
+                    chat = persist_chat(
+                        request.user,
+                        f"Explain concept: {concept} (difficulty: {difficulty})",
+                        text,
+                        sync=sync_save
+                    )
+                    chat_id = chat.id
+                return {'concept': concept, 'difficulty': difficulty, 'chat_id': chat_id}
+
+            return event_stream_response(
+                gemini_service.stream_explain_concept(
+                    concept, difficulty, use_cache=use_response_cache(request)
+                ),
+                save_chat,
+                error_message='Failed to generate explanation.'
+            )
+
+        result = gemini_service.explain_concept(
+            concept, difficulty, use_cache=use_response_cache(request)
+        )
+        
+        if result['success']:
+            # Save as chat only if user is authenticated
+            chat_id = None
+            if request.user.is_authenticated:
+                chat = persist_chat(
+                    request.user,
+                    f"Explain concept: {concept} (difficulty: {difficulty})",
+                    result['response'],
+                    sync=sync_save
+                )
+                chat_id = chat.id
+            
+            return Response({
+                'concept': concept,
+                'difficulty': difficulty,
+                'explanation': result['response'],
+                'chat_id': chat_id
+            })
+        else:
+            body, status_code, headers = service_error(result)
+            return Response(body, status=status_code, headers=headers)
+            
+    except Exception as e:
+        logger.error(f"Error in explain_concept: {str(e)}")
+        return Response(
+            {'error': 'Failed to generate explanation.'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+@api_view(['POST'])
+@permission_classes([AllowAny])
+@throttle_classes(AI_THROTTLE_CLASSES)
+def generate_educational_content(request):
+    """Generate educational content for a topic"""
+    topic = request.data.get('topic', '').strip()
+    grade_level = request.data.get('grade_level', 'general')
+    
+    if not topic:
+        return Response(
+            {'error': 'Topic field is required.'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    try:
+        gemini_service = get_gemini_service()
+        sync_save = sync_save_requested(request)
+        
+        if not gemini_service.is_configured():
+            return Response(
+                {'error': 'AI service is not configured.'},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+        
+        result = gemini_service.generate_educational_content(
+            topic, grade_level, use_cache=use_response_cache(request)
+        )
+        
+        if result['success']:
+            # Save as chat only if user is authenticated
+            chat_id = None
+            if request.user.is_authenticated:
+                chat = persist_chat(
+                    request.user,
+                    f"Generate educational content for: {topic} (grade: {grade_level})",
+                    result['response'],
+                    sync=sync_save
+                )
+                chat_id = chat.id
+            
+            return Response({
+                'topic': topic,
+                'grade_level': grade_level,
+                'content': result['response'],
+                'chat_id': chat_id
+            })
+        else:
+            body, status_code, headers = service_error(result)
+            return Response(body, status=status_code, headers=headers)
+            
+    except Exception as e:
+        logger.error(f"Error in generate_educational_content: {str(e)}")
+        return Response(
+            {'error': 'Failed to generate educational content.'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+def _generate_batch(request, task):
+    """Shared body of the batch endpoints"""
+    try:
+        items = parse_batch_items(task, request.data)
+    except BatchValidationError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        gemini_service = get_gemini_service()
+
+        if not gemini_service.is_configured():
+            return Response(
+                {'error': 'AI service is not configured.'},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+
+        valid = [item for item in items if 'error' not in item]
+        valid_results = iter(gemini_service.generate_batch(
+            task,
+            [(item['subject'], item['level']) for item in valid],
+            use_cache=use_response_cache(request)
+        ))
+        results = [None if 'error' in item else next(valid_results) for item in items]
+
+        output, chats = build_batch_results(task, items, results, request.user)
+        if chats:
+            # One multi-row INSERT for every successful item
+            AIChat.objects.bulk_create([chat for _, chat in chats])
+            # Tokenizing and the term inserts happen on the background indexer
+            schedule_indexing()
+
+        return Response(batch_response_data(task, output, chats))
+
+    except Exception as e:
+        logger.error(f"Error in batch {task}: {str(e)}")
+        return Response(
+            {'error': 'Failed to process batch request.'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+@api_view(['POST'])
+@permission_classes([AllowAny])
+@throttle_classes(AI_THROTTLE_CLASSES)
+def explain_concepts_batch(request):
+    """Explain many concepts in one request: {"items": [{"concept", "difficulty"}, ...]}"""
+    return _generate_batch(request, 'explain_concept')
+
+@api_view(['POST'])
+@permission_classes([AllowAny])
+@throttle_classes(AI_THROTTLE_CLASSES)
+def generate_educational_content_batch(request):
+    """Generate content for many topics in one request: {"items": [{"topic", "grade_level"}, ...]}"""
+    return _generate_batch(request, 'educational_content')
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def search_chats(request):
+    """
+    Full-text search over the user's chats, best match first - requires authentication
+    Query params: q (every word must match), limit (default 20, max 100),
+    cursor (from X-Next-Cursor)
+    """
+    query = request.query_params.get('q', '').strip()
+    if not query:
+        return Response({'error': 'q is required.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        limit = parse_limit(request.query_params.get('limit'), default=20, maximum=100)
+        offset = 0
+        cursor = request.query_params.get('cursor')
+        if cursor:
+            offset, = decode_cursor(cursor, 1)
+            if not isinstance(offset, int) or offset < 0:
+                raise InvalidCursor('Invalid cursor.')
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        # Ranked results cannot be seeked by key, so the cursor carries an offset
+        ranked = ranked_chat_ids(query, user=request.user, offset=offset, limit=limit + 1)
+        next_cursor = encode_cursor(offset + limit) if len(ranked) > limit else None
+        ranked = ranked[:limit]
+
+        chats = AIChat.objects.in_bulk([chat_id for chat_id, _ in ranked])
+        data = []
+        for chat_id, score in ranked:
+            if chat_id in chats:
+                data.append(dict(AIChatSerializer(chats[chat_id]).data, score=round(score, 4)))
+        return set_next_cursor(Response(data), request, next_cursor)
+
+    except Exception as e:
+        logger.error(f"Error searching chats: {str(e)}")
+        return Response(
+            {'error': 'Failed to search chats.'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def export_chats(request):
+    """
+    Stream chat history as a file - requires authentication
+    Query params: output (jsonl or csv, default jsonl), gzip=true,
+    user (repeatable), grade, since / before (ISO 8601 dates or datetimes),
+    include_archived=true (archived chats first)
+    Admins export any user's chats; everyone else only their own
+    """
+    output = request.query_params.get('output', 'jsonl')
+    if output not in EXPORT_FORMATS:
+        return Response(
+            {'error': f"output must be one of: {', '.join(EXPORT_FORMATS)}."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    is_admin = request.user.is_admin_user or request.user.is_staff
+    filters = {
+        'user_ids': request.query_params.getlist('user'),
+        'grade': request.query_params.get('grade'),
+        'since': request.query_params.get('since'),
+        'before': request.query_params.get('before'),
+    }
+    try:
+        chats = filter_chats(
+            queryset=None if is_admin else AIChat.objects.filter(user=request.user), **filters
+        )
+        archived = None
+        if is_truthy(request.query_params.get('include_archived', False)):
+            archived = ArchivedAIChat.objects.all() if is_admin else ArchivedAIChat.objects.filter(user=request.user)
+            archived = filter_chats(queryset=archived, **filters)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    return streaming_file_response(
+        iter_export(chats, output, archived=archived),
+        EXPORT_FORMATS[output],
+        f'chats.{output}',
+        compress=is_truthy(request.query_params.get('gzip', False))
+    )
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def list_user_chats(request):
+    """
+    List user's AI chats, newest first - requires authentication
+    Query params: limit (default 20, max 100), cursor (from X-Next-Cursor),
+    since / before (ISO 8601 datetimes), include_archived (also list archived chats)
+    """
+    try:
+        filters = Q(user=request.user)
+        include_archived = is_truthy(request.query_params.get('include_archived', False))
+
+        try:
+            limit = parse_limit(request.query_params.get('limit'), default=20, maximum=100)
+            for param, lookup in (('since', 'created_at__gt'), ('before', 'created_at__lt')):
+                value = request.query_params.get(param)
+                if value:
+                    parsed = parse_datetime(value)
+                    if parsed is None:
+                        raise ValueError(f'Invalid {param} datetime.')
+                    filters &= Q(**{lookup: parsed})
+
+            cursor = request.query_params.get('cursor')
+            if cursor:
+                created_at, chat_id = decode_cursor(cursor, 2)
+                if not isinstance(created_at, str) or not isinstance(chat_id, int):
+                    raise InvalidCursor('Invalid cursor.')
+                created_at = parse_datetime(created_at)
+                if created_at is None:
+                    raise InvalidCursor('Invalid cursor.')
+                # Seek past the last row of the previous page instead of using OFFSET
+                filters &= Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=chat_id)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Plain rows rather than model instances: see chat_rows
+        page = list(
+            AIChat.objects.filter(filters).order_by('-created_at', '-id').values(*CHAT_VALUE_FIELDS)[:limit + 1]
+        )
+        if include_archived:
+            # Archived ids keep their original values, so one cursor spans both tables
+            archived = ArchivedAIChat.objects.filter(filters).order_by('-created_at', '-id')
+            page = [dict(row, archived=False) for row in page]
+            page += [dict(row, archived=True) for row in archived.values(*CHAT_VALUE_FIELDS)[:limit + 1]]
+            page.sort(key=lambda row: (row['created_at'], row['id']), reverse=True)
+            page = page[:limit + 1]
+        next_cursor = None
+        if len(page) > limit:
+            page = page[:limit]
+            last = page[-1]
+            next_cursor = encode_cursor(last['created_at'].isoformat(), last['id'])
+
+        return set_next_cursor(Response(list(chat_rows(page))), request, next_cursor)
+        
+    except Exception as e:
+        logger.error(f"Error listing user chats: {str(e)}")
+        return Response(
+            {'error': 'Failed to retrieve chats.'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        ) 
+
+@api_view(['GET', 'POST'])
+@permission_classes([IsAuthenticated])
+def chat_sessions(request):
+    """
+    GET: the user's chat sessions, most recently active first (limit, default 20, max 100)
+    POST: start a session ({"title": optional}); send its id as session_id to /chat/
+    """
+    try:
+        if request.method == 'POST':
+            title = str(request.data.get('title', '')).strip()[:200]
+            session = ChatSession.objects.create(user=request.user, title=title)
+            return Response(ChatSessionSerializer(session).data, status=status.HTTP_201_CREATED)
+
+        try:
+            limit = parse_limit(request.query_params.get('limit'), default=20, maximum=100)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        sessions = ChatSession.objects.filter(user=request.user).order_by('-updated_at', '-id')[:limit]
+        return Response(ChatSessionSerializer(sessions, many=True).data)
+
+    except Exception as e:
+        logger.error(f"Error handling chat sessions: {str(e)}")
+        return Response(
+            {'error': 'Failed to process chat sessions.'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+@api_view(['GET', 'DELETE'])
+@permission_classes([IsAuthenticated])
+def chat_session_detail(request, session_id):
+    """
+    GET: a session with its latest turns, oldest first (limit, default 20, max 100)
+    DELETE: remove the session and its turns
+    """
+    session = get_object_or_404(ChatSession, pk=session_id, user=request.user)
+
+    if request.method == 'DELETE':
+        session.delete()
+        return Response({'message': 'Chat session deleted successfully.'})
+
+    try:
+        limit = parse_limit(request.query_params.get('limit'), default=20, maximum=100)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    chats = list(session.chats.order_by('-id')[:limit])
+    chats.reverse()
+    data = ChatSessionSerializer(session).data
+    data['chats'] = AIChatSerializer(chats, many=True).data
+    return Response(data)
+
+@api_view(['GET']) 
+@permission_classes([AllowAny])
+def api_status(request):
+    """Check API services status"""
+    try:
+        gemini_service = get_gemini_service()
+        
+        # Test Gemini configuration
+        gemini_configured = gemini_service.is_configured()
+        # Measured by the circuit breaker: open after repeated upstream failures
+        circuit_state = get_upstream_policy().breaker.state
+        
+        return Response({
+            'gemini': {
+                'configured': gemini_configured,
+                'connected': gemini_configured and circuit_state != 'open',
+                'circuit': circuit_state,
+                'model': gemini_service.model_name
+            }
+        })
+
+    except Exception as e:
+        logger.error(f"Error checking API status: {str(e)}")
+        return Response(
+            {'error': 'Failed to check API status.'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def service_status(request):
+    """Check AI service status"""
+    try:
+        gemini_service = get_gemini_service()
+        
+        # Test Gemini configuration
+        gemini_configured = gemini_service.is_configured()
+        single_flight = get_single_flight()
+        upstream_limiter = get_upstream_limiter()
+        
+        return Response({
+            'gemini': {
+                'configured': gemini_configured,
+                'service': 'Google Gemini AI',
+                'backend': gemini_service.backend.name
+            },
+            'cache': get_response_cache().stats(),
+            'coalescing': single_flight.stats() if single_flight else {'enabled': False},
+            'write_behind': write_behind_stats(),
+            'upstream': upstream_limiter.stats() if upstream_limiter else {'enabled': False},
+            'resilience': get_upstream_policy().stats()
+        })
+
+    except Exception as e:
+        logger.error(f"Error checking service status: {str(e)}")
+        return Response(
+            {'error': 'Failed to check service status.'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
\ No newline at end of file
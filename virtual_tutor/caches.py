@@ -0,0 +1,11 @@
+"""
+Helpers for features that rely on a cache shared between worker processes.
+"""
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+
+def is_process_local(alias):
+    """Whether entries in cache ``alias`` are invisible to other worker processes"""
+    return isinstance(caches[alias], (LocMemCache, DummyCache))
@@ -0,0 +1,263 @@
+"""
+Read-replica routing.
+
+ReplicaRouter sends every write, and every read outside a replica-eligible
+request, to ``default``. ReplicaRoutingMiddleware makes GET/HEAD/OPTIONS
+requests under DATABASE_REPLICA_ROUTING['PATHS'] eligible, so their reads
+go to one of DATABASE_REPLICAS (picked at random, then kept for the rest of
+the request). Management commands and background threads never run inside
+a request context and always use the primary.
+
+Read-your-writes: once a request writes (any db_for_write), the rest of it
+reads from the primary, and the client - identified by a hash of its
+Authorization header or session cookie - is pinned to the primary for
+PIN_SECONDS. Streamed response bodies run after the middleware returns, so
+they are iterated under the request's routing state and the pin is set
+once the stream ends. The pin lives in the CACHE_ALIAS cache, which must be shared
+between workers (Redis/Memcached); with a per-process cache the middleware
+is not installed and everything reads from the primary. Auth tokens are
+always read from the primary, so a revoked or brand-new token is seen at
+once.
+
+Failover: a replica that cannot be connected to is skipped for RETRY_AFTER
+seconds and its reads go to the next healthy replica or the primary.
+Code that must see the latest data can wrap itself in ``with primary():``.
+"""
+import hashlib
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from django.http import FileResponse
+
+from .caches import is_process_local
+from .metrics import Counter
+
+logger = logging.getLogger(__name__)
+
+REPLICA_FAILOVERS = Counter(
+    'db_replica_failovers_total', 'Replica connections that failed, sending reads elsewhere.', ['database'],
+)
+
+_state = ContextVar('db_routing', default=None)
+
+# Replica alias -> monotonic time until which it is skipped
+_down_until = {}
+_down_lock = threading.Lock()
+
+
+def _config():
+    return getattr(settings, 'DATABASE_REPLICA_ROUTING', {})
+
+
+def replicas():
+    return list(getattr(settings, 'DATABASE_REPLICAS', []))
+
+
+def pin_cache_is_shared():
+    return not is_process_local(_config().get('CACHE_ALIAS', 'default'))
+
+
+class RoutingState:
+    """Per-request routing decisions"""
+
+    def __init__(self, use_replica):
+        self.use_replica = use_replica
+        self.replica = None
+        self.wrote = False
+
+
+def _healthy(alias):
+    if _down_until.get(alias, 0) > time.monotonic():
+        return False
+    connection = connections[alias]
+    if connection.connection is not None:
+        return True
+    try:
+        connection.ensure_connection()
+        return True
+    except DatabaseError as e:
+        retry_after = _config().get('RETRY_AFTER', 30)
+        with _down_lock:
+            _down_until[alias] = time.monotonic() + retry_after
+        REPLICA_FAILOVERS.inc(database=alias)
+        logger.error(f"Read replica {alias} unavailable, using others for {retry_after}s: {str(e)}")
+        return False
+
+
+def _pick_replica():
+    candidates = replicas()
+    random.shuffle(candidates)
+    for alias in candidates:
+        if _healthy(alias):
+            return alias
+    return DEFAULT_DB_ALIAS
+
+
+class ReplicaRouter:
+    """Writes (and reads needing fresh data) to ``default``; other request reads to a replica"""
+
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or not state.use_replica or model._meta.label in _config().get('PRIMARY_MODELS', ()):
+            return DEFAULT_DB_ALIAS
+        if state.replica is None:
+            state.replica = _pick_replica()
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+            state.use_replica = False
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+@contextmanager
+def primary():
+    """Read from the primary inside the block, even in a replica-eligible request"""
+    state = _state.get()
+    if state is None or not state.use_replica:
+        yield
+        return
+    state.use_replica = False
+    try:
+        yield
+    finally:
+        state.use_replica = not state.wrote
+
+
+def _client_key(request):
+    credential = request.META.get('HTTP_AUTHORIZATION') or request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+    if not credential:
+        return None
+    return f"db:pin:{hashlib.sha256(credential.encode('utf-8')).hexdigest()}"
+
+
+def _cache():
+    return caches[_config().get('CACHE_ALIAS', 'default')]
+
+
+def _may_use_replica(request):
+    return (
+        request.method in ('GET', 'HEAD', 'OPTIONS')
+        and request.path.startswith(tuple(_config().get('PATHS', ('/api/',))))
+    )
+
+
+def _pinned(client_key):
+    if client_key is None:
+        return False
+    try:
+        return bool(_cache().get(client_key))
+    except Exception as e:
+        logger.error(f"Error reading primary pin: {str(e)}")
+        return True
+
+
+async def _apinned(client_key):
+    if client_key is None:
+        return False
+    try:
+        return bool(await _cache().aget(client_key))
+    except Exception as e:
+        logger.error(f"Error reading primary pin: {str(e)}")
+        return True
+
+
+def _pin(state, client_key):
+    if state.wrote and client_key is not None:
+        try:
+            _cache().set(client_key, True, _config().get('PIN_SECONDS', 5))
+        except Exception as e:
+            logger.error(f"Error pinning client to the primary: {str(e)}")
+
+
+async def _apin(state, client_key):
+    if state.wrote and client_key is not None:
+        try:
+            await _cache().aset(client_key, True, _config().get('PIN_SECONDS', 5))
+        except Exception as e:
+            logger.error(f"Error pinning client to the primary: {str(e)}")
+
+
+def _routed_stream(content, state, client_key):
+    """Iterate a streamed body under the request's routing state, pinning once it is done"""
+    iterator = iter(content)
+    try:
+        while True:
+            token = _state.set(state)
+            try:
+                chunk = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                _state.reset(token)
+            yield chunk
+    finally:
+        _pin(state, client_key)
+
+
+async def _arouted_stream(content, state, client_key):
+    iterator = aiter(content)
+    try:
+        while True:
+            token = _state.set(state)
+            try:
+                chunk = await anext(iterator)
+            except StopAsyncIteration:
+                return
+            finally:
+                _state.reset(token)
+            yield chunk
+    finally:
+        await _apin(state, client_key)
+
+
+def _defer_to_stream(response, state, client_key):
+    """True if ``response``'s body still has to run; it then finishes the routing itself"""
+    if response is None or not response.streaming or isinstance(response, FileResponse):
+        return False
+    # The body runs after the middleware returns: its queries need the state, its writes the pin
+    wrap = _arouted_stream if response.is_async else _routed_stream
+    response.streaming_content = wrap(response.streaming_content, state, client_key)
+    return True
+
+
+def start_routing(request):
+    """Set up routing for ``request``; returns what finish_routing needs"""
+    client_key = _client_key(request)
+    state = RoutingState(_may_use_replica(request) and not _pinned(client_key))
+    return _state.set(state), state, client_key
+
+
+async def astart_routing(request):
+    """start_routing without blocking the event loop on the pin cache"""
+    client_key = _client_key(request)
+    state = RoutingState(_may_use_replica(request) and not await _apinned(client_key))
+    return _state.set(state), state, client_key
+
+
+def finish_routing(token, state, client_key, response=None):
+    _state.reset(token)
+    if not _defer_to_stream(response, state, client_key):
+        _pin(state, client_key)
+
+
+async def afinish_routing(token, state, client_key, response=None):
+    _state.reset(token)
+    if not _defer_to_stream(response, state, client_key):
+        await _apin(state, client_key)
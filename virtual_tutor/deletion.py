@@ -0,0 +1,178 @@
+"""
+Chunked deletes run off the request path.
+
+delete_in_batches removes a queryset's rows BATCH_SIZE primary keys at a
+time, each chunk in its own short transaction, sleeping BATCH_PAUSE seconds
+between chunks so replicas can keep up. Rows that cascade from a chunk
+(including hidden relations such as ChatSearchTerm.user) are deleted the
+same way first, so no single delete fans out into an unbounded number of
+child rows. Large deletes therefore never hold locks for long or ship one
+huge transaction to the replicas.
+
+BackgroundDeleter runs such jobs on one daemon thread per process. Jobs are
+not persisted: callers record what is pending in the database first (e.g.
+User.deletion_requested_at) and provide a management command that resumes
+it, so a job lost to a restart is only delayed.
+"""
+import atexit
+import logging
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import close_old_connections, models, transaction
+
+from .metrics import Counter, Gauge
+
+logger = logging.getLogger(__name__)
+
+ROWS_DELETED = Counter(
+    'background_delete_rows_total', 'Rows removed by chunked deletes, by model.', ['model'],
+)
+
+
+def _config():
+    return getattr(settings, 'BACKGROUND_DELETION', {})
+
+
+def cascading_relations(model):
+    """Reverse relations whose rows are deleted with ``model``'s, hidden ones included"""
+    return [
+        field for field in model._meta.get_fields(include_hidden=True)
+        if field.auto_created and not field.concrete
+        and (field.one_to_many or field.one_to_one)
+        and field.on_delete is models.CASCADE
+        and field.related_model is not model
+    ]
+
+
+def delete_in_batches(queryset, batch_size=None, pause=None):
+    """Delete every row of ``queryset`` (and what cascades from it) in chunks; returns how many rows of ``queryset`` were removed"""
+    config = _config()
+    batch_size = batch_size or config.get('BATCH_SIZE', 500)
+    pause = config.get('BATCH_PAUSE', 0.05) if pause is None else pause
+    model = queryset.model
+    label = model._meta.label
+    relations = cascading_relations(model)
+    total = 0
+    while True:
+        ids = list(queryset.order_by('pk').values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            return total
+        for rel in relations:
+            children = rel.related_model._base_manager.using(queryset.db).filter(**{f'{rel.field.name}__in': ids})
+            delete_in_batches(children, batch_size, pause)
+        with transaction.atomic(using=queryset.db):
+            # Children added since are few; the collector takes them with the chunk
+            _, per_model = model._base_manager.using(queryset.db).filter(pk__in=ids).delete()
+        deleted = per_model.get(label, 0)
+        total += deleted
+        ROWS_DELETED.inc(deleted, model=label)
+        if len(ids) < batch_size:
+            return total
+        if pause:
+            time.sleep(pause)
+
+
+class BackgroundDeleter:
+    """Runs submitted deletion jobs one after another on a daemon thread"""
+
+    def __init__(self, shutdown_timeout=5):
+        self.shutdown_timeout = shutdown_timeout
+        self._queue = queue.Queue()
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+        self.completed = 0
+        self.failed = 0
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='background-deleter', daemon=True)
+                self._thread.start()
+
+    def submit(self, name, job, *args):
+        """Queue ``job(*args)``; False once the deleter is stopping"""
+        if self._stopping.is_set():
+            return False
+        self._ensure_started()
+        self._queue.put((name, job, args))
+        return True
+
+    def join(self):
+        """Block until every queued job has run"""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.join()
+
+    def stop(self):
+        # Unfinished jobs stay recorded in the database for the resume command
+        self._stopping.set()
+        if self._thread is not None and self._thread.is_alive():
+            self._thread.join(self.shutdown_timeout)
+
+    def _run(self):
+        while not self._stopping.is_set():
+            try:
+                name, job, args = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            close_old_connections()
+            try:
+                job(*args)
+                self.completed += 1
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"Background deletion {name} failed: {str(e)}")
+            finally:
+                self._queue.task_done()
+        close_old_connections()
+
+
+_deleter = None
+_deleter_lock = threading.Lock()
+
+
+def get_background_deleter():
+    """Return the process-wide deleter, or None when jobs should run inline"""
+    global _deleter
+    if not _config().get('BACKGROUND', True):
+        return None
+    if _deleter is None:
+        with _deleter_lock:
+            if _deleter is None:
+                _deleter = BackgroundDeleter()
+    return _deleter
+
+
+def run_deletion(name, job, *args):
+    """Run ``job(*args)`` on the background deleter, or right away when it is disabled"""
+    deleter = get_background_deleter()
+    if deleter is None or not deleter.submit(name, job, *args):
+        job(*args)
+
+
+PENDING = Gauge(
+    'background_delete_jobs_pending', 'Deletion jobs waiting on the background deleter.',
+    function=lambda: _deleter._queue.qsize() if _deleter is not None else 0,
+)
+
+
+@atexit.register
+def _stop_on_exit():
+    if _deleter is not None:
+        _deleter.stop()
+
+
+def _reset_deleter(*, setting, **kwargs):
+    global _deleter
+    if setting == 'BACKGROUND_DELETION' and _deleter is not None:
+        _deleter.stop()
+        _deleter = None
+
+
+setting_changed.connect(_reset_deleter)
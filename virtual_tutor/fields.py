@@ -0,0 +1,74 @@
+"""
+Model fields shared across apps.
+"""
+import zlib
+
+from django.db import models
+
+# First byte of a stored value: how the rest of it is encoded
+_RAW = b'\x00'
+_ZLIB = b'\x01'
+
+
+class CompressedTextField(models.TextField):
+    """
+    Text stored zlib-compressed in a binary column.
+
+    Behaves like a TextField in Python, forms and DRF serializers; only the
+    column type and its contents differ. Values shorter than
+    ``min_length`` bytes are stored uncompressed (with a one-byte header),
+    since compression would not make them smaller. Reads also accept
+    legacy plain-text values, so a column can be converted in place.
+    Database-side text lookups (``icontains`` etc.) do not work on the
+    compressed bytes.
+
+    Values are decompressed as rows are read, so plain ``str`` reaches
+    serializers and templates. Querysets that do not use the text should
+    leave the column out (``.defer()``, or ``.values()`` without it) rather
+    than pay for decompressing it.
+    """
+
+    def __init__(self, *args, level=6, min_length=128, **kwargs):
+        self.level = level
+        self.min_length = min_length
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        if self.level != 6:
+            kwargs['level'] = self.level
+        if self.min_length != 128:
+            kwargs['min_length'] = self.min_length
+        return name, path, args, kwargs
+
+    def get_internal_type(self):
+        return 'BinaryField'
+
+    def compress(self, value):
+        data = value.encode('utf-8')
+        if len(data) < self.min_length:
+            return _RAW + data
+        return _ZLIB + zlib.compress(data, self.level)
+
+    @staticmethod
+    def decompress(value):
+        if isinstance(value, str):
+            return value
+        value = bytes(value)
+        if value[:1] == _ZLIB:
+            return zlib.decompress(value[1:]).decode('utf-8')
+        if value[:1] == _RAW:
+            return value[1:].decode('utf-8')
+        return value.decode('utf-8')
+
+    def get_db_prep_value(self, value, connection, prepared=False):
+        if not prepared:
+            value = self.get_prep_value(value)
+        if value is None:
+            return None
+        return connection.Database.Binary(self.compress(value))
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return value
+        return self.decompress(value)
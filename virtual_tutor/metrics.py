@@ -0,0 +1,362 @@
+"""
+Prometheus-compatible metrics without extra dependencies.
+
+Metrics are kept in a process-local registry and served in the Prometheus
+text format by ``metrics_view``. Under a multi-process server set
+METRICS['MULTIPROCESS_DIR']: every worker then writes a snapshot of its
+values to ``<dir>/<pid>.json`` from a background thread every
+SNAPSHOT_INTERVAL seconds (and at exit), and the endpoint merges all
+snapshots. Counters and histograms are summed over every worker that ever
+wrote one, so restarts do not lose counts; gauges only over workers that
+are still alive. As with
+prometheus_client's multiprocess mode, empty the directory on deploy.
+"""
+import atexit
+import bisect
+import hmac
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _config():
+    return getattr(settings, 'METRICS', {})
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f'Duplicate metric {metric.name}')
+            self._metrics[metric.name] = metric
+
+    def snapshot(self):
+        """JSON-serialisable view of every metric in this process"""
+        return {
+            'pid': os.getpid(),
+            'metrics': {name: metric.snapshot() for name, metric in list(self._metrics.items())},
+        }
+
+
+REGISTRY = Registry()
+
+
+class Metric:
+    type = None
+
+    def __init__(self, name, documentation, labelnames=(), registry=REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+        registry.register(self)
+
+    def _key(self, labels):
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f'{self.name} expects labels {self.labelnames}')
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _samples(self):
+        with self._lock:
+            return [[list(key), value] for key, value in self._values.items()]
+
+    def snapshot(self):
+        return {
+            'type': self.type,
+            'help': self.documentation,
+            'labelnames': list(self.labelnames),
+            'samples': self._samples(),
+        }
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    """Gauge; ``function`` makes a label-less gauge read at collection time.
+
+    ``multiprocess_mode`` is 'livesum' (summed over live workers) or
+    'liveall' (one series per live worker, with a ``pid`` label).
+    """
+    type = 'gauge'
+
+    def __init__(self, name, documentation, labelnames=(), registry=REGISTRY,
+                 multiprocess_mode='livesum', function=None):
+        super().__init__(name, documentation, labelnames, registry)
+        self.multiprocess_mode = multiprocess_mode
+        self.function = function
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    @contextmanager
+    def track_inprogress(self, **labels):
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+    def _samples(self):
+        if self.function is not None:
+            try:
+                return [[[], float(self.function())]]
+            except Exception:
+                return []
+        return super()._samples()
+
+    def snapshot(self):
+        return dict(super().snapshot(), mode=self.multiprocess_mode)
+
+
+class Histogram(Metric):
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), registry=REGISTRY, buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames, registry)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        # Per-bucket (non-cumulative) counts; the last slot is +Inf
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = {'buckets': [0] * (len(self.buckets) + 1), 'sum': 0.0, 'count': 0}
+            entry['buckets'][index] += 1
+            entry['sum'] += value
+            entry['count'] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def _samples(self):
+        with self._lock:
+            return [
+                [list(key), {'buckets': list(entry['buckets']), 'sum': entry['sum'], 'count': entry['count']}]
+                for key, entry in self._values.items()
+            ]
+
+    def snapshot(self):
+        return dict(super().snapshot(), buckets=list(self.buckets))
+
+
+HTTP_REQUESTS = Counter(
+    'http_requests_total', 'HTTP requests handled.', ['method', 'endpoint', 'status']
+)
+HTTP_LATENCY = Histogram(
+    'http_request_duration_seconds', 'Time to produce an HTTP response.', ['method', 'endpoint']
+)
+HTTP_IN_FLIGHT = Gauge('http_requests_in_flight', 'HTTP requests being handled.')
+CACHE_REQUESTS = Counter(
+    'cache_requests_total', 'Application cache lookups.', ['cache', 'result']
+)
+
+
+def record_cache_lookup(cache, hit):
+    CACHE_REQUESTS.inc(cache=cache, result='hit' if hit else 'miss')
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def merge_snapshots(snapshots):
+    """Combine per-process snapshots into {name: metric snapshot}"""
+    merged = {}
+    for snapshot in snapshots:
+        pid = snapshot['pid']
+        alive = pid == os.getpid() or _pid_alive(pid)
+        for name, metric in snapshot['metrics'].items():
+            if metric['type'] == 'gauge' and not alive:
+                continue
+            target = merged.setdefault(name, dict(metric, samples={}))
+            labelnames = target['labelnames']
+            if metric['type'] == 'gauge' and metric.get('mode') == 'liveall':
+                labelnames = target['labelnames'] = metric['labelnames'] + ['pid']
+            for key, value in metric['samples']:
+                if len(labelnames) > len(metric['labelnames']):
+                    key = key + [str(pid)]
+                key = tuple(key)
+                if metric['type'] == 'histogram':
+                    current = target['samples'].get(key)
+                    if current is None:
+                        target['samples'][key] = {
+                            'buckets': list(value['buckets']), 'sum': value['sum'], 'count': value['count'],
+                        }
+                    else:
+                        current['buckets'] = [a + b for a, b in zip(current['buckets'], value['buckets'])]
+                        current['sum'] += value['sum']
+                        current['count'] += value['count']
+                else:
+                    target['samples'][key] = target['samples'].get(key, 0) + value
+    return merged
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(str(value))}"' for name, value in pairs) + '}'
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def render(merged):
+    """Prometheus text exposition format (version 0.0.4)"""
+    lines = []
+    for name in sorted(merged):
+        metric = merged[name]
+        lines.append(f"# HELP {name} {metric['help']}")
+        lines.append(f"# TYPE {name} {metric['type']}")
+        labelnames = metric['labelnames']
+        for key in sorted(metric['samples']):
+            value = metric['samples'][key]
+            if metric['type'] == 'histogram':
+                cumulative = 0
+                bounds = list(metric['buckets']) + [float('inf')]
+                for bound, count in zip(bounds, value['buckets']):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_labels(labelnames, key, [('le', _number(float(bound)))])} {cumulative}")
+                lines.append(f"{name}_sum{_labels(labelnames, key)} {_number(value['sum'])}")
+                lines.append(f"{name}_count{_labels(labelnames, key)} {value['count']}")
+            else:
+                lines.append(f"{name}{_labels(labelnames, key)} {_number(value)}")
+    return '\n'.join(lines) + '\n'
+
+
+_snapshot_lock = threading.Lock()
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def write_snapshot():
+    """Write this process's snapshot to MULTIPROCESS_DIR"""
+    directory = _config().get('MULTIPROCESS_DIR')
+    if not directory:
+        return
+    with _snapshot_lock:
+        path = os.path.join(directory, f'{os.getpid()}.json')
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w') as snapshot_file:
+            json.dump(REGISTRY.snapshot(), snapshot_file)
+        os.replace(tmp_path, path)
+
+
+def _write_snapshots():
+    while True:
+        time.sleep(_config().get('SNAPSHOT_INTERVAL', 1.0))
+        try:
+            write_snapshot()
+        except Exception as e:
+            logger.error(f"Error writing metrics snapshot: {str(e)}")
+
+
+def start_snapshot_writer():
+    """Write snapshots every SNAPSHOT_INTERVAL on a daemon thread (one per process, restarted after a fork)"""
+    global _writer
+    if _writer is not None and _writer.is_alive():
+        return
+    if not _config().get('MULTIPROCESS_DIR'):
+        return
+    with _writer_lock:
+        if _writer is None or not _writer.is_alive():
+            _writer = threading.Thread(target=_write_snapshots, name='metrics-snapshot', daemon=True)
+            _writer.start()
+
+
+def collect():
+    """Merged metrics of this process and, in multi-process mode, every other worker"""
+    directory = _config().get('MULTIPROCESS_DIR')
+    if not directory:
+        return merge_snapshots([REGISTRY.snapshot()])
+
+    write_snapshot()
+    snapshots = []
+    for filename in os.listdir(directory):
+        if not filename.endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(directory, filename)) as snapshot_file:
+                snapshots.append(json.load(snapshot_file))
+        except (OSError, ValueError):
+            # Partially written by a worker that died mid-write
+            continue
+    return merge_snapshots(snapshots)
+
+
+@atexit.register
+def _snapshot_on_exit():
+    try:
+        write_snapshot()
+    except Exception:
+        pass
+
+
+def metrics_view(request):
+    """Internal scrape endpoint; needs the bearer TOKEN, or a REMOTE_ADDR in METRICS['ALLOWED_IPS'] if set"""
+    config = _config()
+    if not config.get('ENABLED', True):
+        return HttpResponse(status=404)
+    token = config.get('TOKEN')
+    authorized = request.META.get('REMOTE_ADDR') in config.get('ALLOWED_IPS', ())
+    if token and hmac.compare_digest(request.headers.get('Authorization', '').encode(), f'Bearer {token}'.encode()):
+        authorized = True
+    if not authorized:
+        return HttpResponseForbidden()
+    return HttpResponse(render(collect()), content_type=CONTENT_TYPE)
@@ -0,0 +1,130 @@
+import logging
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from . import db_router, metrics, profiling
+
+logger = logging.getLogger(__name__)
+
+
+class MetricsMiddleware:
+    """
+    Records request count, latency and in-flight requests per endpoint.
+    The endpoint label is the matched URL route (e.g. ``api/ai/chat/``), so
+    path parameters do not create new series. For streamed responses the
+    latency is the time to the first byte.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'METRICS', {}).get('ENABLED', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        started = time.perf_counter()
+        with metrics.HTTP_IN_FLIGHT.track_inprogress():
+            response = self.get_response(request)
+        self._record(request, response, started)
+        return response
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        with metrics.HTTP_IN_FLIGHT.track_inprogress():
+            response = await self.get_response(request)
+        self._record(request, response, started)
+        return response
+
+    @staticmethod
+    def _record(request, response, started):
+        match = getattr(request, 'resolver_match', None)
+        endpoint = match.route if match else 'unmatched'
+        metrics.HTTP_LATENCY.observe(time.perf_counter() - started, method=request.method, endpoint=endpoint)
+        metrics.HTTP_REQUESTS.inc(method=request.method, endpoint=endpoint, status=response.status_code)
+        metrics.start_snapshot_writer()
+
+
+class ProfilingMiddleware:
+    """
+    Breaks sampled requests into spans reported in a Server-Timing header
+    (see virtual_tutor.profiling). Not installed unless PROFILING['ENABLED'].
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'PROFILING', {}).get('ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not profiling.should_profile(request):
+            return self.get_response(request)
+        token = profiling.start_profile()
+        response = self.get_response(request)
+        profiling.finish_profile(token, request, response)
+        return response
+
+    async def __acall__(self, request):
+        if not profiling.should_profile(request):
+            return await self.get_response(request)
+        token = profiling.start_profile()
+        response = await self.get_response(request)
+        profiling.finish_profile(token, request, response)
+        return response
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Lets safe requests read from DATABASE_REPLICAS and pins clients that
+    just wrote to the primary (see virtual_tutor.db_router). Not installed
+    when no replicas are configured, or when the pin cache is per-process
+    (read-your-writes could not hold across workers).
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not db_router.replicas():
+            raise MiddlewareNotUsed
+        if not db_router.pin_cache_is_shared():
+            logger.error("Read replicas disabled: DATABASE_REPLICA_ROUTING['CACHE_ALIAS'] is a per-process cache")
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        routing = db_router.start_routing(request)
+        response = None
+        try:
+            response = self.get_response(request)
+            return response
+        finally:
+            db_router.finish_routing(*routing, response)
+
+    async def __acall__(self, request):
+        routing = await db_router.astart_routing(request)
+        response = None
+        try:
+            response = await self.get_response(request)
+            return response
+        finally:
+            await db_router.afinish_routing(*routing, response)
@@ -0,0 +1,58 @@
+"""
+Keyset (cursor) pagination helpers shared by the list endpoints.
+
+Responses keep their plain JSON list body; the cursor for the next page is
+returned in the ``X-Next-Cursor`` header and as an RFC 8288 ``Link`` header,
+so existing clients are unaffected and deep pages cost the same as the first.
+"""
+import base64
+import json
+
+from django.utils.http import urlencode
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(*values):
+    raw = json.dumps(values, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, size):
+    """Decode a cursor into a list of ``size`` str/int values or raise InvalidCursor"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, TypeError, UnicodeError):
+        raise InvalidCursor('Invalid cursor.')
+    if not isinstance(values, list) or len(values) != size:
+        raise InvalidCursor('Invalid cursor.')
+    # Anything else (lists, objects, floats...) would only fail later, in a query
+    if not all(isinstance(value, (str, int)) and not isinstance(value, bool) for value in values):
+        raise InvalidCursor('Invalid cursor.')
+    return values
+
+
+def parse_limit(value, default, maximum):
+    """Clamp the ``limit`` query parameter to [1, maximum]"""
+    if value in (None, ''):
+        return default
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        raise ValueError('Limit must be an integer.')
+    return max(1, min(limit, maximum))
+
+
+def set_next_cursor(response, request, next_cursor):
+    """Expose the next-page cursor on a list response"""
+    if next_cursor is None:
+        return response
+    params = request.GET.copy()
+    params['cursor'] = next_cursor
+    url = request.build_absolute_uri(f"{request.path}?{urlencode(sorted(params.lists()), doseq=True)}")
+    response['X-Next-Cursor'] = next_cursor
+    response['Link'] = f'<{url}>; rel="next"'
+    return response
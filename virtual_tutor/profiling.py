@@ -0,0 +1,150 @@
+"""
+Opt-in per-request profiling.
+
+ProfilingMiddleware profiles a sampled share of requests (PROFILING
+['SAMPLE_RATE']). For those it collects time per span (``auth``, ``db``,
+``upstream``, ``serialize``), plus the query count, and reports them in a
+``Server-Timing`` header and, with LOG enabled, as one JSON log line on the
+``virtual_tutor.profiling`` logger. Spans may overlap (an auth lookup that
+misses the cache is also counted under ``db``). Only the work done before
+the response headers are sent is covered, so the body of a streamed
+response is not.
+
+Code marks spans with ``with span('name'):``. Outside a profiled request
+that is a single context-variable lookup, and with PROFILING['ENABLED']
+off the middleware is not installed at all.
+"""
+import json
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from rest_framework.renderers import JSONRenderer
+
+logger = logging.getLogger(__name__)
+
+_current = ContextVar('request_profile', default=None)
+
+
+def _config():
+    return getattr(settings, 'PROFILING', {})
+
+
+class RequestProfile:
+    """Accumulated duration and count per span name for one request"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.spans = {}
+        # Spans are also recorded from sync_to_async worker threads
+        self._lock = threading.Lock()
+
+    def add(self, name, duration):
+        with self._lock:
+            entry = self.spans.setdefault(name, [0.0, 0])
+            entry[0] += duration
+            entry[1] += 1
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def server_timing(self):
+        parts = []
+        for name, (duration, count) in self.spans.items():
+            part = f'{name};dur={duration * 1000:.1f}'
+            if name == 'db':
+                part += f';desc="queries: {count}"'
+            parts.append(part)
+        parts.append(f'total;dur={self.elapsed() * 1000:.1f}')
+        return ', '.join(parts)
+
+    def as_dict(self):
+        return {
+            'total_ms': round(self.elapsed() * 1000, 1),
+            'spans': {
+                name: {'ms': round(duration * 1000, 1), 'count': count}
+                for name, (duration, count) in self.spans.items()
+            },
+        }
+
+
+@contextmanager
+def span(name):
+    """Add the time spent in the block to span ``name`` of the current profile"""
+    profile = _current.get()
+    if profile is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.add(name, time.perf_counter() - started)
+
+
+def _time_query(execute, sql, params, many, context):
+    profile = _current.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile.add('db', time.perf_counter() - started)
+
+
+def install_query_timer(connection):
+    if _time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_time_query)
+
+
+def _on_connection_created(sender, connection, **kwargs):
+    install_query_timer(connection)
+
+
+def start_profile():
+    """Begin profiling the current request; returns the token for ``finish_profile``"""
+    # Connections opened before the middleware was loaded missed the signal
+    for connection in connections.all(initialized_only=True):
+        install_query_timer(connection)
+    return _current.set(RequestProfile())
+
+
+def finish_profile(token, request, response):
+    profile = _current.get()
+    _current.reset(token)
+    config = _config()
+    if config.get('HEADER', True):
+        response['Server-Timing'] = profile.server_timing()
+    if config.get('LOG', False):
+        logger.info(json.dumps(dict(
+            profile.as_dict(),
+            method=request.method,
+            path=request.path,
+            status=response.status_code,
+        )))
+
+
+def should_profile(request):
+    config = _config()
+    if config.get('ALLOW_FORCE', False) and request.headers.get('X-Profile') == '1':
+        return True
+    rate = config.get('SAMPLE_RATE', 0.01)
+    return rate >= 1 or random.random() < rate
+
+
+class ProfiledJSONRenderer(JSONRenderer):
+    """JSONRenderer that reports its time as the ``serialize`` span"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with span('serialize'):
+            return super().render(data, accepted_media_type, renderer_context)
+
+
+connection_created.connect(_on_connection_created)
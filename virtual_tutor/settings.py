@@ -1,176 +1,441 @@
-"""
-Django settings for virtual_tutor project.
-
-Generated by 'django-admin startproject' using Django 5.1.6.
-
-For more information on this file, see
-https://docs.djangoproject.com/en/5.1/topics/settings/
-
-For the full list of settings and their values, see
-https://docs.djangoproject.com/en/5.1/ref/settings/
-"""
-
-from pathlib import Path
-import os
-from dotenv import load_dotenv
-
-# Load environment variables from .env file
-load_dotenv()
-
-# Build paths inside the project like this: BASE_DIR / 'subdir'.
-BASE_DIR = Path(__file__).resolve().parent.parent
-
-
-# Quick-start development settings - unsuitable for production
-# See https://docs.djangoproject.com/en/5.1/howto/deployment/checklist/
-
-# SECURITY WARNING: keep the secret key used in production secret!
-SECRET_KEY = "django-insecure-gn@ew4-5^yp6z(&6ugx75j^0la577tqx8r*homhhmx8*fw%)a%"
-
-# SECURITY WARNING: don't run with debug turned on in production!
-
-DEBUG = True
-ALLOWED_HOSTS = ['*']
-CORS_ALLOW_ALL_ORIGINS = True
-CORS_ALLOW_CREDENTIALS = True
-CORS_ORIGIN_ALLOW_ALL = True
-# Optional: Set X-Frame-Options header to allow specific origins for embedding your site in frames
-X_FRAME_OPTIONS = 'ALLOWALL'
- 
-CSRF_TRUSTED_ORIGINS = [
-    "http://localhost:5173",  
-    "http://127.0.0.1:5173",
-    "http://127.0.0.1:8000"
-]
- 
-CORS_ALLOWED_ORIGINS = [
-    "http://localhost:5173",  
-    "http://127.0.0.1:5173",
-    "http://127.0.0.1:8000",
-]
-
-AUTH_USER_MODEL = 'account.User'
-ADMIN_CODE = 'AiTutor@2025!'  
-
-# API Keys Configuration
-GEMINI_API_KEY = os.environ.get('GEMINI_API_KEY', '')
-
-# Application definition
-
-INSTALLED_APPS = [
-    "django.contrib.admin",
-    "django.contrib.auth",
-    "django.contrib.contenttypes",
-    "django.contrib.sessions",
-    "django.contrib.messages",
-    "django.contrib.staticfiles",
-    "rest_framework",
-    "rest_framework.authtoken",
-    "account",
-    "corsheaders",
-    "ai_generator",
-]
-
-MIDDLEWARE = [
-    "django.middleware.security.SecurityMiddleware",
-    "django.contrib.sessions.middleware.SessionMiddleware",
-    "django.middleware.common.CommonMiddleware",
-    "django.middleware.csrf.CsrfViewMiddleware",
-    "django.contrib.auth.middleware.AuthenticationMiddleware",
-    "django.contrib.messages.middleware.MessageMiddleware",
-    "django.middleware.clickjacking.XFrameOptionsMiddleware",
-    "corsheaders.middleware.CorsMiddleware",
-]
-
-ROOT_URLCONF = "virtual_tutor.urls"
-
-TEMPLATES = [
-    {
-        "BACKEND": "django.template.backends.django.DjangoTemplates",
-        "DIRS": [],
-        "APP_DIRS": True,
-        "OPTIONS": {
-            "context_processors": [
-                "django.template.context_processors.debug",
-                "django.template.context_processors.request",
-                "django.contrib.auth.context_processors.auth",
-                "django.contrib.messages.context_processors.messages",
-            ],
-        },
-    },
-]
-
-WSGI_APPLICATION = "virtual_tutor.wsgi.application"
-
-
-# Database
-# https://docs.djangoproject.com/en/5.1/ref/settings/#databases
-
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.mysql',
-        'NAME': os.environ.get('DB_NAME', 'virtual_tutor_db'),
-        'USER': os.environ.get('DB_USER', 'root'),
-        'PASSWORD': os.environ.get('DB_PASSWORD', 'root'),
-        'HOST': os.environ.get('DB_HOST', 'localhost'),
-        'PORT': os.environ.get('DB_PORT', '3306'),
-        'OPTIONS': {
-            'charset': 'utf8mb4',
-            'init_command': "SET NAMES utf8mb4 COLLATE utf8mb4_unicode_ci",
-        },
-    }
-} 
-# Password validation
-# https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
-
-AUTH_PASSWORD_VALIDATORS = [
-    {
-        "NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator",
-    },
-    {
-        "NAME": "django.contrib.auth.password_validation.MinimumLengthValidator",
-    },
-    {
-        "NAME": "django.contrib.auth.password_validation.CommonPasswordValidator",
-    },
-    {
-        "NAME": "django.contrib.auth.password_validation.NumericPasswordValidator",
-    },
-]
-
-
-# Internationalization
-# https://docs.djangoproject.com/en/5.1/topics/i18n/
-
-LANGUAGE_CODE = "en-us"
-
-TIME_ZONE = "UTC"
-
-USE_I18N = True
-
-USE_TZ = True
-
-
-# Static files (CSS, JavaScript, Images)
-# https://docs.djangoproject.com/en/5.1/howto/static-files/
-
-STATIC_URL = "static/"
-
-# Default primary key field type
-# https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
-
-DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
-
-# REST Framework Configuration
-REST_FRAMEWORK = {
-    'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
-        'rest_framework.authentication.SessionAuthentication',
-    ],
-    'DEFAULT_PERMISSION_CLASSES': [
-        'rest_framework.permissions.IsAuthenticated',   
-    ],
-    'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
-    ],
+"""
+Django settings for virtual_tutor project.
+
+Generated by 'django-admin startproject' using Django 5.1.6.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/5.1/topics/settings/
+
+For the full list of settings and their values, see
+https://docs.djangoproject.com/en/5.1/ref/settings/
+"""
+
+from pathlib import Path
+import os
+from dotenv import load_dotenv
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Build paths inside the project like this: BASE_DIR / 'subdir'.
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+
+# Quick-start development settings - unsuitable for production
+# See https://docs.djangoproject.com/en/5.1/howto/deployment/checklist/
+
+# SECURITY WARNING: keep the secret key used in production secret!
+SECRET_KEY = "django-insecure-gn@ew4-5^yp6z(&6ugx75j^0la577tqx8r*homhhmx8*fw%)a%"
+
+# SECURITY WARNING: don't run with debug turned on in production!
+
+DEBUG = True
+ALLOWED_HOSTS = ['*']
+CORS_ALLOW_ALL_ORIGINS = True
+CORS_ALLOW_CREDENTIALS = True
+CORS_ORIGIN_ALLOW_ALL = True
+# Optional: Set X-Frame-Options header to allow specific origins for embedding your site in frames
+X_FRAME_OPTIONS = 'ALLOWALL'
+ 
+CSRF_TRUSTED_ORIGINS = [
+    "http://localhost:5173",  
+    "http://127.0.0.1:5173",
+    "http://127.0.0.1:8000"
+]
+ 
+CORS_ALLOWED_ORIGINS = [
+    "http://localhost:5173",  
+    "http://127.0.0.1:5173",
+    "http://127.0.0.1:8000",
+]
+
+AUTH_USER_MODEL = 'account.User'
+ADMIN_CODE = 'AiTutor@2025!'  
+
+# Page size for the /students/ and /admins/ lists when a client pages them
+# with limit or cursor (without either they return every user)
+ACCOUNT_LIST_PAGE_SIZE = int(os.environ.get('ACCOUNT_LIST_PAGE_SIZE', '100'))
+ACCOUNT_LIST_MAX_PAGE_SIZE = 1000
+
+# Bulk student import (students/import/ and manage.py import_students):
+# the command hashes passwords in HASH_WORKERS processes (default: one per
+# CPU) started for the run; API requests share REQUEST_HASH_WORKERS
+# processes kept per server process (1 hashes inline). Users are inserted
+# BATCH_SIZE per transaction; MAX_ROWS caps one API request
+ACCOUNT_IMPORT = {
+    'MAX_ROWS': int(os.environ.get('ACCOUNT_IMPORT_MAX_ROWS', '1000')),
+    'BATCH_SIZE': 500,
+    'HASH_WORKERS': int(os.environ['ACCOUNT_IMPORT_HASH_WORKERS']) if os.environ.get('ACCOUNT_IMPORT_HASH_WORKERS') else None,
+    'REQUEST_HASH_WORKERS': int(os.environ.get('ACCOUNT_IMPORT_REQUEST_HASH_WORKERS', '2')),
+}
+
+# API Keys Configuration
+GEMINI_API_KEY = os.environ.get('GEMINI_API_KEY', '')
+GEMINI_MODEL = os.environ.get('GEMINI_MODEL', 'gemini-1.5-flash')
+# 'grpc' (default) or 'rest'; the client is built once per process and its connection reused
+GEMINI_TRANSPORT = os.environ.get('GEMINI_TRANSPORT', 'grpc')
+
+# LLM backend behind GeminiService. Use ai_generator.backends.SimulatedBackend
+# for offline load tests/CI; its OPTIONS (seed, latency, error_rate, ...) are
+# documented on the class.
+AI_BACKEND = {
+    'BACKEND': os.environ.get('AI_BACKEND', 'ai_generator.backends.GeminiBackend'),
+    'OPTIONS': {},
+}
+
+# Serve /chat/, /explain/ and /content/generate/ from async views (ASGI deployments)
+AI_ASYNC_VIEWS = os.environ.get('AI_ASYNC_VIEWS', 'False') == 'True'
+
+# Batch explain/content endpoints: items per request and concurrent upstream calls per batch
+AI_BATCH_MAX_ITEMS = int(os.environ.get('AI_BATCH_MAX_ITEMS', '50'))
+AI_BATCH_CONCURRENCY = int(os.environ.get('AI_BATCH_CONCURRENCY', '8'))
+
+# Response cache for explain_concept / generate_educational_content.
+# BACKEND: ai_generator.cache.LocalLRUCacheBackend (per process),
+# ai_generator.cache.DjangoCacheBackend (OPTIONS: alias; the alias bounds its
+# own size) or ai_generator.cache.DatabaseCacheBackend (AIResponseCache table).
+# Every backend accepts max_entries, so switching AI_CACHE_BACKEND alone works.
+AI_RESPONSE_CACHE = {
+    'ENABLED': os.environ.get('AI_CACHE_ENABLED', 'True') == 'True',
+    'BACKEND': os.environ.get('AI_CACHE_BACKEND', 'ai_generator.cache.LocalLRUCacheBackend'),
+    'OPTIONS': {
+        'max_entries': int(os.environ.get('AI_CACHE_MAX_ENTRIES', '2048')),
+    },
+    # Seconds per task
+    'TIMEOUTS': {
+        'explain_concept': 60 * 60 * 24 * 7,
+        'educational_content': 60 * 60 * 24 * 7,
+    },
+}
+
+# Collapse identical concurrent upstream calls into one. CROSS_PROCESS also
+# coordinates worker processes through a lock in a shared CACHE_ALIAS
+# (Redis/Memcached); it has no effect with a per-process cache.
+AI_REQUEST_COALESCING = {
+    'ENABLED': os.environ.get('AI_COALESCING_ENABLED', 'True') == 'True',
+    'CROSS_PROCESS': os.environ.get('AI_COALESCING_CROSS_PROCESS', 'False') == 'True',
+    'CACHE_ALIAS': 'default',
+    # Seconds a follower waits for the leader before giving up
+    'WAIT_TIMEOUT': 60,
+    'LOCK_TIMEOUT': 60,
+    'RESULT_TIMEOUT': 10,
+}
+
+# Admission control for the AI endpoints. RATE_LIMITS are token buckets
+# (burst = bucket size, rate = tokens refilled per second; one token per
+# request, one per item for batches, so a batch may not exceed burst) kept in
+# CACHE_ALIAS; set a scope to None to disable it. At most MAX_UPSTREAM_CONCURRENCY upstream calls run per
+# process, MAX_UPSTREAM_QUEUE more wait up to UPSTREAM_QUEUE_TIMEOUT seconds,
+# and the rest get a 503 with Retry-After: RETRY_AFTER.
+AI_ADMISSION = {
+    'RATE_LIMITS': {
+        'user': {'burst': 20, 'rate': 0.5},
+        'anon': {'burst': 5, 'rate': 0.1},
+        # Generous: a classroom often shares one address
+        'ip': {'burst': 120, 'rate': 2.0},
+    },
+    'CACHE_ALIAS': 'default',
+    'MAX_UPSTREAM_CONCURRENCY': int(os.environ.get('AI_MAX_UPSTREAM_CONCURRENCY', '16')),
+    'MAX_UPSTREAM_QUEUE': int(os.environ.get('AI_MAX_UPSTREAM_QUEUE', '32')),
+    'UPSTREAM_QUEUE_TIMEOUT': 5,
+    'RETRY_AFTER': 5,
+}
+
+# Upstream call policy: per-task deadlines (seconds, across all attempts),
+# retries of transient errors with jittered exponential backoff, a circuit
+# breaker that fails fast while the upstream is unhealthy, and optional
+# hedging (a duplicate request after HEDGE_DELAY seconds; None disables it).
+AI_RESILIENCE = {
+    'DEADLINES': {
+        'chat': 30,
+        'explain_concept': 45,
+        'educational_content': 60,
+        'summary': 20,
+        'default': 30,
+    },
+    'RETRY': {
+        'MAX_ATTEMPTS': 3,
+        'BASE_DELAY': 0.5,
+        'MAX_DELAY': 8,
+    },
+    'CIRCUIT_BREAKER': {
+        'FAILURE_THRESHOLD': 5,
+        'RESET_TIMEOUT': 30,
+        'HALF_OPEN_MAX_CALLS': 1,
+    },
+    'HEDGE_DELAY': float(os.environ['AI_HEDGE_DELAY']) if os.environ.get('AI_HEDGE_DELAY') else None,
+}
+
+# Pre-generated content (python manage.py pregenerate_curriculum) checked by
+# explain_concept and generate_educational_content before going upstream;
+# CONCURRENCY is the command's default number of parallel upstream calls
+AI_CONTENT_LIBRARY = {
+    'ENABLED': os.environ.get('AI_CONTENT_LIBRARY_ENABLED', 'True') == 'True',
+    'CONCURRENCY': int(os.environ.get('AI_CONTENT_LIBRARY_CONCURRENCY', '4')),
+}
+
+# Cold-tier archive: python manage.py archive_chats moves chats older than
+# AFTER_DAYS from AIChat into ArchivedAIChat, BATCH_SIZE rows per transaction
+AI_CHAT_ARCHIVE = {
+    'AFTER_DAYS': int(os.environ.get('AI_CHAT_ARCHIVE_AFTER_DAYS', '180')),
+    'BATCH_SIZE': int(os.environ.get('AI_CHAT_ARCHIVE_BATCH_SIZE', '1000')),
+}
+
+# Retention: python manage.py purge_expired_chats deletes live and archived
+# chats older than MAX_AGE_DAYS (None keeps them forever)
+AI_CHAT_RETENTION = {
+    'MAX_AGE_DAYS': int(os.environ['AI_CHAT_RETENTION_DAYS']) if os.environ.get('AI_CHAT_RETENTION_DAYS') else None,
+}
+
+# Chunked deletes (account deletion, retention): BATCH_SIZE rows per
+# transaction with BATCH_PAUSE seconds between chunks to spare locks and
+# replicas. Account purges run on a background thread unless BACKGROUND is
+# False; python manage.py purge_deleted_users finishes interrupted ones.
+BACKGROUND_DELETION = {
+    'BACKGROUND': os.environ.get('BACKGROUND_DELETION', 'True') == 'True',
+    'BATCH_SIZE': int(os.environ.get('BACKGROUND_DELETION_BATCH_SIZE', '500')),
+    'BATCH_PAUSE': float(os.environ.get('BACKGROUND_DELETION_BATCH_PAUSE', '0.05')),
+}
+
+# Chat sessions: unsummarized turns sent with each follow-up are capped at
+# HISTORY_TOKEN_BUDGET (estimated) tokens; beyond that the oldest turns are
+# folded into the session summary until COMPACT_TO of the budget remains.
+AI_CONVERSATION = {
+    'HISTORY_TOKEN_BUDGET': int(os.environ.get('AI_HISTORY_TOKEN_BUDGET', '1500')),
+    'COMPACT_TO': 0.5,
+    'SUMMARY_MAX_WORDS': 150,
+    # Upper bound on turns read per prompt build
+    'MAX_HISTORY_TURNS': 50,
+}
+
+# Write-behind AIChat persistence: chats are queued in-process and written
+# with bulk_create every BATCH_SIZE rows or FLUSH_INTERVAL seconds. Responses
+# then carry chat_id null unless the client sends sync_save=true. A full
+# queue (MAX_QUEUE) falls back to a synchronous insert after PUT_TIMEOUT seconds.
+AI_CHAT_WRITE_BEHIND = {
+    'ENABLED': os.environ.get('AI_WRITE_BEHIND_ENABLED', 'False') == 'True',
+    'MAX_QUEUE': int(os.environ.get('AI_WRITE_BEHIND_MAX_QUEUE', '10000')),
+    'BATCH_SIZE': 200,
+    'FLUSH_INTERVAL': 0.5,
+    'PUT_TIMEOUT': 0.05,
+    # Seconds allowed to drain the queue at shutdown
+    'SHUTDOWN_TIMEOUT': 10,
+}
+
+# Chat search index: new chats are tokenized after commit on a background
+# thread per process (BACKGROUND False indexes them right after commit, on
+# the saving thread); python manage.py index_chat_search catches up on any
+# left unindexed. Searches rank with a chat count cached in CACHE_ALIAS for
+# DOC_COUNT_TIMEOUT seconds rather than counting on every query
+AI_CHAT_SEARCH = {
+    'BACKGROUND': os.environ.get('AI_CHAT_SEARCH_BACKGROUND', 'True') == 'True',
+    'BATCH_SIZE': 500,
+    'CACHE_ALIAS': 'default',
+    'DOC_COUNT_TIMEOUT': 300,
+}
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Token -> user lookups for CachedTokenAuthentication. Per process and
+    # bounded by default, which limits entries to LOCAL_TIMEOUT seconds; point
+    # it at Redis/Memcached so logouts and password changes invalidate every
+    # worker immediately and entries can live for TIMEOUT.
+    'auth_tokens': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'auth-tokens',
+        'OPTIONS': {'MAX_ENTRIES': int(os.environ.get('AUTH_TOKEN_CACHE_MAX_ENTRIES', '10000'))},
+    },
+}
+
+# CachedTokenAuthentication; TIMEOUT (seconds) bounds how long a change made
+# outside model signals can go unnoticed. A per-process ALIAS (LocMem) cannot
+# see other workers' logouts, so its entries expire after LOCAL_TIMEOUT.
+ACCOUNT_TOKEN_CACHE = {
+    'ENABLED': os.environ.get('AUTH_TOKEN_CACHE_ENABLED', 'True') == 'True',
+    'ALIAS': 'auth_tokens',
+    'TIMEOUT': int(os.environ.get('AUTH_TOKEN_CACHE_TIMEOUT', '300')),
+    'LOCAL_TIMEOUT': int(os.environ.get('AUTH_TOKEN_CACHE_LOCAL_TIMEOUT', '5')),
+}
+
+# Prometheus metrics served at /internal/metrics/ to a scraper sending
+# "Authorization: Bearer <TOKEN>"; without a TOKEN the endpoint refuses
+# everyone. ALLOWED_IPS (comma-separated, empty by default) additionally
+# admits those addresses without the token - only list ones that cannot be
+# spoofed, e.g. when not behind a proxy. Under a multi-worker
+# server point MULTIPROCESS_DIR at a directory shared by the workers (and
+# emptied on deploy) so the endpoint reports all of them, not just one
+METRICS = {
+    'ENABLED': os.environ.get('METRICS_ENABLED', 'True') == 'True',
+    'ALLOWED_IPS': [ip for ip in os.environ.get('METRICS_ALLOWED_IPS', '').split(',') if ip],
+    'TOKEN': os.environ.get('METRICS_TOKEN') or None,
+    'MULTIPROCESS_DIR': os.environ.get('METRICS_MULTIPROC_DIR') or None,
+    'SNAPSHOT_INTERVAL': float(os.environ.get('METRICS_SNAPSHOT_INTERVAL', '1.0')),
+}
+
+# Per-request profiling: SAMPLE_RATE of requests get a Server-Timing header
+# (auth, db, upstream, serialize spans) and, with LOG, a JSON log line.
+# ALLOW_FORCE lets a client profile a request by sending "X-Profile: 1"
+PROFILING = {
+    'ENABLED': os.environ.get('PROFILING_ENABLED', 'False') == 'True',
+    'SAMPLE_RATE': float(os.environ.get('PROFILING_SAMPLE_RATE', '0.01')),
+    'HEADER': os.environ.get('PROFILING_HEADER', 'True') == 'True',
+    'LOG': os.environ.get('PROFILING_LOG', 'False') == 'True',
+    'ALLOW_FORCE': os.environ.get('PROFILING_ALLOW_FORCE', 'False') == 'True',
+}
+
+# Application definition
+
+INSTALLED_APPS = [
+    "django.contrib.admin",
+    "django.contrib.auth",
+    "django.contrib.contenttypes",
+    "django.contrib.sessions",
+    "django.contrib.messages",
+    "django.contrib.staticfiles",
+    "rest_framework",
+    "rest_framework.authtoken",
+    "account",
+    "corsheaders",
+    "ai_generator",
+]
+
+MIDDLEWARE = [
+    "virtual_tutor.middleware.MetricsMiddleware",
+    "virtual_tutor.middleware.ProfilingMiddleware",
+    "virtual_tutor.middleware.ReplicaRoutingMiddleware",
+    "django.middleware.security.SecurityMiddleware",
+    "django.contrib.sessions.middleware.SessionMiddleware",
+    "django.middleware.common.CommonMiddleware",
+    "django.middleware.csrf.CsrfViewMiddleware",
+    "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "django.contrib.messages.middleware.MessageMiddleware",
+    "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "corsheaders.middleware.CorsMiddleware",
+]
+
+ROOT_URLCONF = "virtual_tutor.urls"
+
+TEMPLATES = [
+    {
+        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        "DIRS": [],
+        "APP_DIRS": True,
+        "OPTIONS": {
+            "context_processors": [
+                "django.template.context_processors.debug",
+                "django.template.context_processors.request",
+                "django.contrib.auth.context_processors.auth",
+                "django.contrib.messages.context_processors.messages",
+            ],
+        },
+    },
+]
+
+WSGI_APPLICATION = "virtual_tutor.wsgi.application"
+
+
+# Database
+# https://docs.djangoproject.com/en/5.1/ref/settings/#databases
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.mysql',
+        'NAME': os.environ.get('DB_NAME', 'virtual_tutor_db'),
+        'USER': os.environ.get('DB_USER', 'root'),
+        'PASSWORD': os.environ.get('DB_PASSWORD', 'root'),
+        'HOST': os.environ.get('DB_HOST', 'localhost'),
+        'PORT': os.environ.get('DB_PORT', '3306'),
+        'OPTIONS': {
+            'charset': 'utf8mb4',
+            'init_command': "SET NAMES utf8mb4 COLLATE utf8mb4_unicode_ci",
+        },
+    }
+} 
+
+# Read replicas: DB_REPLICA_HOSTS=host1,host2[:port] adds aliases replica_1,
+# replica_2, ... with the default credentials. GET requests under PATHS read
+# from them (see virtual_tutor/db_router.py); a client that just wrote reads
+# from the primary for PIN_SECONDS (pins are kept in CACHE_ALIAS, which must
+# be shared between workers - replicas stay unused while it is per-process),
+# and a replica that refuses connections is skipped for RETRY_AFTER seconds.
+# PRIMARY_MODELS are always read from the primary.
+DATABASE_REPLICAS = []
+for _index, _host in enumerate(filter(None, os.environ.get('DB_REPLICA_HOSTS', '').split(',')), start=1):
+    _host, _, _port = _host.strip().partition(':')
+    DATABASES[f'replica_{_index}'] = {
+        **DATABASES['default'],
+        'HOST': _host,
+        'PORT': _port or DATABASES['default']['PORT'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica_{_index}')
+
+DATABASE_ROUTERS = ['virtual_tutor.db_router.ReplicaRouter']
+
+DATABASE_REPLICA_ROUTING = {
+    'PATHS': ['/api/accounts/', '/api/ai/'],
+    'PIN_SECONDS': int(os.environ.get('DB_REPLICA_PIN_SECONDS', '5')),
+    'CACHE_ALIAS': os.environ.get('DB_REPLICA_PIN_CACHE', 'default'),
+    'PRIMARY_MODELS': ['authtoken.Token'],
+    'RETRY_AFTER': int(os.environ.get('DB_REPLICA_RETRY_AFTER', '30')),
+}
+# Password validation
+# https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
+
+AUTH_PASSWORD_VALIDATORS = [
+    {
+        "NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator",
+    },
+    {
+        "NAME": "django.contrib.auth.password_validation.MinimumLengthValidator",
+    },
+    {
+        "NAME": "django.contrib.auth.password_validation.CommonPasswordValidator",
+    },
+    {
+        "NAME": "django.contrib.auth.password_validation.NumericPasswordValidator",
+    },
+]
+
+
+# Internationalization
+# https://docs.djangoproject.com/en/5.1/topics/i18n/
+
+LANGUAGE_CODE = "en-us"
+
+TIME_ZONE = "UTC"
+
+USE_I18N = True
+
+USE_TZ = True
+
+
+# Static files (CSS, JavaScript, Images)
+# https://docs.djangoproject.com/en/5.1/howto/static-files/
+
+STATIC_URL = "static/"
+
+# Default primary key field type
+# https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
+
+DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
+
+# REST Framework Configuration
+REST_FRAMEWORK = {
+    'DEFAULT_AUTHENTICATION_CLASSES': [
+        'account.authentication.CachedTokenAuthentication',
+        'rest_framework.authentication.SessionAuthentication',
+    ],
+    'DEFAULT_PERMISSION_CLASSES': [
+        'rest_framework.permissions.IsAuthenticated',   
+    ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'virtual_tutor.profiling.ProfiledJSONRenderer',
+    ],
+    # Trusted reverse proxies in front of the app. Throttles key anonymous
+    # and per-IP buckets on the client address: with 0 that is REMOTE_ADDR,
+    # and X-Forwarded-For (which any client can set) is ignored
+    'NUM_PROXIES': int(os.environ.get('NUM_PROXIES', '0')),
 }
\ No newline at end of file